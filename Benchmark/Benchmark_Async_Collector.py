@@ -0,0 +1,79 @@
+"""
+Drives Async_OHLC_Collector with an in-process fake exchange and an in-memory sink and compares
+its wall time with a sequential loop over the same (symbol, interval) pairs. The concurrency
+limit, the rate spacing and the single batch are checked by Tests/test_Async_OHLC_Collector.py.
+Run from the project root:  python -m Benchmark.Benchmark_Async_Collector [--symbols 40] [--latency-ms 120]
+"""
+import argparse
+import asyncio
+from time import perf_counter
+import pandas as pd
+
+from Core_Trade.Async_OHLC_Collector import Async_OHLC_Collector
+
+INTERVALS = ['1m', '5m', '30m']
+
+
+class FakeAsyncExchange:
+    """Answers fetchOHLCV after `latency` seconds with the closed candle plus the one still forming."""
+    timeframes = {'1m': '1m', '5m': '5m', '15m': '15m', '30m': '30m', '1h': '1h'}
+
+    def __init__(self, latency: float, rate_limit_ms: float):
+        self.latency = latency
+        self.rateLimit = rate_limit_ms
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.call_times = []
+
+    async def fetchOHLCV(self, symbol, timeframe, since):
+        self.call_times.append(asyncio.get_running_loop().time())
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        step = int(pd.Timedelta(timeframe.replace('m', 'min')).total_seconds() * 1000)
+        return [[since, 100.0, 101.0, 99.0, 100.5, 12.0], [since + step, 100.5, 100.7, 100.1, 100.2, 1.0]]
+
+    async def close(self):
+        pass
+
+
+class MemorySink:
+    def __init__(self):
+        self.batches = []
+
+    async def write(self, frames):
+        self.batches.append(frames)
+        return sum(len(df) for df in frames.values())
+
+
+async def run(symbol_count, latency, rate_limit_ms, max_concurrency):
+    symbols = [f'COIN{i}/USDT' for i in range(symbol_count)]
+    exchange = FakeAsyncExchange(latency, rate_limit_ms)
+    sink = MemorySink()
+    collector = Async_OHLC_Collector(symbols, INTERVALS, sink, max_concurrency=max_concurrency, exchange=exchange)
+
+    start = perf_counter()
+    inserted = await collector.collect_once()
+    elapsed = perf_counter() - start
+    await collector.close()
+
+    pairs = symbol_count * len(INTERVALS)
+    gaps = [b - a for a, b in zip(exchange.call_times, exchange.call_times[1:])]
+    sequential = pairs * (latency + rate_limit_ms / 1000)
+
+    print(f"pairs={pairs} inserted={inserted} max_in_flight={exchange.max_in_flight}/{max_concurrency} "
+          f"min_gap={min(gaps) * 1000:.1f}ms (limit {rate_limit_ms}ms)")
+    print(f"async wall time {elapsed:.2f}s vs sequential {sequential:.2f}s ({sequential / elapsed:.1f}x)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Async collector benchmark with a fake exchange')
+    parser.add_argument('--symbols', type=int, default=40)
+    parser.add_argument('--latency-ms', type=float, default=120)
+    parser.add_argument('--rate-limit-ms', type=float, default=20)
+    parser.add_argument('--max-concurrency', type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.symbols, args.latency_ms / 1000, args.rate_limit_ms, args.max_concurrency))
@@ -0,0 +1,90 @@
+"""
+Checks Vectorized_Backtest against RealTimeTradeStrategy replayed row by row over the same
+generate_clean_data frame, for the live thresholds and a few looser sets that trigger more
+trades, then times both on the full history.
+Run from the project root:  python -m Benchmark.Benchmark_Backtest [--rows 100000] [--legacy-max-rows 100000]
+"""
+import argparse
+import logging
+from time import perf_counter
+import numpy as np
+
+from Benchmark.Synthetic_Data import synthetic_ohlc
+from Core_Trade.RawData_Weighting_OHLC import RawData_Weighting_OHLC
+from Core_Trade.Vectorized_Backtest import RealTimeTradeStrategy, StrategyThresholds, Vectorized_Backtest
+
+THRESHOLD_SETS = [
+    StrategyThresholds(),
+    StrategyThresholds(confirmation_gain=40, volume_momentum_min=60),
+    StrategyThresholds(scaled_close_10_max=0.5, confirmation_gain=0, volume_momentum_min=20, max_loss=-100),
+]
+
+
+class RecordingStrategy(RealTimeTradeStrategy):
+    """Live strategy that keeps its trade records in memory instead of appending them to Data/."""
+    def __init__(self, thresholds):
+        super().__init__(thresholds)
+        self.trades = []
+
+    def write_trade_to_file(self, trade):
+        self.trades.append(dict(trade))
+
+
+def live_replay(rows, thresholds):
+    strategy = RecordingStrategy(thresholds)
+    for row in rows:
+        strategy.evaluate_entry(row)
+        strategy.evaluate_exit(row)
+    return strategy.trades
+
+
+def same_trades(live, vectorized):
+    if len(live) != len(vectorized):
+        return False
+    for a, b in zip(live, vectorized):
+        if a.keys() != b.keys():
+            return False
+        for key in a:
+            if isinstance(a[key], float):
+                if not (a[key] == b[key] or (np.isnan(a[key]) and np.isnan(b[key]))):
+                    return False
+            elif a[key] != b[key]:
+                return False
+    return True
+
+
+def run(rows, legacy_max_rows):
+    clean = RawData_Weighting_OHLC(synthetic_ohlc(rows, interval='1min')).generate_clean_data()
+    legacy = clean.iloc[:legacy_max_rows]
+    # The live class logs every entry and exit
+    logging.getLogger('combined_OHLC_trade').setLevel(logging.WARNING)
+
+    for thresholds in THRESHOLD_SETS:
+        # Building the row dicts is part of the row-by-row replay cost
+        start = perf_counter()
+        live = live_replay(legacy.to_dict('records'), thresholds)
+        live_time = perf_counter() - start
+
+        start = perf_counter()
+        backtest = Vectorized_Backtest(legacy, thresholds)
+        vectorized = backtest.run()
+        vector_time = perf_counter() - start
+
+        assert same_trades(live, vectorized), f"trade records differ for {thresholds}"
+        entries = {t['entry_type'] for t in live}
+        print(f"{len(legacy)} rows, {len(live)} trades {sorted(entries)}: "
+              f"live {live_time:.3f}s, vectorized {vector_time:.4f}s ({live_time / vector_time:.0f}x)")
+
+    start = perf_counter()
+    backtest = Vectorized_Backtest(clean)
+    trades = [len(backtest.run(thresholds)) for thresholds in THRESHOLD_SETS]
+    print(f"full history {len(clean)} rows: {trades} trades for {len(THRESHOLD_SETS)} threshold sets "
+          f"in {perf_counter() - start:.3f}s")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Vectorized backtest parity and timing')
+    parser.add_argument('--rows', type=int, default=525_600, help='1m candles, default one year')
+    parser.add_argument('--legacy-max-rows', type=int, default=100_000)
+    args = parser.parse_args()
+    run(args.rows, args.legacy_max_rows)
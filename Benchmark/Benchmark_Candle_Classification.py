@@ -0,0 +1,42 @@
+"""
+Times classify_candles (np.select, categorical) against the row-wise DataFrame.apply path and
+compares their memory. The labels are checked against the apply path in Tests/test_Candle_Classification.py.
+Run from the project root:  python -m Benchmark.Benchmark_Candle_Classification [--sizes 10000 100000 1000000]
+"""
+import argparse
+from time import perf_counter
+import numpy as np
+
+from Core_Trade.RawData_Weighting_OHLC import classify_candle, classify_candles
+from Benchmark.Synthetic_Data import synthetic_ohlc
+
+
+def run(sizes):
+    print(f"{'rows':>10} {'apply_s':>10} {'vectorized_s':>14} {'speedup':>10} {'apply_MB':>10} {'categorical_MB':>16}")
+    for rows in sizes:
+        frame = synthetic_ohlc(rows)
+        rng = np.random.default_rng(rows)
+        frame['Scaled_Close_5'] = rng.uniform(0, 1, rows)
+        frame['slope_5'] = rng.normal(0, 20, rows)
+        frame.loc[frame.index[:6], ['Scaled_Close_5', 'slope_5']] = np.nan
+
+        start = perf_counter()
+        legacy = frame.apply(classify_candle, axis=1)
+        apply_time = perf_counter() - start
+
+        start = perf_counter()
+        labels = classify_candles(frame['open'], frame['high'], frame['low'], frame['close'],
+                                  frame['Scaled_Close_5'], frame['slope_5'])
+        fast_time = perf_counter() - start
+
+        apply_mb = legacy.memory_usage(deep=True) / 1e6
+        categorical_mb = labels.memory_usage(deep=True) / 1e6
+        print(f"{rows:>10} {apply_time:>10.3f} {fast_time:>14.4f} {apply_time / fast_time:>9.0f}x "
+              f"{apply_mb:>10.2f} {categorical_mb:>16.2f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Candle classification benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+    run(args.sizes)
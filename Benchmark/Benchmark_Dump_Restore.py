@@ -0,0 +1,145 @@
+"""
+Dump and restore of Dump_Trades_DB: the former read_sql + CSV path against the per-day Parquet
+dump, on throw-away trade.trade_benchdump_ohlc / _orderbook tables of the configured database
+(set db_endpoint, e.g. db_endpoint=localhost). Reports time, file size and peak memory (Python
+and NumPy allocations via tracemalloc, Arrow buffers are not counted), checks that the Parquet
+round trip restores the exact rows, and times a one-day range restore.
+Run from the project root:  python -m Benchmark.Benchmark_Dump_Restore [--days 10]
+"""
+import argparse
+import glob
+import os
+import tempfile
+import tracemalloc
+from time import perf_counter
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from Benchmark.Synthetic_Data import synthetic_ohlc
+from Helper.Bulk_Writer import BulkWriter
+from Helper.Create_DatabaseSchema import CreateDatabaseSchema
+from Helper.Database_Engine import get_postgres_engine
+from Helper.Dump_Trades_DB import Dump_Trades_DB
+
+SYMBOL = 'BENCH/DUMP'
+OHLC, ORDERBOOK = 'trade_benchdump_ohlc', 'trade_benchdump_orderbook'
+
+
+def create_tables(engine, days):
+    today = pd.Timestamp.now(tz='UTC').normalize()
+    schema_creator = CreateDatabaseSchema('trade')
+    drop_tables(engine)
+    schema_creator.create_tables_ohlc(OHLC)
+    with engine.begin() as conn:
+        conn.execute(text(f"""
+            CREATE TABLE trade.{ORDERBOOK} (
+                date TIMESTAMPTZ NOT NULL, action TEXT, price NUMERIC, btc_amount NUMERIC
+            ) PARTITION BY RANGE (date)
+        """))
+    for offset in range(-days, 1):
+        schema_creator.create_partition(OHLC, offset)
+        schema_creator.create_partition(ORDERBOOK, offset)
+
+    rng = np.random.default_rng(7)
+    start = str((today - pd.Timedelta(days=days)).date())
+    ohlc = synthetic_ohlc(days * 1440, interval='1min', start=start)
+    rows = days * 17280
+    orderbook = pd.DataFrame({
+        'date': pd.date_range(start, periods=rows, freq='5s', tz='UTC'),
+        'action': np.where(rng.random(rows) < 0.5, 'Buy', 'Sell'),
+        'price': (60000 + rng.normal(0, 500, rows)).round(2),
+        'btc_amount': rng.random(rows).round(8),
+    })
+    writer = BulkWriter(engine, schema='trade')
+    writer.write(ohlc, OHLC)
+    writer.write(orderbook, ORDERBOOK)
+    return len(ohlc) + len(orderbook)
+
+
+def drop_tables(engine):
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS trade.{OHLC} CASCADE"))
+        conn.execute(text(f"DROP TABLE IF EXISTS trade.{ORDERBOOK} CASCADE"))
+
+
+def truncate(engine):
+    with engine.begin() as conn:
+        conn.execute(text(f"TRUNCATE trade.{OHLC}, trade.{ORDERBOOK}"))
+
+
+def snapshot(engine):
+    with engine.connect() as conn:
+        return [conn.execute(text(f"SELECT * FROM trade.{table} ORDER BY date, 2, 3, 4")).fetchall()
+                for table in (OHLC, ORDERBOOK)]
+
+
+def csv_dump(dumper, directory):
+    # The former Dump_Trades_DB.dump
+    for suffix, label in (('ohlc', 'OHLC'), ('orderbook', 'Orderbook')):
+        df = pd.read_sql(f"SELECT * FROM trade.trade_{dumper.table_name}_{suffix};", dumper.engine)
+        df.to_csv(os.path.join(directory, f'Dump_{dumper.table_name}_{label}.csv'), index=False)
+
+
+def measure(label, func):
+    start = perf_counter()
+    func()
+    elapsed = perf_counter() - start
+
+    tracemalloc.start()
+    func()
+    _, python_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<24} {elapsed:7.2f}s  peak {python_peak / 1e6:7.1f} MB")
+
+
+def size_of(pattern):
+    return sum(os.path.getsize(name) for name in glob.glob(pattern)) / 1e6
+
+
+def run(days):
+    engine = get_postgres_engine()
+    rows = create_tables(engine, days)
+    print(f"{rows} rows over {days} days")
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            dumper = Dump_Trades_DB(SYMBOL, dump_dir=directory)
+            expected = snapshot(engine)
+
+            measure('csv dump', lambda: csv_dump(dumper, directory))
+            measure('parquet dump', dumper.dump)
+            print(f"  files: csv {size_of(os.path.join(directory, '*.csv')):.1f} MB, "
+                  f"parquet {size_of(os.path.join(directory, 'Dump_*', '*.parquet')):.1f} MB")
+
+            def csv_load():
+                truncate(engine)
+                dumper.load_csv()
+
+            def parquet_load():
+                truncate(engine)
+                dumper.load()
+
+            measure('csv load', csv_load)
+            measure('parquet load', parquet_load)
+            assert snapshot(engine) == expected, 'Parquet round trip changed the rows'
+
+            day = pd.Timestamp.now(tz='UTC').normalize() - pd.Timedelta(days=2)
+
+            def range_load():
+                truncate(engine)
+                dumper.load(start=day, end=day + pd.Timedelta(days=1))
+
+            measure('parquet load, one day', range_load)
+            with engine.connect() as conn:
+                count = conn.execute(text(f"SELECT count(*) FROM trade.{OHLC}")).scalar()
+            assert count == 1440, count
+            print("  round trip exact, one-day restore OK")
+    finally:
+        drop_tables(engine)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Dump/restore benchmark, CSV against Parquet')
+    parser.add_argument('--days', type=int, default=10)
+    args = parser.parse_args()
+    run(args.days)
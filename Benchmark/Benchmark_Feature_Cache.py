@@ -0,0 +1,57 @@
+"""
+Feature_Cache on synthetic 1m candles: cold computation, memory hit, Arrow file hit from a second
+cache instance, and incremental extension by new candles against a full recomputation, checking
+that the extended frame matches generate_clean_data over the whole history.
+Run from the project root:  python -m Benchmark.Benchmark_Feature_Cache [--rows 200000] [--new 30]
+"""
+import argparse
+import tempfile
+from time import perf_counter
+import numpy as np
+
+from Benchmark.Synthetic_Data import synthetic_ohlc
+from Core_Trade.Feature_Cache import Feature_Cache
+from Core_Trade.RawData_Weighting_OHLC import RawData_Weighting_OHLC
+
+TABLE, INTERVAL = 'trade_btcusdt1m_ohlc', '1m'
+
+
+def timed(label, func):
+    start = perf_counter()
+    result = func()
+    print(f"  {label:<34} {(perf_counter() - start) * 1000:9.1f} ms")
+    return result
+
+
+def check_same(expected, actual):
+    assert list(expected.columns) == list(actual.columns) and expected.dtypes.equals(actual.dtypes)
+    for column in expected.columns:
+        if column in ('date', 'candle_figure'):
+            assert expected[column].astype(object).fillna('').equals(actual[column].astype(object).fillna('')), column
+        else:
+            np.testing.assert_allclose(actual[column].to_numpy(dtype=float), expected[column].to_numpy(dtype=float),
+                                       rtol=1e-7, atol=1e-6, equal_nan=True, err_msg=column)
+
+
+def run(rows, new):
+    raw = synthetic_ohlc(rows + new, interval='1min')
+    history = raw.iloc[:rows]
+    print(f"{rows} cached rows, {new} new candles")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = Feature_Cache(cache_dir=cache_dir)
+        timed('cold put (compute + write)', lambda: cache.put(TABLE, INTERVAL, history))
+        timed('memory hit', lambda: cache.get_or_compute(TABLE, INTERVAL, history))
+        timed('arrow file hit (new cache)', lambda: Feature_Cache(cache_dir=cache_dir).get(TABLE, INTERVAL))
+        extended = timed('extend by new candles', lambda: cache.get_or_compute(TABLE, INTERVAL, raw))
+        full = timed('full recomputation', lambda: RawData_Weighting_OHLC(raw.copy()).generate_clean_data())
+        check_same(full, extended)
+        print(f"  hits={cache.hits} misses={cache.misses} extended_rows={cache.extended_rows}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Feature cache benchmark')
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--new', type=int, default=30)
+    args = parser.parse_args()
+    run(args.rows, args.new)
@@ -0,0 +1,107 @@
+"""
+Bytes per row of the OHLC and feature frames before and after the dtype plans of
+Helper/Frame_Schema.py: the former SELECT * read (NUMERIC as Decimal objects, which pandas
+coerces to float afterwards by default) against the float64, float32-volume and fixed-point
+int64 plans cast by PostgreSQL, then the clean frame of generate_clean_data with float64 and
+float32 features. Times are of an untraced run, the peaks of a second run under tracemalloc.
+Fixed-point values are checked against the exact Decimals. Uses a throw-away trade.trade_benchschema1m_ohlc table of the configured
+database (set db_endpoint, e.g. db_endpoint=localhost).
+Run from the project root:  python -m Benchmark.Benchmark_Frame_Schema [--rows 100000]
+"""
+import argparse
+import logging
+import tracemalloc
+from time import perf_counter
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from Benchmark.Synthetic_Data import synthetic_ohlc
+from Core_Trade.Fetch_fromDB_OHLC import Fetch_fromDB_OHLC
+from Core_Trade.RawData_Weighting_OHLC import RawData_Weighting_OHLC
+from Helper.Bulk_Writer import BulkWriter
+from Helper.Create_DatabaseSchema import CreateDatabaseSchema
+from Helper.Database_Engine import get_postgres_engine
+from Helper.Frame_Schema import OHLC_SCHEMA, OHLC_FIXED_SCHEMA, bytes_per_row, cast_frame
+from Helper.Partition_Manager import Partition_Manager
+
+SYMBOL = 'BENCH/SCHEMA'
+TABLE = 'trade_benchschema1m_ohlc'
+PLANS = {
+    'float64': OHLC_SCHEMA,
+    'float32 volume': {**OHLC_SCHEMA, 'volume': 'float32'},
+    'fixed-point int64': OHLC_FIXED_SCHEMA,
+}
+
+
+def traced(func):
+    # tracemalloc slows down Python-level loops such as Decimal conversions, so it gets a run of its own
+    start = perf_counter()
+    result = func()
+    seconds = perf_counter() - start
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, seconds, peak / 2**20
+
+
+def report(label, frame, seconds, peak):
+    print(f"  {label:<36} {bytes_per_row(frame):8.1f} B/row {seconds:8.3f}s {peak:9.1f} MiB peak")
+
+
+def create_table(engine, rows):
+    drop_table(engine)
+    CreateDatabaseSchema('trade').create_tables_ohlc(TABLE)
+    now = pd.Timestamp.now(tz='UTC').floor('min')
+    candles = synthetic_ohlc(rows, interval='1min', start=now - pd.Timedelta(minutes=rows - 1))
+    Partition_Manager('trade').ensure_for_dates(TABLE, candles['date'])
+    BulkWriter(engine, schema='trade').write(candles, TABLE)
+
+
+def drop_table(engine):
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS trade.{TABLE} CASCADE"))
+
+
+def run(rows):
+    logging.getLogger('combined_OHLC_trade').setLevel(logging.WARNING)
+    engine = get_postgres_engine()
+    create_table(engine, rows)
+    try:
+        print(f"OHLC read of {rows} candles")
+        query = f"SELECT * FROM trade.{TABLE} ORDER BY date"
+        legacy, seconds, peak = traced(lambda: pd.read_sql(query, engine, coerce_float=False))
+        report('SELECT * (Decimal objects)', legacy, seconds, peak)
+        coerced, seconds, peak = traced(lambda: pd.read_sql(query, engine))
+        report('SELECT *, Decimals coerced by pandas', coerced, seconds, peak)
+        frames = {}
+        for label, plan in PLANS.items():
+            fetcher = Fetch_fromDB_OHLC('trade', dtypes=plan)
+            frames[label], seconds, peak = traced(lambda: fetcher.get_OHLC_fromDB(symbol=SYMBOL, interval='1m', limit=rows))
+            report(label, frames[label], seconds, peak)
+
+        exact = cast_frame(legacy, OHLC_FIXED_SCHEMA)
+        for column in OHLC_FIXED_SCHEMA:
+            assert np.array_equal(frames['fixed-point int64'][column].to_numpy(), exact[column].to_numpy()), column
+        assert frames['float64'][list(OHLC_SCHEMA)].equals(cast_frame(legacy, OHLC_SCHEMA)[list(OHLC_SCHEMA)])
+        print("  fixed-point values match the Decimals exactly, float64 values match float(Decimal)")
+
+        print("Clean feature frame")
+        for label, history, feature_float in (('Decimal input, float64 features', legacy, 'float64'),
+                                              ('float64 input, float64 features', frames['float64'], 'float64'),
+                                              ('float64 input, float32 features', frames['float64'], 'float32')):
+            clean, seconds, peak = traced(
+                lambda: RawData_Weighting_OHLC(history.copy(), feature_float=feature_float).generate_clean_data())
+            report(label, clean, seconds, peak)
+    finally:
+        drop_table(engine)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Bytes per row of the OHLC and feature frames under the dtype plans')
+    parser.add_argument('--rows', type=int, default=100_000)
+    args = parser.parse_args()
+    run(args.rows)
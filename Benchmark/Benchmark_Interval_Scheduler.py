@@ -0,0 +1,63 @@
+"""
+Replays the live trading schedule on a SimulatedClock: a 30m fetch job, a 30m evaluate job that
+does not catch up, and a daily partition job. The fetch sometimes overruns by several intervals;
+the replay reports the fetched candles, the lateness of the fetch runs, the missed/skipped ticks
+of every job and the scheduler overhead per run. The schedule itself is checked in
+Tests/test_Interval_Scheduler.py.
+Run from the project root:  python -m Benchmark.Benchmark_Interval_Scheduler [--days 7] [--stall-every 20]
+"""
+import argparse
+from time import perf_counter
+import pandas as pd
+
+from Helper.Interval_Scheduler import Interval_Scheduler, SimulatedClock
+
+
+def run(days, stall_every, stall_minutes):
+    clock = SimulatedClock('2025-01-01 00:00:05')
+    scheduler = Interval_Scheduler(clock)
+    log = []
+
+    def fetch(candle_close, catching_up):
+        log.append(('fetch', candle_close, clock.now()))
+        if not catching_up and len(log) % stall_every == 0:
+            clock.advance(stall_minutes * 60)
+        else:
+            clock.advance(2)
+
+    def evaluate(candle_close, catching_up):
+        log.append(('evaluate', candle_close, clock.now()))
+        clock.advance(1)
+
+    def partitions(candle_close, catching_up):
+        log.append(('partitions', candle_close, clock.now()))
+
+    jobs = [
+        scheduler.add_job('fetch', '30m', fetch, offset_seconds=10),
+        scheduler.add_job('evaluate', '30m', evaluate, offset_seconds=15, catch_up=False),
+        scheduler.add_job('partitions', '1d', partitions, offset_seconds=60, catch_up=False),
+    ]
+    start = perf_counter()
+    scheduler.run(until=pd.Timestamp('2025-01-01', tz='UTC') + pd.Timedelta(days=days))
+    elapsed = perf_counter() - start
+
+    fetched, lateness = set(), []
+    for name, candle_close, started in log:
+        if name == 'fetch':
+            fetched.add(candle_close)
+            lateness.append((started - candle_close).total_seconds())
+
+    print(f"fetch candles {len(fetched)}/{days * 48}, on-time median lateness {pd.Series(lateness).median():.0f}s")
+    print(f"{len(log)} runs replayed in {elapsed:.2f}s, {elapsed / len(log) * 1e6:.0f} us of scheduling per run")
+    for job in jobs:
+        print(f"  {job.name:<11} runs={job.runs:<4} missed={job.missed_ticks:<4} skipped={job.skipped_ticks:<4} "
+              f"failures={job.failures}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Interval scheduler replay on a simulated clock')
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--stall-every', type=int, default=20, help='every Nth fetch overruns')
+    parser.add_argument('--stall-minutes', type=float, default=95)
+    args = parser.parse_args()
+    run(args.days, args.stall_every, args.stall_minutes)
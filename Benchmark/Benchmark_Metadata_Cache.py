@@ -0,0 +1,92 @@
+"""
+Database round-trips of FetchTradeMinute.fetch_ohlc_and_load_to_db in steady state, counted as
+connection checkouts and SQL statements on the shared engine, with a stub exchange and a
+throw-away trade.trade_benchmeta1m_ohlc table of the configured database (set db_endpoint, e.g.
+db_endpoint=localhost). The catalog query the former table check made on every call is timed alongside.
+Run from the project root:  python -m Benchmark.Benchmark_Metadata_Cache [--calls 200]
+"""
+import argparse
+from time import perf_counter
+import pandas as pd
+from sqlalchemy import event, inspect, text
+
+from Core_Trade.Fetch_Online_OHLC import FetchTradeMinute
+from Helper.Database_Engine import get_postgres_engine
+
+SYMBOL = 'BENCH/META'
+TABLE = 'trade_benchmeta1m_ohlc'
+
+
+class StubExchange:
+    """Hands out one closed 1m candle per call, a minute earlier each time so the dates never collide."""
+    timeframes = {'1m': '1m'}
+
+    def __init__(self):
+        self.next_ms = int(pd.Timestamp.now(tz='UTC').floor('min').timestamp() * 1000) - 60_000
+
+    def fetchOHLCV(self, symbol, timeframe, since, limit=None):
+        candle = [self.next_ms, 100.0, 101.0, 99.0, 100.5, 12.0]
+        self.next_ms -= 60_000
+        return [candle]
+
+
+class RoundTrips:
+    def __init__(self, engine):
+        self.checkouts = 0
+        self.statements = 0
+        event.listen(engine.pool, 'checkout', self._checkout)
+        event.listen(engine, 'before_cursor_execute', self._statement)
+
+    def _checkout(self, *args):
+        self.checkouts += 1
+
+    def _statement(self, *args):
+        self.statements += 1
+
+    def reset(self):
+        self.checkouts = self.statements = 0
+
+
+def drop_table(engine):
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS trade.{TABLE} CASCADE"))
+
+
+def run(calls):
+    engine = get_postgres_engine()
+    drop_table(engine)
+    fetcher = FetchTradeMinute('binance', SYMBOL, exchange=StubExchange())
+    fetcher.sink.metadata.invalidate()
+    counter = RoundTrips(engine)
+    try:
+        fetcher.fetch_ohlc_and_load_to_db('1m')   # first call creates the table and today's partition
+
+        counter.reset()
+        start = perf_counter()
+        for _ in range(calls):
+            inspect(engine).get_table_names(schema='trade')
+        legacy = (perf_counter() - start) / calls
+        print(f"  former table check: {counter.checkouts / calls:.1f} checkouts, "
+              f"{counter.statements / calls:.1f} statements, {legacy * 1000:.2f} ms per call")
+
+        counter.reset()
+        start = perf_counter()
+        for _ in range(calls):
+            fetcher.fetch_ohlc_and_load_to_db('1m')
+        elapsed = (perf_counter() - start) / calls
+        print(f"  cached fetch_ohlc_and_load_to_db: {counter.checkouts / calls:.2f} checkouts, "
+              f"{counter.statements / calls:.2f} statements, {elapsed * 1000:.2f} ms per call")
+
+        with engine.connect() as conn:
+            stored = conn.execute(text(f"SELECT count(*) FROM trade.{TABLE}")).scalar()
+        assert stored == calls + 1, stored
+    finally:
+        drop_table(engine)
+        fetcher.sink.metadata.invalidate()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Metadata cache round-trip benchmark')
+    parser.add_argument('--calls', type=int, default=200)
+    args = parser.parse_args()
+    run(args.calls)
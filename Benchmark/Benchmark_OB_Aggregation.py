@@ -0,0 +1,119 @@
+"""
+Order book aggregation in pandas (streamed raw rows) against PostgreSQL (FILTER aggregates and
+date_trunc, only the aggregates are fetched) and against the incrementally refreshed 5-second
+rollup table. Uses throw-away trade.trade_benchagg_orderbook / _orderbook_5s tables of the
+configured database (set db_endpoint, e.g. db_endpoint=localhost) and checks that the three
+paths give the same frames. The CSV outputs go to a temporary directory.
+Run from the project root:  python -m Benchmark.Benchmark_OB_Aggregation [--hours 34] [--new-minutes 30]
+"""
+import argparse
+import os
+import tempfile
+from time import perf_counter
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_numeric_dtype
+from sqlalchemy import text
+
+from Benchmark.Synthetic_Data import synthetic_orderbook
+from Core_Trade.RawData_Weighting_OB import RawData_Weighting_OB
+from Helper.Bulk_Writer import BulkWriter
+from Helper.Create_DatabaseSchema import CreateDatabaseSchema
+from Helper.Database_Engine import get_postgres_engine
+
+SYMBOL = 'BENCH/AGG'
+TABLE = 'trade_benchagg_orderbook'
+LEVELS = 6   # rows per 5-second snapshot
+
+
+def create_table(engine, hours, new_minutes):
+    drop_tables(engine)
+    with engine.begin() as conn:
+        conn.execute(text(f"""
+            CREATE TABLE trade.{TABLE} (
+                date TIMESTAMPTZ NOT NULL, action TEXT, price NUMERIC, btc_amount NUMERIC
+            ) PARTITION BY RANGE (date)
+        """))
+    schema_creator = CreateDatabaseSchema('trade')
+    for offset in range(-(hours // 24) - 1, 1):
+        schema_creator.create_partition(TABLE, offset)
+
+    # The newest minutes are held back and inserted after the first rollup refresh
+    now = pd.Timestamp.now(tz='UTC').floor('min')
+    split = now - pd.Timedelta(minutes=new_minutes)
+    BulkWriter(engine, schema='trade').write(
+        synthetic_orderbook(now - pd.Timedelta(hours=hours) + pd.Timedelta(minutes=1), split, LEVELS, seed=7), TABLE)
+    return synthetic_orderbook(split, now, LEVELS, seed=8)
+
+
+def drop_tables(engine):
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS trade.{TABLE} CASCADE"))
+        conn.execute(text(f"DROP TABLE IF EXISTS trade.{TABLE}_5s"))
+
+
+def check_same(expected, actual):
+    assert list(expected.columns) == list(actual.columns), (list(expected.columns), list(actual.columns))
+    assert len(expected) == len(actual), (len(expected), len(actual))
+    for column in expected.columns:
+        if is_numeric_dtype(expected[column]):
+            np.testing.assert_allclose(actual[column].to_numpy(dtype=float), expected[column].to_numpy(dtype=float),
+                                       rtol=1e-9, atol=1e-9, err_msg=column)
+        else:
+            assert expected[column].astype(str).equals(actual[column].astype(str)), column
+
+
+def read_outputs():
+    return [pd.read_csv(os.path.join('Data', name)) for name in
+            ('OrderBook_Grouped_by5sec.csv', 'OrderBook_Grouped_byMin.csv')]
+
+
+def timed(label, func):
+    start = perf_counter()
+    result = func()
+    print(f"  {label:<30} {perf_counter() - start:7.2f}s")
+    return result
+
+
+def run(hours, new_minutes):
+    engine = get_postgres_engine()
+    new_rows = create_table(engine, hours, new_minutes)
+    cwd = os.getcwd()
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            os.chdir(directory)
+            os.makedirs('Data')
+            cleaner = RawData_Weighting_OB(SYMBOL)
+            print(f"{hours} hours of order book, {hours * 720 * LEVELS} rows")
+
+            timed('pandas (streamed raw rows)', lambda: cleaner.generate_clean_data(since_hour=hours + 1))
+            expected = read_outputs()
+            timed('postgres aggregation', lambda: cleaner.generate_clean_data(since_hour=hours + 1, aggregate_in_db=True))
+            for frame, actual in zip(expected, read_outputs()):
+                check_same(frame, actual)
+
+            timed('rollup, first refresh', cleaner.refresh_rollup)
+            timed('rollup read', lambda: cleaner.generate_clean_data(since_hour=hours + 1, use_rollup=True))
+            for frame, actual in zip(expected, read_outputs()):
+                check_same(frame, actual)
+
+            BulkWriter(engine, schema='trade').write(new_rows, TABLE)
+            written = timed(f'rollup refresh, {new_minutes} new min', cleaner.refresh_rollup)
+            print(f"  {written} buckets written by the incremental refresh")
+            cleaner.generate_clean_data(since_hour=hours + 1)
+            expected = read_outputs()
+            cleaner.generate_clean_data(since_hour=hours + 1, use_rollup=True)
+            for frame, actual in zip(expected, read_outputs()):
+                check_same(frame, actual)
+            print("  pandas, postgres and rollup frames match")
+    finally:
+        os.chdir(cwd)
+        drop_tables(engine)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Order book aggregation benchmark, pandas against PostgreSQL')
+    parser.add_argument('--hours', type=int, default=34)
+    parser.add_argument('--new-minutes', type=int, default=30)
+    args = parser.parse_args()
+    run(args.hours, args.new_minutes)
@@ -0,0 +1,103 @@
+"""
+OHLC_Rollup on synthetic 1m candles in throw-away trade.trade_benchroll<interval>_ohlc tables of
+the configured database (set db_endpoint, e.g. db_endpoint=localhost): full rollup of every
+timeframe, then an incremental refresh after new 1m candles land and a zeroed fallback of the
+last hours is repaired, which the trailing re-roll window must pick up. Each rolled-up table is checked
+against a pandas resample of the 1m candles (first/max/min/last/sum over closed buckets).
+Run from the project root:  python -m Benchmark.Benchmark_OHLC_Rollup [--days 30] [--new-minutes 45]
+"""
+import argparse
+from time import perf_counter
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from Benchmark.Synthetic_Data import synthetic_ohlc
+from Core_Trade.OHLC_Rollup import OHLC_Rollup, ROLLUP_INTERVALS, BUCKET_ORIGIN, interval_minutes
+from Helper.Bulk_Writer import BulkWriter
+from Helper.Create_DatabaseSchema import CreateDatabaseSchema
+from Helper.Database_Engine import get_postgres_engine
+
+SYMBOL = 'BENCH/ROLL'
+
+
+def drop_tables(engine, rollup):
+    with engine.begin() as conn:
+        for interval in ('1m',) + ROLLUP_INTERVALS:
+            conn.execute(text(f"DROP TABLE IF EXISTS trade.{rollup.table_name(interval)} CASCADE"))
+
+
+def write_base(engine, rollup, candles):
+    table = rollup.table_name('1m')
+    today = pd.Timestamp.now(tz='UTC').normalize()
+    for day in candles['date'].dt.normalize().unique():
+        rollup.schema_creator.create_partition(table, offset=(day - today).days)
+    BulkWriter(engine, schema='trade').write(candles, table)
+
+
+def expected_candles(candles, interval, until):
+    candles = candles[(candles['open'] > 0) & (candles['date'] < until)]
+    resampled = candles.set_index('date').resample(f"{interval_minutes(interval)}min", origin=BUCKET_ORIGIN).agg(
+        {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'})
+    return resampled.dropna().reset_index()
+
+
+def check_rollup(engine, rollup, candles):
+    until = candles['date'].iloc[-1] + pd.Timedelta(minutes=1)
+    for interval in ROLLUP_INTERVALS:
+        minutes = interval_minutes(interval)
+        closed = BUCKET_ORIGIN + ((until - BUCKET_ORIGIN) // pd.Timedelta(minutes=minutes)) * pd.Timedelta(minutes=minutes)
+        expected = expected_candles(candles, interval, closed)
+        actual = pd.read_sql(f"SELECT * FROM trade.{rollup.table_name(interval)} ORDER BY date", engine)
+        assert len(actual) == len(expected), (interval, len(actual), len(expected))
+        assert (actual['date'].dt.tz_convert('UTC').to_numpy() == expected['date'].to_numpy()).all(), interval
+        for column in ('open', 'high', 'low', 'close', 'volume'):
+            np.testing.assert_allclose(actual[column].to_numpy(dtype=float), expected[column].to_numpy(dtype=float),
+                                       rtol=1e-12, err_msg=f"{interval} {column}")
+
+
+def timed(label, func):
+    start = perf_counter()
+    result = func()
+    print(f"  {label:<34} {perf_counter() - start:7.2f}s")
+    return result
+
+
+def run(days, new_minutes):
+    engine = get_postgres_engine()
+    rollup = OHLC_Rollup(SYMBOL, '1m')
+    drop_tables(engine, rollup)
+    CreateDatabaseSchema('trade').create_tables_ohlc(rollup.table_name('1m'))
+
+    # Ends mid-candle for every timeframe, so the open buckets must be left out
+    start = pd.Timestamp.now(tz='UTC').normalize() - pd.Timedelta(days=days)
+    candles = synthetic_ohlc(days * 1440 + new_minutes + 7, interval='1min', start=str(start.tz_localize(None)))
+    candles.loc[100, ['open', 'high', 'low', 'close', 'volume']] = 0   # a zeroed fallback candle
+    history, new = candles.iloc[:days * 1440 + 7].copy(), candles.iloc[days * 1440 + 7:]
+    # Fetched as a fallback two hours before the end, repaired before the next refresh
+    repaired = history.index[-120]
+    history.loc[repaired, ['open', 'high', 'low', 'close', 'volume']] = 0
+    print(f"{len(history)} 1m candles, then {len(new)} new ones")
+    try:
+        write_base(engine, rollup, history)
+        written = timed('full rollup, all timeframes', rollup.refresh_all)
+        print(f"  {written}")
+        check_rollup(engine, rollup, history)
+
+        timed('refresh with nothing new', rollup.refresh_all)
+        BulkWriter(engine, schema='trade').upsert(candles.loc[[repaired]], rollup.table_name('1m'))
+        write_base(engine, rollup, new)
+        written = timed(f'refresh after {new_minutes} new 1m candles', rollup.refresh_all)
+        print(f"  {written}")
+        check_rollup(engine, rollup, candles)
+        print("  rolled-up candles match the pandas resample, repaired fallback included")
+    finally:
+        drop_tables(engine, rollup)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='OHLC rollup benchmark')
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--new-minutes', type=int, default=45)
+    args = parser.parse_args()
+    run(args.days, args.new_minutes)
@@ -0,0 +1,57 @@
+"""
+Scaling of Parameter_Sweep with the number of worker processes on synthetic 1m candles:
+throughput and parallel efficiency for 1, 2, 4, ... workers up to the core count, with a check
+that every worker count returns the same ranked table.
+Run from the project root:  python -m Benchmark.Benchmark_Parameter_Sweep [--rows 525600] [--samples 256]
+"""
+import argparse
+import os
+import pickle
+from time import perf_counter
+import pandas as pd
+
+from Benchmark.Synthetic_Data import synthetic_ohlc
+from Core_Trade.RawData_Weighting_OHLC import RawData_Weighting_OHLC
+from Core_Trade.Parameter_Sweep import Parameter_Sweep, random_space
+
+RANGES = {
+    'scaled_close_10_max': (0.05, 0.5),
+    'confirmation_gain': (0, 250),
+    'volume_momentum_min': (20, 300),
+    'max_loss': (-150, -20),
+}
+
+
+def worker_counts(max_workers):
+    counts, count = [], 1
+    while count < max_workers:
+        counts.append(count)
+        count *= 2
+    return counts + [max_workers]
+
+
+def run(rows, samples, max_workers):
+    clean = RawData_Weighting_OHLC(synthetic_ohlc(rows, interval='1min')).generate_clean_data()
+    candidates = random_space(RANGES, samples)
+    print(f"{rows} rows, {samples} threshold sets; pickled frame {len(pickle.dumps(clean)) / 1e6:.0f} MB "
+          f"vs {len(pickle.dumps(candidates[0]))} bytes per task")
+
+    reference, single = None, None
+    for workers in worker_counts(max_workers):
+        start = perf_counter()
+        ranked = Parameter_Sweep(clean, workers).run(candidates)
+        elapsed = perf_counter() - start
+        if reference is None:
+            reference, single = ranked, elapsed
+        pd.testing.assert_frame_equal(ranked, reference)
+        print(f"  workers={workers:<3} {elapsed:6.2f}s  {samples / elapsed:7.1f} sets/s  "
+              f"efficiency {single / (elapsed * workers):.0%}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Parameter sweep scaling benchmark')
+    parser.add_argument('--rows', type=int, default=525_600)
+    parser.add_argument('--samples', type=int, default=256)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+    run(args.rows, args.samples, args.max_workers)
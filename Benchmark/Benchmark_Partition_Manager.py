@@ -0,0 +1,98 @@
+"""
+Partition_Manager on a throw-away benchpart schema of the configured database (set db_endpoint,
+e.g. db_endpoint=localhost): creating N days ahead for several tables with the former one
+create_partition call per table and day against one ensure() transaction, then weekly partitions
+next to existing daily ones, retention, and a write into a missing partition being retried.
+Run from the project root:  python -m Benchmark.Benchmark_Partition_Manager [--tables 8] [--days 14]
+"""
+import argparse
+from time import perf_counter
+import pandas as pd
+from sqlalchemy import text
+
+from Benchmark.Synthetic_Data import synthetic_ohlc
+from Helper.Bulk_Writer import BulkWriter
+from Helper.Create_DatabaseSchema import CreateDatabaseSchema
+from Helper.Database_Engine import get_postgres_engine
+from Helper.Partition_Manager import Partition_Manager
+
+SCHEMA = 'benchpart'
+
+
+def reset(engine, tables):
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    schema_creator = CreateDatabaseSchema(SCHEMA)
+    schema_creator.metadata.invalidate()
+    for table in tables:
+        schema_creator.create_tables_ohlc(table)
+    return schema_creator
+
+
+def partition_names(engine, table):
+    with engine.connect() as conn:
+        return sorted(conn.execute(text("""
+            SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+            JOIN pg_class p ON p.oid = i.inhparent JOIN pg_namespace n ON n.oid = p.relnamespace
+            WHERE n.nspname = :schema AND p.relname = :table
+        """), {'schema': SCHEMA, 'table': table}).scalars())
+
+
+def timed(label, func):
+    start = perf_counter()
+    result = func()
+    print(f"  {label:<40} {(perf_counter() - start) * 1000:8.1f} ms")
+    return result
+
+
+def run(table_count, days):
+    engine = get_postgres_engine()
+    tables = [f"trade_bench{i}1m_ohlc" for i in range(table_count)]
+    try:
+        schema_creator = reset(engine, tables)
+        print(f"{table_count} tables, {days + 1} days ahead")
+
+        def one_by_one():
+            for table in tables:
+                for offset in range(days + 1):
+                    schema_creator.create_partition(table, offset)
+
+        timed('create_partition per table and day', one_by_one)
+        expected = {table: partition_names(engine, table) for table in tables}
+
+        reset(engine, tables)
+        manager = Partition_Manager(SCHEMA, days_ahead=days)
+        created = timed('Partition_Manager.ensure (one transaction)', manager.ensure)
+        assert len(created) == table_count * (days + 1)
+        assert {table: partition_names(engine, table) for table in tables} == expected
+        timed('ensure again, nothing missing', manager.ensure)
+
+        # Weekly partitions after daily ones: the first week is clipped to the days not covered yet
+        weekly = Partition_Manager(SCHEMA, days_ahead=days + 14, periods={'trade_bench0*': 'week'})
+        created = [name for name in weekly.ensure(tables=tables[:1])]
+        print(f"  weekly partitions after {days + 1} daily ones: {created}")
+
+        # Retention: partitions of past days are detached
+        today = pd.Timestamp.now(tz='UTC').normalize()
+        Partition_Manager(SCHEMA).ensure_for_dates(tables[1], pd.date_range(today - pd.Timedelta(days=10), today, freq='D'))
+        expired = Partition_Manager(SCHEMA, retention_days=5).apply_retention(tables=tables[1:2])
+        assert len(expired) == 5, expired
+        print(f"  detached past the 5-day retention: {len(expired)} partitions")
+
+        # A write into a day without partition is retried after creating it
+        far = today + pd.Timedelta(days=days + 40)
+        candles = synthetic_ohlc(3, interval='1min', start=str(far.tz_localize(None)))
+        written = manager.write_with_partitions(BulkWriter(engine, schema=SCHEMA).write, candles, tables[2])
+        assert written == 3
+        print("  write into a missing partition retried and stored")
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Partition manager benchmark')
+    parser.add_argument('--tables', type=int, default=8)
+    parser.add_argument('--days', type=int, default=14)
+    args = parser.parse_args()
+    run(args.tables, args.days)
@@ -0,0 +1,67 @@
+"""
+Times the vectorized rolling regression against the original per-row linregress loop, the largest
+difference is reported. Their parity is checked in Tests/test_Rolling_Regression.py.
+Run from the project root:  python -m Benchmark.Benchmark_Rolling_Regression [--sizes 10000 100000 1000000]
+"""
+import argparse
+from time import perf_counter
+import numpy as np
+from scipy.stats import linregress
+
+from Core_Trade.Rolling_Regression import rolling_slope_and_residual, SLOPE_WINDOWS
+
+
+def legacy_slope_and_residual(y_series, window):
+    # Original loop from RawData_Weighting_OHLC.generate_clean_data
+    slopes = np.full(len(y_series), np.nan)
+    residuals = np.full(len(y_series), np.nan)
+    x = np.arange(window)
+
+    for i in range(window - 1, len(y_series)):
+        y = y_series[i - window + 1:i + 1]
+        slope, intercept, _, _, _ = linregress(x, y)
+        y_pred = slope * x + intercept
+        residuals[i] = np.max(np.abs(y - y_pred))
+        slopes[i] = slope
+
+    return slopes, residuals
+
+
+def synthetic_middle_values(rows, seed=7):
+    # Random walk around a BTC-like price level
+    rng = np.random.default_rng(seed)
+    return 60000 + np.cumsum(rng.normal(0, 25, rows))
+
+
+def run(sizes, legacy_max_rows):
+    print(f"{'rows':>10} {'vectorized_s':>14} {'legacy_s':>12} {'speedup':>10} {'max_abs_diff':>14}")
+    for rows in sizes:
+        values = synthetic_middle_values(rows)
+
+        start = perf_counter()
+        fast = rolling_slope_and_residual(values, SLOPE_WINDOWS)
+        fast_time = perf_counter() - start
+
+        if legacy_max_rows is not None and rows > legacy_max_rows:
+            print(f"{rows:>10} {fast_time:>14.3f} {'skipped':>12} {'-':>10} {'-':>14}")
+            continue
+
+        start = perf_counter()
+        legacy = {window: legacy_slope_and_residual(values, window) for window in SLOPE_WINDOWS}
+        legacy_time = perf_counter() - start
+
+        max_diff = 0.0
+        for window in SLOPE_WINDOWS:
+            for new, old in zip(fast[window], legacy[window]):
+                max_diff = max(max_diff, float(np.nanmax(np.abs(new - old), initial=0.0)))
+
+        print(f"{rows:>10} {fast_time:>14.3f} {legacy_time:>12.3f} {legacy_time / fast_time:>9.1f}x {max_diff:>14.2e}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Rolling regression benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--legacy-max-rows', type=int, default=None,
+                        help='Skip the (slow) legacy loop above this many rows')
+    args = parser.parse_args()
+    run(args.sizes, args.legacy_max_rows)
@@ -0,0 +1,144 @@
+"""
+Overhead of the Stage_Metrics timing layer: cost of one stage() / timed() / count() call, and its
+share of the evaluate job of main.py on a throw-away trade.trade_benchmetrics30m_ohlc table of
+the configured database (set db_endpoint, e.g. db_endpoint=localhost). Every candle is stored,
+then LiveTradingJobs.evaluate reads it back, feeds the streaming features and the strategy
+registry, timing the db_read, features and strategy stages. The per-call cost times those stages
+must stay under 1% of the job. Also checks the Prometheus endpoint and the JSON dump.
+Run from the project root:  python -m Benchmark.Benchmark_Stage_Metrics [--calls 200000] [--candles 500]
+"""
+import argparse
+import json
+import logging
+import os
+import tempfile
+import urllib.request
+from time import perf_counter
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from Benchmark.Synthetic_Data import synthetic_ohlc
+from Core_Trade.RawData_Weighting_OHLC import minimum_lookback
+from Core_Trade.Strategy_Registry import Strategy_Registry, Threshold_Strategies, strategy_journal
+from Core_Trade.Vectorized_Backtest import StrategyThresholds
+from Helper.Stage_Metrics import STAGE_METRICS, Stage_Metrics
+from main import LiveTradingJobs
+
+SYMBOL = 'BENCH/METRICS'
+INTERVAL = '30m'
+TABLE = 'trade_benchmetrics30m_ohlc'
+STEP = pd.Timedelta(minutes=30)
+
+# Stages timed on every call of the evaluate job
+EVALUATE_STAGES = ('db_read', 'features', 'strategy')
+
+
+def per_call(metrics, calls):
+    @metrics.timed('decorated')
+    def noop():
+        pass
+
+    start = perf_counter()
+    for _ in range(calls):
+        pass
+    empty = perf_counter() - start
+
+    start = perf_counter()
+    for _ in range(calls):
+        with metrics.stage('empty'):
+            pass
+    stage = perf_counter() - start - empty
+
+    start = perf_counter()
+    for _ in range(calls):
+        noop()
+    decorated = perf_counter() - start - empty
+
+    start = perf_counter()
+    for _ in range(calls):
+        metrics.count('event')
+    counted = perf_counter() - start - empty
+    print(f"  stage() {stage / calls * 1e6:.2f} us, timed() {decorated / calls * 1e6:.2f} us, "
+          f"count() {counted / calls * 1e6:.2f} us per call")
+    return max(stage, decorated) / calls
+
+
+def drop_table(engine):
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS trade.{TABLE} CASCADE"))
+
+
+def evaluate_job(candle_count, stage_cost):
+    with tempfile.TemporaryDirectory() as directory:
+        strategies = Strategy_Registry()
+        strategies.register(Threshold_Strategies(
+            {'live': StrategyThresholds()}, {'live': strategy_journal('live', directory, fsync='never')}))
+        jobs = LiveTradingJobs(SYMBOL, INTERVAL, strategies=strategies)
+        sink = jobs.fetcher.sink
+        drop_table(sink.engine)
+        sink.metadata.invalidate()
+        try:
+            # Ends at the last closed candle, the warm-up history first, then one job per stored candle
+            start = pd.Timestamp.now(tz='UTC').floor(STEP) - STEP * (minimum_lookback() + candle_count)
+            candles = synthetic_ohlc(minimum_lookback() + candle_count, interval='30min',
+                                     start=str(start.tz_localize(None)))
+            sink.write_table(TABLE, candles.iloc[:minimum_lookback()])
+            jobs.evaluate(None, False)
+
+            STAGE_METRICS.reset()
+            durations = np.empty(candle_count)
+            for i in range(candle_count):
+                sink.write_table(TABLE, candles.iloc[minimum_lookback() + i:minimum_lookback() + i + 1])
+                begin = perf_counter()
+                jobs.evaluate(None, False)
+                durations[i] = perf_counter() - begin
+            strategies.close()
+        finally:
+            drop_table(sink.engine)
+            sink.metadata.invalidate()
+
+    job = np.median(durations)
+    stages = STAGE_METRICS.snapshot()['stages']
+    print(f"  evaluate job, {candle_count} candles: p50 {job * 1e3:.2f} ms ("
+          + ', '.join(f"{name} {stages[name]['p50'] * 1e3:.3f} ms" for name in EVALUATE_STAGES) + ")")
+    share = stage_cost * len(EVALUATE_STAGES) / job * 100
+    print(f"  {len(EVALUATE_STAGES)} stages per job at {stage_cost * 1e6:.2f} us: {share:.3f}% of the job")
+    assert share < 1.0, f"instrumentation costs {share:.2f}% of the evaluate job"
+
+
+def exposition(metrics):
+    server = metrics.serve(port=0)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        body = urllib.request.urlopen(url, timeout=5).read().decode()
+    finally:
+        metrics.stop()
+    for stage in EVALUATE_STAGES:
+        assert f'trading_stage_seconds_bucket{{stage="{stage}",le="+Inf"}}' in body, stage
+        assert f'trading_stage_seconds_count{{stage="{stage}"}}' in body, stage
+
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, 'stage_metrics.json')
+        metrics.dump_json(file_path)
+        with open(file_path) as f:
+            stages = json.load(f)['stages']
+    features = stages['features']
+    print(f"  features p50 {features['p50'] * 1e6:.1f} us, p95 {features['p95'] * 1e6:.1f} us, "
+          f"p99 {features['p99'] * 1e6:.1f} us over {features['count']} calls")
+    print(f"  prometheus endpoint served {len(body.splitlines())} lines, JSON dump OK")
+
+
+def run(calls, candle_count):
+    logging.getLogger('combined_OHLC_trade').setLevel(logging.WARNING)
+    stage_cost = per_call(Stage_Metrics(), calls)
+    evaluate_job(candle_count, stage_cost)
+    exposition(STAGE_METRICS)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Stage metrics overhead benchmark')
+    parser.add_argument('--calls', type=int, default=200_000)
+    parser.add_argument('--candles', type=int, default=500)
+    args = parser.parse_args()
+    run(args.calls, args.candles)
@@ -0,0 +1,77 @@
+"""
+Cold-start cost of the trading loop container: `python -X importtime -c "import main"` plus the
+construction of a DatabaseEngine (no connection is opened), each in a fresh interpreter.
+Run from the project root:  python -m Benchmark.Benchmark_Startup [--runs 5] [--baseline-ref <git ref>]
+With --baseline-ref the same measurement is repeated on a temporary git worktree of that ref.
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+
+IMPORTTIME_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|(\s+)(\S+)')
+
+ENGINE_SNIPPET = """
+import sys
+from time import perf_counter
+start = perf_counter()
+from Helper.Database_Engine import DatabaseEngine
+DatabaseEngine()
+print(perf_counter() - start, 'boto3' in sys.modules)
+"""
+
+
+def measure_imports(root):
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import main'],
+                            cwd=root, capture_output=True, text=True, check=True)
+    cumulative, aws_modules = None, set()
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        module = match.group(4)
+        if module.split('.')[0] in ('boto3', 'botocore', 's3transfer'):
+            aws_modules.add(module.split('.')[0])
+        if module == 'main':
+            cumulative = int(match.group(2)) / 1e6
+    return cumulative, sorted(aws_modules)
+
+
+def measure_engine(root):
+    env = dict(os.environ, db_endpoint=os.environ.get('db_endpoint', 'localhost'))
+    result = subprocess.run([sys.executable, '-c', ENGINE_SNIPPET], cwd=root, env=env,
+                            capture_output=True, text=True, check=True)
+    elapsed, boto_loaded = result.stdout.split()
+    return float(elapsed), boto_loaded == 'True'
+
+
+def report(label, root, runs):
+    imports = [measure_imports(root) for _ in range(runs)]
+    engines = [measure_engine(root) for _ in range(runs)]
+    print(f"[{label}]")
+    print(f"  {'import main, median s':<34} {statistics.median(t for t, _ in imports):.3f}")
+    print(f"  {'AWS packages imported by main':<34} {', '.join(imports[-1][1]) or 'none'}")
+    print(f"  {'DatabaseEngine(), median s':<34} {statistics.median(t for t, _ in engines):.3f}")
+    print(f"  {'boto3 loaded by DatabaseEngine()':<34} {engines[-1][1]}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Trading loop cold-start benchmark')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--baseline-ref', default=None, help='git ref to compare against, e.g. HEAD~1')
+    args = parser.parse_args()
+
+    root = os.getcwd()
+    if args.baseline_ref:
+        with tempfile.TemporaryDirectory() as tmp:
+            worktree = os.path.join(tmp, 'baseline')
+            subprocess.run(['git', 'worktree', 'add', '--detach', worktree, args.baseline_ref],
+                           cwd=root, check=True, capture_output=True)
+            try:
+                report(f'baseline {args.baseline_ref}', worktree, args.runs)
+            finally:
+                subprocess.run(['git', 'worktree', 'remove', '--force', worktree], cwd=root, check=True)
+    report('working tree', root, args.runs)
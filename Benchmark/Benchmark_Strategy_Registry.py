@@ -0,0 +1,152 @@
+"""
+Strategy_Registry with Threshold_Strategies against one RealTimeTradeStrategy per threshold set.
+The streaming rows of synthetic 1m candles are evaluated live by both. For every variant, the
+trade records that its journal writes must be identical to a row-by-row replay of
+RealTimeTradeStrategy with its thresholds. The check also covers a variant restarted mid-history
+from its journal. The per-candle cost is then timed for 1 to 100 variants on the shared row,
+against N RealTimeTradeStrategy instances with their own journals, for variants that trade often
+and for copies of the live thresholds. Files go to a temporary directory.
+Run from the project root:  python -m Benchmark.Benchmark_Strategy_Registry [--rows 20000] [--variants 1,10,50,100]
+"""
+import argparse
+import itertools
+import json
+import logging
+import os
+import tempfile
+from time import perf_counter
+import numpy as np
+
+from Benchmark.Benchmark_Backtest import THRESHOLD_SETS, live_replay
+from Benchmark.Synthetic_Data import synthetic_ohlc
+from Core_Trade.RawData_Weighting_OHLC import minimum_lookback
+from Core_Trade.Streaming_Weighting_OHLC import Streaming_Weighting_OHLC
+from Core_Trade.Strategy_Registry import Strategy_Registry, Threshold_Strategies, strategy_journal
+from Core_Trade.Trade_Journal import Trade_Journal, _json_default
+from Core_Trade.Vectorized_Backtest import RealTimeTradeStrategy, StrategyThresholds
+
+
+def streaming_rows(rows):
+    candles = synthetic_ohlc(rows + minimum_lookback(), interval='1min')
+    indicators = Streaming_Weighting_OHLC()
+    indicators.update_frame(candles.iloc[:minimum_lookback()])
+    return [indicators.update(candle) for candle in candles.iloc[minimum_lookback():].to_dict('records')]
+
+
+def threshold_grid(count):
+    # The backtest sets first, then looser and tighter combinations that trade at different times
+    grid = itertools.product((0.2, 0.5, 0.8), (0, 40, 230), (20, 60, 300), (-100, -50, -20))
+    variants = list(THRESHOLD_SETS)
+    for scaled_close, confirmation, momentum, max_loss in grid:
+        variants.append(StrategyThresholds(scaled_close_10_max=scaled_close, confirmation_gain=confirmation,
+                                           volume_momentum_min=momentum, max_loss=max_loss))
+    return {f"variant_{i}": variants[i % len(variants)] for i in range(count)}
+
+
+def registry_run(rows, variants, directory, restart_at=None):
+    """Evaluate rows through a registry, restarted from its journals at `restart_at`; returns the records."""
+    def build():
+        journals = {name: strategy_journal(name, directory, fsync='never') for name in variants}
+        registry = Strategy_Registry()
+        registry.register(Threshold_Strategies(variants, journals))
+        registry.recover()
+        return registry
+
+    registry = build()
+    for i, row in enumerate(rows):
+        if i == restart_at:
+            registry.close()
+            registry = build()
+            # The restarted loop evaluates the last candle again, it must be skipped or be a no-op
+            registry.evaluate(rows[i - 1])
+        registry.evaluate(row)
+    registry.close()
+
+    records = {}
+    for name in variants:
+        records_path = os.path.join(directory, name, 'trade_records_Result.json')
+        records[name] = []
+        if os.path.exists(records_path):
+            with open(records_path) as f:
+                records[name] = [json.loads(line) for line in f]
+    return records
+
+
+def parity(rows, variants, directory, restart_at=None):
+    records = registry_run(rows, variants, directory, restart_at)
+    trades = 0
+    for name, thresholds in variants.items():
+        # Through JSON like the journal, so Timestamps and NumPy floats compare as written
+        expected = [json.loads(json.dumps(trade, default=_json_default)) for trade in live_replay(rows, thresholds)]
+        assert records[name] == expected, f"{name} {thresholds}: {len(records[name])} trades, expected {len(expected)}"
+        trades += len(expected)
+    print(f"  {len(variants)} variants over {len(rows)} candles"
+          f"{'' if restart_at is None else f', restarted at candle {restart_at}'}: "
+          f"{trades} trades identical to RealTimeTradeStrategy")
+
+
+def per_candle(rows, variants, directory):
+    # Best of three passes over the rows, in microseconds per candle
+    registry = Strategy_Registry()
+    registry.register(Threshold_Strategies(variants, {
+        name: strategy_journal(name, os.path.join(directory, 'registry'), fsync='never') for name in variants}))
+    registry.recover()
+    registry_time = float('inf')
+    plugin = registry.plugins[0]
+    for repeat in range(3):
+        # Every pass evaluates the same candles again
+        plugin.last_date[:] = np.iinfo(np.int64).min
+        start = perf_counter()
+        for row in rows:
+            registry.evaluate(row)
+        registry_time = min(registry_time, perf_counter() - start)
+    registry.close()
+
+    strategies = [RealTimeTradeStrategy(thresholds, Trade_Journal(
+        os.path.join(directory, 'instances', f'{name}.jsonl'), os.path.join(directory, 'instances', f'{name}.json'),
+        fsync='never').start()) for name, thresholds in variants.items()]
+    instances_time = float('inf')
+    for repeat in range(3):
+        start = perf_counter()
+        for row in rows:
+            for strategy in strategies:
+                strategy.evaluate_entry(row)
+                strategy.evaluate_exit(row)
+                strategy.record_state(row)
+        instances_time = min(instances_time, perf_counter() - start)
+    for strategy in strategies:
+        strategy.journal.close()
+    return registry_time / len(rows) * 1e6, instances_time / len(rows) * 1e6
+
+
+def run(rows, counts):
+    logging.getLogger('combined_OHLC_trade').setLevel(logging.WARNING)
+    rows = streaming_rows(rows)
+    with tempfile.TemporaryDirectory() as directory:
+        print("Trade records per variant")
+        variants = threshold_grid(len(THRESHOLD_SETS) + 81)
+        parity(rows, variants, os.path.join(directory, 'parity'))
+        parity(rows, threshold_grid(len(THRESHOLD_SETS)), os.path.join(directory, 'restart'), restart_at=len(rows) // 2)
+
+        # The grid variants hold a trade most of the time and journal their state on most candles,
+        # copies of the live thresholds trade rarely and mostly cost their rule evaluation
+        timed = rows[:min(len(rows), 2000)]
+        for label, variants in (('trading grid', threshold_grid),
+                                ('live thresholds', lambda count: {f"live_{i}": StrategyThresholds() for i in range(count)})):
+            print(f"Per candle, journals included, {label}")
+            print(f"  {'variants':>8} {'registry':>12} {'instances':>12}")
+            times = []
+            for count in counts:
+                times.append(per_candle(timed, variants(count), os.path.join(directory, f'{label}{count}')))
+                print(f"  {count:>8} {times[-1][0]:9.1f} us {times[-1][1]:9.1f} us")
+            if len(counts) > 1:
+                span = counts[-1] - counts[0]
+                print(f"  each additional variant: registry {(times[-1][0] - times[0][0]) / span:.2f} us, "
+                      f"instances {(times[-1][1] - times[0][1]) / span:.2f} us per candle")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Multi-strategy registry parity and per-candle cost')
+    parser.add_argument('--rows', type=int, default=20_000, help='1m candles after the warm-up')
+    parser.add_argument('--variants', default='1,10,50,100', help='comma separated variant counts to time')
+    args = parser.parse_args()
+    run(args.rows, [int(count) for count in args.variants.split(',')])
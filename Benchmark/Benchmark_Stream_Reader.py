@@ -0,0 +1,105 @@
+"""
+Peak memory of the order book aggregation against the lookback: the former single pd.read_sql
+against RawData_Weighting_OB streaming chunks from a server-side cursor. Uses a throw-away
+trade.trade_benchstream_orderbook table in the configured database (set db_endpoint, e.g.
+db_endpoint=localhost); the CSV outputs go to a temporary directory.
+Run from the project root:  python -m Benchmark.Benchmark_Stream_Reader [--hours 6 34 96]
+"""
+import argparse
+import os
+import tempfile
+import tracemalloc
+from time import perf_counter
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from Core_Trade.RawData_Weighting_OB import RawData_Weighting_OB
+from Helper.Bulk_Writer import BulkWriter
+from Helper.Create_DatabaseSchema import CreateDatabaseSchema
+from Helper.Database_Engine import get_postgres_engine
+
+SYMBOL = 'BENCH/STREAM'
+TABLE = 'trade_benchstream_orderbook'
+LEVELS = 6   # rows per 5-second snapshot
+
+
+def create_table(engine, hours):
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS trade.{TABLE} CASCADE"))
+        conn.execute(text(f"""
+            CREATE TABLE trade.{TABLE} (
+                date TIMESTAMPTZ NOT NULL, action TEXT, price NUMERIC, btc_amount NUMERIC
+            ) PARTITION BY RANGE (date)
+        """))
+    schema_creator = CreateDatabaseSchema('trade')
+    for offset in range(-(hours // 24) - 1, 1):
+        schema_creator.create_partition(TABLE, offset)
+
+    rng = np.random.default_rng(7)
+    now = pd.Timestamp.now(tz='UTC').floor('5s')
+    dates = np.repeat(pd.date_range(now - pd.Timedelta(hours=hours), now - pd.Timedelta(seconds=5), freq='5s'), LEVELS)
+    rows = len(dates)
+    BulkWriter(engine, schema='trade').write(pd.DataFrame({
+        'date': dates,
+        'action': rng.choice(['Buy', 'Sell'], rows),
+        'price': (60000 + rng.normal(0, 100, rows)).round(2),
+        'btc_amount': rng.random(rows).round(8),
+    }), TABLE)
+
+
+def read_all(cleaner, hours):
+    # The former generate_clean_data: one read_sql of the whole window, then the aggregation
+    query = f"""
+        SELECT * FROM trade.{TABLE}
+        WHERE date >= NOW() - INTERVAL '{hours} HOURS'
+        ORDER BY date ASC;
+    """
+    df = pd.read_sql(query, cleaner.engine)
+    df.to_csv(os.path.join('Data', 'OrderBook_forminRaw.csv'), index=False)
+    grouped = df.groupby(['date', 'action'])['btc_amount'].sum().unstack(fill_value=0)
+    grouped['imbalance'] = grouped.get('Buy', 0) - grouped.get('Sell', 0)
+    result_5s = grouped.reset_index()
+    result_5s.to_csv(os.path.join('Data', 'OrderBook_Grouped_by5sec.csv'), index=False)
+    result_5s['date'] = result_5s['date'].dt.floor('min')
+    result_min = result_5s.groupby('date')[['Buy', 'Sell']].mean().reset_index()
+    result_min.to_csv(os.path.join('Data', 'OrderBook_Grouped_byMin.csv'), index=False)
+
+
+def measure(func):
+    start = perf_counter()
+    func()
+    elapsed = perf_counter() - start
+
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 1e6
+
+
+def run(hours_list):
+    engine = get_postgres_engine()
+    create_table(engine, max(hours_list))
+    cwd = os.getcwd()
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            os.chdir(directory)
+            cleaner = RawData_Weighting_OB(SYMBOL)
+            print(f"{'hours':>6} {'rows':>9} {'read_sql s':>11} {'peak MB':>8} {'stream s':>9} {'peak MB':>8}")
+            for hours in hours_list:
+                rows = hours * 720 * LEVELS
+                legacy_time, legacy_peak = measure(lambda: read_all(cleaner, hours))
+                stream_time, stream_peak = measure(lambda: cleaner.generate_clean_data(since_hour=hours))
+                print(f"{hours:>6} {rows:>9} {legacy_time:>11.2f} {legacy_peak:>8.1f} {stream_time:>9.2f} {stream_peak:>8.1f}")
+    finally:
+        os.chdir(cwd)
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS trade.{TABLE} CASCADE"))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Order book streaming memory benchmark')
+    parser.add_argument('--hours', type=int, nargs='+', default=[6, 34, 96])
+    args = parser.parse_args()
+    run(args.hours)
@@ -0,0 +1,41 @@
+"""
+Per-tick latency of Streaming_Weighting_OHLC against the batch RawData_Weighting_OHLC path for
+several history lengths. Parity of the two paths is checked by Tests/test_Streaming_OHLC.py.
+Run from the project root:  python -m Benchmark.Benchmark_Streaming_OHLC [--sizes 500 5000 50000]
+"""
+import argparse
+from time import perf_counter
+
+from Core_Trade.RawData_Weighting_OHLC import RawData_Weighting_OHLC
+from Core_Trade.Streaming_Weighting_OHLC import Streaming_Weighting_OHLC
+from Benchmark.Synthetic_Data import synthetic_ohlc
+
+
+def run(sizes, ticks):
+    print(f"{'history':>10} {'batch_ms/tick':>14} {'stream_us/tick':>15}")
+    for rows in sizes:
+        history = synthetic_ohlc(rows + ticks)
+        seed, live = history.iloc[:rows], history.iloc[rows:]
+
+        start = perf_counter()
+        RawData_Weighting_OHLC(history.iloc[:rows + 1].copy()).generate_clean_data()
+        batch_ms = (perf_counter() - start) * 1000
+
+        stream = Streaming_Weighting_OHLC()
+        stream.update_frame(seed)
+        candles = live.to_dict('records')
+        start = perf_counter()
+        for candle in candles:
+            stream.update(candle)
+        stream_us = (perf_counter() - start) / len(candles) * 1e6
+
+        print(f"{rows:>10} {batch_ms:>14.2f} {stream_us:>15.1f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Streaming indicator latency benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[500, 5_000, 50_000])
+    parser.add_argument('--ticks', type=int, default=500)
+    args = parser.parse_args()
+
+    run(args.sizes, args.ticks)
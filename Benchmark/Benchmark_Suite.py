@@ -0,0 +1,242 @@
+"""
+Benchmark suite of the feature pipeline and the ingestion paths on synthetic OHLC and order book
+data of configurable sizes. Every case reports the best time over --repeat runs, the throughput
+in rows (or calls) per second and the peak memory traced by tracemalloc over one more run, which
+includes the NumPy buffers. The results are written as JSON named after the current commit, and
+--compare prints the change against the file of another commit (exit code 1 on a regression).
+The DB cases use throw-away trade.trade_benchsuite* tables of the configured database (set
+db_endpoint, e.g. db_endpoint=localhost) and are skipped when it cannot be reached.
+Run from the project root:
+    python -m Benchmark.Benchmark_Suite [--sizes 10000,100000] [--repeat 3] [--skip-db]
+                                        [--output <file>] [--compare Data/benchmarks/<commit>.json]
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+from time import perf_counter
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from Benchmark.Synthetic_Data import synthetic_ohlc, synthetic_orderbook
+from Core_Trade.Fetch_fromDB_OHLC import Fetch_fromDB_OHLC
+from Core_Trade.RawData_Weighting_OB import RawData_Weighting_OB
+from Core_Trade.RawData_Weighting_OHLC import RawData_Weighting_OHLC
+from Helper.Previous_Interval import Previous_Interval
+
+SYMBOL = 'BENCH/SUITE'
+OHLC_TABLE = 'trade_benchsuite1m_ohlc'
+ORDERBOOK_TABLE = 'trade_benchsuite_orderbook'
+LEVELS = 6   # order book rows per 5-second snapshot
+INTERVALS = ('1m', '5m', '15m', '30m', '1h', '4h', '1d')
+RESULTS_DIRECTORY = os.path.join('Data', 'benchmarks')
+
+
+def measure(name, size, setup, func, repeat):
+    """Best time of `repeat` runs of func(*setup()), then one traced run for the peak memory."""
+    best = math.inf
+    for _ in range(repeat):
+        args = setup()
+        start = perf_counter()
+        func(*args)
+        best = min(best, perf_counter() - start)
+
+    args = setup()
+    tracemalloc.start()
+    try:
+        func(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    result = {'name': name, 'size': size, 'seconds': best,
+              'per_second': size / best if best else None, 'peak_mib': peak / 2**20}
+    print(f"  {name:<28} {size:>9} {best:9.4f}s {result['per_second']:>14,.0f}/s {result['peak_mib']:9.1f} MiB")
+    return result
+
+
+def feature_cases(size, repeat):
+    ohlc = synthetic_ohlc(size)
+    yield measure('ohlc_generate_clean_data', size,
+                  lambda: (RawData_Weighting_OHLC(ohlc.copy()),), lambda cleaner: cleaner.generate_clean_data(), repeat)
+
+    orderbook = synthetic_orderbook('2024-01-01', pd.Timestamp('2024-01-01') + pd.Timedelta(seconds=5 * size // LEVELS),
+                                    LEVELS)
+    yield measure('ob_aggregate', len(orderbook),
+                  lambda: (orderbook,), RawData_Weighting_OB._aggregate, repeat)
+
+    previous = Previous_Interval()
+    intervals = [INTERVALS[i % len(INTERVALS)] for i in range(size)]
+
+    def floor_all(intervals):
+        for interval in intervals:
+            previous.get_previous_floored_timestamp(interval)
+    yield measure('previous_floored_timestamp', size, lambda: (intervals,), floor_all, repeat)
+
+
+def connect():
+    # None when the database cannot be reached, the DB cases are skipped then
+    try:
+        from Helper.Database_Engine import get_postgres_engine
+        engine = get_postgres_engine()
+        with engine.connect() as conn:
+            conn.execute(text('SELECT 1'))
+        return engine
+    except Exception as e:
+        print(f"  database not reachable, skipping the DB cases: {e}")
+        return None
+
+
+def create_tables(engine):
+    from Helper.Create_DatabaseSchema import CreateDatabaseSchema
+    drop_tables(engine)
+    CreateDatabaseSchema('trade').create_tables_ohlc(OHLC_TABLE)
+    with engine.begin() as conn:
+        conn.execute(text(f"""
+            CREATE TABLE trade.{ORDERBOOK_TABLE} (
+                date TIMESTAMPTZ NOT NULL, action TEXT, price NUMERIC, btc_amount NUMERIC
+            ) PARTITION BY RANGE (date)
+        """))
+
+
+def drop_tables(engine):
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS trade.{OHLC_TABLE} CASCADE"))
+        conn.execute(text(f"DROP TABLE IF EXISTS trade.{ORDERBOOK_TABLE} CASCADE"))
+
+
+def db_cases(engine, size, repeat):
+    from Helper.Bulk_Writer import BulkWriter
+    from Helper.Partition_Manager import Partition_Manager
+    writer = BulkWriter(engine, schema='trade')
+    partition_manager = Partition_Manager('trade')
+    now = pd.Timestamp.now(tz='UTC').floor('min')
+
+    # The newest `size` 1m candles, so the reads by limit and by hours both see all of them
+    ohlc = synthetic_ohlc(size, interval='1min', start=now - pd.Timedelta(minutes=size - 1))
+    partition_manager.ensure_for_dates(OHLC_TABLE, ohlc['date'])
+
+    def truncate():
+        with engine.begin() as conn:
+            conn.execute(text(f"TRUNCATE trade.{OHLC_TABLE}"))
+        return (ohlc,)
+    yield measure('db_write_ohlc', size, truncate, lambda df: writer.write(df, OHLC_TABLE), repeat)
+    yield measure('db_upsert_ohlc', size, lambda: (ohlc,), lambda df: writer.upsert(df, OHLC_TABLE), repeat)
+
+    fetcher = Fetch_fromDB_OHLC('trade')
+    yield measure('db_read_ohlc', size, lambda: (),
+                  lambda: fetcher.get_OHLC_fromDB(symbol=SYMBOL, interval='1m', limit=size), repeat)
+    hours = math.ceil(size / 60) + 1
+    yield measure('db_stream_ohlc', size, lambda: (),
+                  lambda: sum(len(chunk) for chunk in fetcher.stream_OHLC_fromDB(symbol=SYMBOL, interval='1m', since_hour=hours)),
+                  repeat)
+
+    # Order book snapshots up to now, read back by generate_clean_data over the last `hours`
+    seconds = 5 * (size // LEVELS)
+    orderbook = synthetic_orderbook(now - pd.Timedelta(seconds=seconds), now, LEVELS)
+    partition_manager.ensure_for_dates(ORDERBOOK_TABLE, orderbook['date'])
+    writer.write(orderbook, ORDERBOOK_TABLE)
+    hours = math.ceil(seconds / 3600) + 1
+    cleaner = RawData_Weighting_OB(SYMBOL)
+    yield measure('ob_generate_clean_data', len(orderbook), lambda: (),
+                  lambda: cleaner.generate_clean_data(since_hour=hours), repeat)
+    yield measure('ob_generate_clean_data_in_db', len(orderbook), lambda: (),
+                  lambda: cleaner.generate_clean_data(since_hour=hours, aggregate_in_db=True), repeat)
+    with engine.begin() as conn:
+        conn.execute(text(f"TRUNCATE trade.{ORDERBOOK_TABLE}"))
+
+
+def git(*args):
+    try:
+        return subprocess.run(['git', *args], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    return {
+        'commit': git('rev-parse', '--short', 'HEAD') or 'unknown',
+        'dirty': bool(git('status', '--porcelain', '--untracked-files=no')),
+        'time': pd.Timestamp.now(tz='UTC').isoformat(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def compare(results, baseline_path, tolerance):
+    """Print the time ratio of every case against the baseline file, returning the regressions."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    before = {(result['name'], result['size']): result for result in baseline['results']}
+    print(f"\nAgainst {baseline['environment']['commit']} ({baseline_path}), tolerance {tolerance:.0%}:")
+    regressions = []
+    for result in results:
+        previous = before.get((result['name'], result['size']))
+        if previous is None:
+            continue
+        ratio = result['seconds'] / previous['seconds']
+        memory = result['peak_mib'] - previous['peak_mib']
+        flag = 'SLOWER' if ratio > 1 + tolerance else ''
+        print(f"  {result['name']:<28} {result['size']:>9} {ratio:6.2f}x time {memory:+8.1f} MiB  {flag}")
+        if flag:
+            regressions.append(result)
+    return regressions
+
+
+def run(sizes, repeat, skip_db, output, baseline, tolerance):
+    logging.getLogger('combined_OHLC_trade').setLevel(logging.WARNING)
+    print(f"  {'case':<28} {'size':>9} {'best':>10} {'throughput':>16} {'peak':>13}")
+    results = []
+    for size in sizes:
+        results += feature_cases(size, repeat)
+
+    engine = None if skip_db else connect()
+    if engine is not None:
+        cwd = os.getcwd()
+        create_tables(engine)
+        try:
+            # generate_clean_data of the order book writes its CSV files under Data/
+            with tempfile.TemporaryDirectory() as directory:
+                os.chdir(directory)
+                os.makedirs('Data')
+                for size in sizes:
+                    results += db_cases(engine, size, repeat)
+        finally:
+            os.chdir(cwd)
+            drop_tables(engine)
+
+    environment_info = environment()
+    output = output or os.path.join(RESULTS_DIRECTORY, f"{environment_info['commit']}.json")
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({'environment': environment_info, 'repeat': repeat, 'results': results}, f, indent=2)
+    print(f"Results written to {output}")
+
+    if baseline is not None and compare(results, baseline, tolerance):
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark suite of the feature pipeline and ingestion paths')
+    parser.add_argument('--sizes', default='10000,100000', help='comma separated row counts')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--skip-db', action='store_true', help='run the in-memory cases only')
+    parser.add_argument('--output', default=None, help=f'JSON file, default {RESULTS_DIRECTORY}/<commit>.json')
+    parser.add_argument('--compare', default=None, help='JSON file of an earlier run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.10, help='slow-down reported as a regression')
+    args = parser.parse_args()
+    sys.exit(run([int(size) for size in args.sizes.split(',')], args.repeat, args.skip_db,
+                 args.output, args.compare, args.tolerance))
@@ -0,0 +1,123 @@
+"""
+Upsert ingestion of FetchTradeMinute on a throw-away trade.trade_benchupsert1m_ohlc table of the
+configured database (set db_endpoint, e.g. db_endpoint=localhost), with a deterministic stub
+exchange: a zeroed fallback candle is replaced by the real one, a re-run writes nothing, stored
+fallbacks are repaired by the backfill, two concurrent backfills of the same range agree, and a
+batch upsert is timed against the former COPY with ON CONFLICT DO NOTHING.
+Run from the project root:  python -m Benchmark.Benchmark_Upsert [--rows 100000]
+"""
+import argparse
+import threading
+from time import perf_counter
+import pandas as pd
+from sqlalchemy import text
+
+from Benchmark.Synthetic_Data import synthetic_ohlc
+from Core_Trade.Fetch_Online_OHLC import FetchTradeMinute, HEADER, OHLC_UPSERT_WHERE
+from Helper.Database_Engine import get_postgres_engine
+
+SYMBOL = 'BENCH/UPSERT'
+TABLE = 'trade_benchupsert1m_ohlc'
+
+
+class StubExchange:
+    """Closed 1m candles whose values only depend on their open time, like a real exchange."""
+    timeframes = {'1m': '1m'}
+    enableRateLimit = True
+
+    def fetchOHLCV(self, symbol, timeframe, since, limit=None):
+        now_ms = int(pd.Timestamp.now(tz='UTC').timestamp() * 1000)
+        first = -(-since // 60_000) * 60_000
+        return [[ms, 100.0 + ms % 7, 102.0 + ms % 7, 99.0, 101.0, 10.0 + ms % 3]
+                for ms in range(first, min(now_ms, first + (limit or 1) * 60_000), 60_000)]
+
+
+def stored(engine):
+    with engine.connect() as conn:
+        return conn.execute(text(f"SELECT date, open, high, low, close, volume FROM trade.{TABLE} ORDER BY date")).fetchall()
+
+
+def drop_table(engine):
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS trade.{TABLE} CASCADE"))
+
+
+def run(rows):
+    engine = get_postgres_engine()
+    drop_table(engine)
+    fetcher = FetchTradeMinute('binance', SYMBOL, exchange=StubExchange())
+    fetcher.sink.metadata.invalidate()
+    try:
+        # A zeroed fallback stored for the last closed minute, as after three failed attempts
+        since_ts = fetcher.previous_interval.get_previous_floored_timestamp('1m')
+        fetcher._set_table_name('1m')
+        fetcher.sink.schema_creator.create_tables_ohlc(TABLE)
+        fetcher.sink.partition_manager.ensure_for_dates(TABLE, pd.Series([since_ts]))
+        fetcher._upsert(pd.DataFrame([[since_ts, 0, 0, 0, 0, 0]], columns=HEADER))
+        assert stored(engine)[-1][1] == 0
+
+        fetcher.fetch_ohlc_and_load_to_db('1m')
+        assert stored(engine)[-1][1] != 0, 'the fallback was not replaced'
+        print("  fallback candle replaced by the real one on re-run")
+        assert fetcher._upsert(fetcher._fetch_previous_candle_ohlc('1m')) == 0
+        assert fetcher._upsert(pd.DataFrame([[since_ts, 0, 0, 0, 0, 0]], columns=HEADER)) == 0
+        print("  identical re-run and late fallback write nothing")
+
+        # Fallbacks in the middle of the history are fetched again by the backfill
+        start = (pd.Timestamp.now(tz='UTC') - pd.Timedelta(hours=6)).floor('min')
+        dates = pd.date_range(start, periods=5, freq='37min')
+        fetcher.sink.partition_manager.ensure_for_dates(TABLE, pd.Series(dates))
+        fetcher._upsert(pd.DataFrame({'date': dates, 'open': 0, 'high': 0, 'low': 0, 'close': 0, 'volume': 0}))
+        assert fetcher.repair_fallback_candles('1m') == 5
+        with engine.connect() as conn:
+            zeros = conn.execute(text(f"SELECT count(*) FROM trade.{TABLE} WHERE open = 0")).scalar()
+        assert zeros == 0
+        print("  5 stored fallbacks repaired")
+
+        # Two backfills of the same range at once
+        drop_table(engine)
+        fetcher.sink.metadata.invalidate()
+        errors = []
+
+        def backfill():
+            try:
+                FetchTradeMinute('binance', SYMBOL, exchange=StubExchange()).backfill_ohlc_to_db('1m', since=start)
+            except Exception as e:
+                errors.append(e)
+
+        fetcher._set_table_name('1m')
+        fetcher.sink.schema_creator.create_tables_ohlc(TABLE)
+        fetcher.sink.partition_manager.ensure_for_dates(TABLE, pd.Series([start, pd.Timestamp.now(tz='UTC')]))
+        threads = [threading.Thread(target=backfill) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not errors, errors
+        closed = int((fetcher.previous_interval.get_previous_floored_timestamp('1m') - start) / pd.Timedelta(minutes=1)) + 1
+        assert len(stored(engine)) == closed, (len(stored(engine)), closed)
+        print(f"  two concurrent backfills stored the {closed} candles once")
+
+        # Batch cost, the former COPY + DO NOTHING against the upsert, both on a table holding the rows
+        candles = synthetic_ohlc(rows, interval='1min', start=str((start - pd.Timedelta(days=rows // 1440 + 1)).date()))
+        fetcher.sink.partition_manager.ensure_for_dates(TABLE, candles['date'])
+        for label, write in (('write, on conflict do nothing', lambda df: fetcher.sink.bulk_writer.write(df, TABLE, on_conflict_do_nothing=True)),
+                             ('upsert, nothing changed', lambda df: fetcher.sink.bulk_writer.upsert(df, TABLE, update_where=OHLC_UPSERT_WHERE))):
+            write(candles)
+            begin = perf_counter()
+            written = write(candles)
+            print(f"  {label:<32} {perf_counter() - begin:6.2f}s for {rows} rows, {written} written")
+        changed = candles.assign(close=candles['close'] + 1)
+        begin = perf_counter()
+        written = fetcher.sink.bulk_writer.upsert(changed, TABLE, update_where=OHLC_UPSERT_WHERE)
+        print(f"  {'upsert, every row stale':<32} {perf_counter() - begin:6.2f}s for {rows} rows, {written} written")
+    finally:
+        drop_table(engine)
+        fetcher.sink.metadata.invalidate()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Upsert ingestion benchmark')
+    parser.add_argument('--rows', type=int, default=100_000)
+    args = parser.parse_args()
+    run(args.rows)
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+
+
+def synthetic_ohlc(rows: int, interval: str = '30min', seed: int = 7, start: str = '2024-01-01') -> pd.DataFrame:
+    """
+    Random-walk OHLCV candles shaped like the trade_<symbol><interval>_ohlc tables.
+    About 2% of the candles have a zero body so the None branch of the candle classifier is hit.
+    """
+    rng = np.random.default_rng(seed)
+    close = 60000 + np.cumsum(rng.normal(0, 60, rows))
+    open_ = np.concatenate(([close[0] - rng.normal(0, 60)], close[:-1]))
+    open_ = np.where(rng.random(rows) < 0.02, close, open_)
+
+    upper = np.abs(rng.normal(0, 40, rows)) * rng.choice([0.2, 1, 4], rows)
+    lower = np.abs(rng.normal(0, 40, rows)) * rng.choice([0.2, 1, 4], rows)
+    high = np.maximum(open_, close) + upper
+    low = np.minimum(open_, close) - lower
+    volume = rng.lognormal(3, 1, rows)
+
+    dates = pd.date_range(start, periods=rows, freq=interval, tz='UTC')
+    return pd.DataFrame({
+        'date': dates,
+        'open': open_.round(2),
+        'high': high.round(2),
+        'low': low.round(2),
+        'close': close.round(2),
+        'volume': volume.round(5),
+    })
+
+
+def synthetic_orderbook(start, end, levels: int = 6, seed: int = 7) -> pd.DataFrame:
+    """Order book rows shaped like trade_<symbol>_orderbook: `levels` rows per 5-second snapshot in [start, end)."""
+    rng = np.random.default_rng(seed)
+    dates = np.repeat(pd.date_range(start, end, freq='5s', inclusive='left'), levels)
+    rows = len(dates)
+    return pd.DataFrame({
+        'date': dates,
+        'action': rng.choice(['Buy', 'Sell'], rows),
+        'price': (60000 + rng.normal(0, 100, rows)).round(2),
+        'btc_amount': rng.random(rows).round(8),
+    })
@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import re
+import pandas as pd
+import ccxt.async_support as ccxt_async
+
+from Helper.Previous_Interval import Previous_Interval
+
+HEADER = ['date', 'open', 'high', 'low', 'close', 'volume']
+
+
+def _ohlc_table_name(symbol: str, interval: str) -> str:
+    return f"trade_{re.sub(r'[^A-Za-z0-9]', '', symbol).lower()}{interval}_ohlc"
+
+
+class AsyncRateLimiter:
+    """Spaces calls at least `rate_limit_ms` apart, shared by every task talking to one exchange."""
+    def __init__(self, rate_limit_ms: float):
+        self.interval = rate_limit_ms / 1000
+        self.lock = asyncio.Lock()
+        self.next_slot = 0.0
+
+    async def wait(self, semaphore: asyncio.Semaphore = None) -> None:
+        """
+        Wait for the next rate slot, then acquire `semaphore` if given (the caller releases it).
+        The semaphore is taken last, so a task sleeping for its rate slot holds no concurrency
+        slot, and the next rate slot counts from the moment the call can actually start.
+        """
+        async with self.lock:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            if self.next_slot > now:
+                await asyncio.sleep(self.next_slot - now)
+            if semaphore is not None:
+                await semaphore.acquire()
+            self.next_slot = loop.time() + self.interval
+
+
+class Async_OHLC_Collector:
+    """
+    Fetches the last closed candles of many symbols and intervals concurrently through
+    ccxt.async_support. Calls to the exchange wait for a shared rate limiter, then for a
+    per-exchange semaphore (max_concurrency); each round is handed to the sink as one batch.
+    """
+    def __init__(self, symbols: list, intervals: list, sink, exchange_name: str = 'binance',
+                 max_concurrency: int = 5, retries: int = 3, exchange=None):
+        self.logger = logging.getLogger('combined_OHLC_trade')
+        if not symbols or not intervals:
+            raise ValueError('At least one symbol and one interval must be provided.')
+
+        self.symbols = list(symbols)
+        self.intervals = list(intervals)
+        self.sink = sink
+        self.retries = retries
+        self.previous_interval = Previous_Interval()
+
+        # Our limiter replaces ccxt's per-call throttle so it can be shared by all the tasks
+        self.exchange = exchange if exchange is not None else getattr(ccxt_async, exchange_name)({'enableRateLimit': False})
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.rate_limiter = AsyncRateLimiter(getattr(self.exchange, 'rateLimit', 0))
+
+        invalid = [interval for interval in self.intervals if interval not in self.exchange.timeframes]
+        if invalid:
+            self.logger.error(f"Invalid intervals: {invalid}. Valid intervals: {list(self.exchange.timeframes.keys())}")
+            raise ValueError('Invalid interval')
+
+    async def _fetch(self, symbol: str, interval: str):
+        since_ts = self.previous_interval.get_previous_floored_timestamp(interval)
+        since_ms = int(since_ts.timestamp() * 1000)
+
+        for attempt in range(self.retries):
+            try:
+                await self.rate_limiter.wait(self.semaphore)
+                try:
+                    candles = await self.exchange.fetchOHLCV(symbol, timeframe=interval, since=since_ms)
+                finally:
+                    self.semaphore.release()
+                # Keep only closed candles, the one still forming belongs to the next round
+                candles = [candle for candle in candles if candle[0] <= since_ms]
+                if candles:
+                    df = pd.DataFrame(candles, columns=HEADER)
+                    df['date'] = pd.to_datetime(df['date'], unit='ms')
+                    return _ohlc_table_name(symbol, interval), df
+                self.logger.warning(f"No OHLCV data returned for {symbol} at interval {interval}")
+            except Exception as e:
+                self.logger.error(f"Attempt {attempt + 1} failed to fetch {symbol} {interval}: {e}")
+            if attempt < self.retries - 1:
+                await asyncio.sleep(2 ** attempt)
+
+        self.logger.error(f"All {self.retries} attempts failed for {symbol} {interval}.")
+        return _ohlc_table_name(symbol, interval), None
+
+    async def collect_once(self, intervals: list = None) -> int:
+        """Fetch every symbol for `intervals` (default: all) and write the round through the sink."""
+        intervals = self.intervals if intervals is None else intervals
+        results = await asyncio.gather(*(
+            self._fetch(symbol, interval) for symbol in self.symbols for interval in intervals
+        ))
+        frames = {table_name: df for table_name, df in results if df is not None}
+        self.logger.info(f"Collected {sum(len(df) for df in frames.values())} candles for {len(frames)} tables.")
+        return await self.sink.write(frames)
+
+    async def close(self) -> None:
+        close = getattr(self.exchange, 'close', None)
+        if close is not None:
+            await close()
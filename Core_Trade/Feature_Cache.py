@@ -0,0 +1,163 @@
+import logging
+import pickle
+from collections import OrderedDict
+from os import makedirs, path
+import pandas as pd
+
+from Core_Trade.RawData_Weighting_OHLC import CANDLE_FIGURES, FEATURE_VERSION, RawData_Weighting_OHLC
+from Core_Trade.Streaming_Weighting_OHLC import Streaming_Weighting_OHLC
+
+
+class _CacheEntry:
+    def __init__(self, frame: pd.DataFrame, state: Streaming_Weighting_OHLC, since=None):
+        self.frame = frame
+        self.state = state
+        # Start of the history the frame was computed from, earlier requests need a new put
+        self.since = pd.Timestamp(since) if since is not None else frame['date'].iloc[0]
+        self.nbytes = int(frame.memory_usage(deep=True).sum())
+
+    @property
+    def last_date(self):
+        return self.state.last_date
+
+
+class Feature_Cache:
+    """
+    Keeps generate_clean_data frames keyed by (table_name, interval, last date, FEATURE_VERSION).
+    Each (table_name, interval) holds one frame together with the Streaming_Weighting_OHLC state
+    at its last candle, so new candles are appended incrementally instead of recomputing the
+    whole history. The start of the history asked for in put() is kept with the state, so callers
+    can tell a request for a longer history from one the frame already covers. Frames are evicted least recently used first once max_entries or max_bytes
+    is exceeded. With cache_dir, frames are also written through to Arrow IPC files (pyarrow
+    required) with their state next to them, and are picked up from there by other processes.
+    Arrow is used over Parquet because a frame is rewritten on every extension, and its writes
+    are several times faster.
+    """
+    def __init__(self, max_entries: int = 8, max_bytes: int = 512 * 1024 ** 2, cache_dir: str = None):
+        self.logger = logging.getLogger('combined_OHLC_trade')
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.extended_rows = 0
+
+        if cache_dir is not None:
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError as e:
+                raise ImportError('The on-disk feature cache needs pyarrow: pip install pyarrow') from e
+            makedirs(cache_dir, exist_ok=True)
+
+    def _file_stem(self, table_name: str, interval: str) -> str:
+        return path.join(self.cache_dir, f'{table_name}_{interval}_v{FEATURE_VERSION}')
+
+    def _keep(self, key: tuple, entry: _CacheEntry) -> None:
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while self.entries and (len(self.entries) > self.max_entries or
+                                sum(e.nbytes for e in self.entries.values()) > self.max_bytes):
+            evicted, _ = self.entries.popitem(last=False)
+            self.logger.info(f"Feature cache evicted {evicted}.")
+            if evicted == key:
+                break
+
+    def _store(self, table_name: str, interval: str, entry: _CacheEntry) -> None:
+        self._keep((table_name, interval), entry)
+        if self.cache_dir is not None:
+            stem = self._file_stem(table_name, interval)
+            entry.frame.to_feather(stem + '.feather')
+            with open(stem + '.state.pkl', 'wb') as f:
+                pickle.dump({'state': entry.state, 'since': entry.since}, f)
+
+    def _load(self, table_name: str, interval: str):
+        key = (table_name, interval)
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return self.entries[key]
+        if self.cache_dir is None:
+            return None
+
+        stem = self._file_stem(table_name, interval)
+        if not (path.exists(stem + '.feather') and path.exists(stem + '.state.pkl')):
+            return None
+        with open(stem + '.state.pkl', 'rb') as f:
+            saved = pickle.load(f)
+        # Files written before the history start was saved hold the bare state
+        state, since = (saved['state'], saved['since']) if isinstance(saved, dict) else (saved, None)
+        frame = pd.read_feather(stem + '.feather')
+        if frame.empty or frame['date'].iloc[-1] != state.last_date:
+            self.logger.warning(f"Feature cache files {stem} are out of step, ignoring them.")
+            return None
+        entry = _CacheEntry(frame, state, since)
+        self._keep(key, entry)
+        return entry
+
+    def get(self, table_name: str, interval: str, last_date=None):
+        """Cached frame of table_name/interval, only if it ends at `last_date` when one is given."""
+        entry = self._load(table_name, interval)
+        if entry is None or (last_date is not None and entry.last_date != last_date):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry.frame
+
+    def last_date(self, table_name: str, interval: str):
+        entry = self._load(table_name, interval)
+        return None if entry is None else entry.last_date
+
+    def history_start(self, table_name: str, interval: str):
+        entry = self._load(table_name, interval)
+        return None if entry is None else entry.since
+
+    def put(self, table_name: str, interval: str, raw_data: pd.DataFrame, since=None) -> pd.DataFrame:
+        """
+        Compute the features of `raw_data` from scratch and cache them, replacing any older frame.
+        `since` is the start of the history that was asked for, the first candle of raw_data by default.
+        """
+        if raw_data is None or raw_data.empty:
+            raise ValueError("There is no Data passed, this is an empty dataset")
+        frame = RawData_Weighting_OHLC(raw_data.reset_index(drop=True).copy()).generate_clean_data()
+        state = Streaming_Weighting_OHLC()
+        state.warm_up(raw_data)
+        self._store(table_name, interval, _CacheEntry(frame, state, since))
+        return frame
+
+    def extend(self, table_name: str, interval: str, new_candles: pd.DataFrame) -> pd.DataFrame:
+        """Append the clean rows of candles newer than the cached frame, returning the extended frame."""
+        entry = self._load(table_name, interval)
+        if entry is None:
+            raise ValueError(f"No cached features for {table_name} {interval}, call put first.")
+        if new_candles is not None and not new_candles.empty:
+            new_candles = new_candles[new_candles['date'] > entry.last_date]
+        if new_candles is None or new_candles.empty:
+            return entry.frame
+
+        rows = pd.DataFrame([entry.state.update(candle) for candle in new_candles.to_dict('records')],
+                            columns=entry.frame.columns)
+        rows['candle_figure'] = pd.Categorical(rows['candle_figure'], categories=CANDLE_FIGURES)
+        rows = rows.astype(entry.frame.dtypes.to_dict())
+        frame = pd.concat([entry.frame, rows], ignore_index=True)
+
+        self.extended_rows += len(rows)
+        self._store(table_name, interval, _CacheEntry(frame, entry.state, entry.since))
+        return frame
+
+    def get_or_compute(self, table_name: str, interval: str, raw_data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Features of `raw_data`: served from the cache when it already ends at the same candle,
+        extended when the cached frame stops at one of its earlier candles, recomputed otherwise.
+        """
+        if raw_data is None or raw_data.empty:
+            raise ValueError("There is no Data passed, this is an empty dataset")
+        last_date = raw_data['date'].iloc[-1]
+        entry = self._load(table_name, interval)
+        if entry is not None and entry.last_date == last_date and entry.frame['date'].iloc[0] == raw_data['date'].iloc[0]:
+            self.hits += 1
+            return entry.frame
+        self.misses += 1
+        if entry is not None and entry.frame['date'].iloc[0] == raw_data['date'].iloc[0] \
+                and (raw_data['date'] == entry.last_date).any():
+            return self.extend(table_name, interval, raw_data)
+        return self.put(table_name, interval, raw_data)
@@ -1,19 +1,98 @@
+import asyncio
+from bisect import bisect_right
 import ccxt
 import pandas as pd
 import logging
-from time import time
+import time
 import re
-from sqlalchemy import inspect
+from sqlalchemy import text
 from sqlalchemy.exc import IntegrityError
 
-from Helper.Database_Engine import DatabaseEngine
+from Helper.Database_Engine import get_postgres_engine
 from Helper.Create_DatabaseSchema import CreateDatabaseSchema
+from Helper.Bulk_Writer import BulkWriter
+from Helper.Partition_Manager import Partition_Manager
 from Helper.Previous_Interval import Previous_Interval
+from Helper.Stage_Metrics import STAGE_METRICS
 
 HEADER = ['date', 'open', 'high', 'low', 'close', 'volume']
 
+# A stored candle is replaced when it differs from the incoming one (a zeroed fallback or stale values),
+# never by a fallback, so re-running a fetch or a backfill is idempotent
+OHLC_UPSERT_WHERE = (
+    "(EXCLUDED.open, EXCLUDED.high, EXCLUDED.low, EXCLUDED.close, EXCLUDED.volume) <> (0, 0, 0, 0, 0) "
+    "AND (stored.open, stored.high, stored.low, stored.close, stored.volume) "
+    "IS DISTINCT FROM (EXCLUDED.open, EXCLUDED.high, EXCLUDED.low, EXCLUDED.close, EXCLUDED.volume)"
+)
+
+# How far before its window a backfill fetches stored fallbacks again. Minutes the exchange has no
+# candle for (an outage on its side) stay zeroed, so older ones are only retried by an explicit
+# repair_fallback_candles(interval, since=...)
+REPAIR_LOOKBACK = pd.Timedelta(days=1)
+
+
+class OHLC_DB_Sink:
+    """
+    Where fetched candles go: the trade_<symbol><interval>_ohlc tables, created with their
+    partitions on first use and upserted with OHLC_UPSERT_WHERE. FetchTradeMinute calls it
+    synchronously. Async_OHLC_Collector hands it a whole collection round through write(), with
+    one COPY per table from a worker thread so the event loop never blocks on the DB. Both take
+    another object with the same methods instead, e.g. an in-memory one in tests.
+    """
+    def __init__(self, schema: str = 'trade'):
+        self.schema = schema
+        self.logger = logging.getLogger('combined_OHLC_trade')
+        self.engine = get_postgres_engine()
+        self.schema_creator = CreateDatabaseSchema(schema)
+        self.partition_manager = Partition_Manager(schema)
+        self.bulk_writer = BulkWriter(self.engine, schema=schema)
+        # Cached catalog, so steady-state ingestion only makes the write round-trip
+        self.metadata = self.schema_creator.metadata
+        self.update_where = OHLC_UPSERT_WHERE
+
+    def ensure_table(self, table_name: str) -> None:
+        if not self.metadata.has_table(table_name):
+            self.logger.info(f"Table {table_name} does not exist. Creating Table and Schema if not exist...")
+            self.schema_creator.create_tables_ohlc(table_name)
+
+    def last_stored_date(self, table_name: str):
+        with self.engine.connect() as conn:
+            return conn.execute(text(f"SELECT MAX(date) FROM {self.schema}.{table_name}")).scalar()
+
+    def fallback_dates(self, table_name: str, since: pd.Timestamp = None) -> list:
+        # Candles stored as zeroed fallbacks from `since` (default: all), oldest first
+        since_filter = '' if since is None else 'AND date >= :since'
+        with self.engine.connect() as conn:
+            return conn.execute(text(f"""
+                SELECT date FROM {self.schema}.{table_name}
+                WHERE open = 0 AND high = 0 AND low = 0 AND close = 0 AND volume = 0 {since_filter}
+                ORDER BY date
+            """), {} if since is None else {'since': since.to_pydatetime()}).scalars().all()
+
+    def write_table(self, table_name: str, df: pd.DataFrame) -> int:
+        # Backfilled candles can fall on past days, a missing partition is created and the write retried
+        self.ensure_table(table_name)
+        self.partition_manager.ensure_for_dates(table_name, df['date'])
+        return self.partition_manager.write_with_partitions(self.bulk_writer.upsert, df, table_name,
+                                                            update_where=self.update_where)
+
+    def _write_batch(self, frames: dict) -> int:
+        inserted = 0
+        for table_name, df in frames.items():
+            try:
+                inserted += self.write_table(table_name, df)
+            except Exception as e:
+                self.logger.error(f"Failed to write {len(df)} rows into {table_name}: {e}")
+        return inserted
+
+    async def write(self, frames: dict) -> int:
+        if not frames:
+            return 0
+        return await asyncio.to_thread(self._write_batch, frames)
+
+
 class FetchTradeMinute:
-    def __init__(self, exchange_name: str = 'binance', symbol: str = 'BTC/USDT'):
+    def __init__(self, exchange_name: str = 'binance', symbol: str = 'BTC/USDT', exchange=None, sink=None):
         # Initialize logger
         self.logger = logging.getLogger('combined_OHLC_trade')
 
@@ -27,15 +106,10 @@ class FetchTradeMinute:
 
         # Initialize helper classes
         self.previous_interval = Previous_Interval()
-        self.exchange = getattr(ccxt, self.exchange_name)()
-
-        # Create database engine and inspector
-        engine_builder = DatabaseEngine()
-        self.engine = engine_builder.create_postgres_engine()
-        self.inspector = inspect(self.engine)
-
-        # Used to create table/partition if needed
-        self.schema_creator = CreateDatabaseSchema('trade')
+        # An already built exchange object (or a stub) can be passed instead of the name, and
+        # another sink than the trade schema of the shared PostgreSQL engine
+        self.exchange = exchange if exchange is not None else getattr(ccxt, self.exchange_name)()
+        self.sink = sink if sink is not None else OHLC_DB_Sink('trade')
 
     def _fetch_previous_candle_ohlc(self, interval: str) -> pd.DataFrame:
         # Validate interval against exchange-supported timeframes
@@ -55,10 +129,12 @@ class FetchTradeMinute:
         for attempt in range(retries):
             try:
                 # Fetch OHLCV data from the exchange
-                candles = self.exchange.fetchOHLCV(self.symbol, timeframe=interval, since=since_ms)
+                with STAGE_METRICS.stage('fetch'):
+                    candles = self.exchange.fetchOHLCV(self.symbol, timeframe=interval, since=since_ms)
                 if not candles:
                     self.logger.warning(f"No OHLCV data returned for {self.symbol} at interval {interval}")
                     if attempt < retries - 1:
+                        STAGE_METRICS.count('fetch_retries')
                         time.sleep(10)
                     continue
                 # Use the first candle and return as DataFrame
@@ -70,49 +146,41 @@ class FetchTradeMinute:
             except Exception as e:
                 self.logger.error(f"Attempt {attempt + 1} failed to fetch OHLCV data: {e}")
                 if attempt < retries - 1:
+                    STAGE_METRICS.count('fetch_retries')
                     time.sleep(10)
 
         # On final failure, return fallback DataFrame
         self.logger.error(f"All {retries} attempts failed. Returning zeroed fallback candle.")
+        STAGE_METRICS.count('fallback_candles')
         fallback_data = [[since_ts, 0, 0, 0, 0, 0]]
         df = pd.DataFrame(fallback_data, columns=HEADER)
         return df
 
 
-    def fetch_ohlc_and_load_to_db(self, interval: str) -> None:
-        if not interval:
-            self.logger.error('Interval must be provided.')
-            raise ValueError('Interval is None')
-
+    def _set_table_name(self, interval: str) -> str:
         ##Decide the table name
         self.interval = interval
         stock_crypto_type=re.sub(r'[^A-Za-z0-9]', '', self.symbol).lower()
         segment = stock_crypto_type+self.interval
         self.table_name = f"trade_{segment}_ohlc"
+        return self.table_name
 
-        
-        df_ohlc = self._fetch_previous_candle_ohlc(self.interval)
+    def fetch_ohlc_and_load_to_db(self, interval: str) -> None:
+        if not interval:
+            self.logger.error('Interval must be provided.')
+            raise ValueError('Interval is None')
+
+        self._set_table_name(interval)
 
-        # Check if the target table exists in the database
-        try:
-            existing_tables = self.inspector.get_table_names(schema='trade')
-            if self.table_name not in existing_tables:
-                self.logger.info(f"Table {self.table_name} does not exist. Creating Table and Schema if not exist...")
-                self.schema_creator.create_tables_ohlc(self.table_name)
-        except Exception as e:
-            self.logger.error(f"Could not verify wheter table exist or no for Details:: {e}")
+        df_ohlc = self._fetch_previous_candle_ohlc(self.interval)
 
-        # Load data into the table if it's not empty
+        # Upsert the candle if there is one, the sink creates the table and partition when missing
         if df_ohlc is not None and not df_ohlc.empty:
             try:
                 self.logger.info(f"Inserting {len(df_ohlc)} OHLC records into {self.table_name}...")
-                df_ohlc.to_sql(self.table_name, self.engine, schema='trade', if_exists='append', index=False)
+                self._upsert(df_ohlc)
             except IntegrityError as e:
-                if 'no partition of relation' in str(e):
-                    self.logger.error("CheckViolation: missing partition. Creating it...")
-                    self.schema_creator.create_partition(self.table_name, offset=0)
-                else:
-                    self.logger.error(f"IntegrityError at inserting data: {e}")
+                self.logger.error(f"IntegrityError at inserting data: {e}")
             except Exception as e:
                 self.logger.error(f"Unexpected error inserting data: {e}")
                 print(type(e))
@@ -120,6 +188,117 @@ class FetchTradeMinute:
         else:
             self.logger.error(f"No OHLC data available to insert into {self.table_name}.")
 
+    def _upsert(self, df: pd.DataFrame) -> int:
+        with STAGE_METRICS.stage('insert'):
+            return self.sink.write_table(self.table_name, df)
+
+    def _page_pause(self) -> float:
+        # ccxt throttles by itself when enableRateLimit is on, otherwise wait rateLimit ms between pages
+        return 0 if getattr(self.exchange, 'enableRateLimit', False) else getattr(self.exchange, 'rateLimit', 0) / 1000
+
+    def repair_fallback_candles(self, interval: str, since=None, page_limit: int = 1000) -> int:
+        """
+        Fetch again the candles stored as zeroed fallbacks from `since` (default: all of them), as
+        every fetch attempt failed at the time, and upsert the real ones. Consecutive fallbacks are
+        fetched as one paged range. Returns the number of candles repaired.
+        """
+        self._set_table_name(interval)
+        if since is not None:
+            since = pd.Timestamp(since)
+            since = since.tz_localize('UTC') if since.tzinfo is None else since
+        dates = self.sink.fallback_dates(self.table_name, since)
+        if not dates:
+            return 0
+
+        pending = sorted(int(pd.Timestamp(date).timestamp() * 1000) for date in dates)
+        wanted = set(pending)
+        pause = self._page_pause()
+        candles, position = [], 0
+        while position < len(pending):
+            since_ms = pending[position]
+            # A page as long as the fallbacks left covers a run of consecutive ones in one call
+            limit = min(page_limit, len(pending) - position)
+            try:
+                with STAGE_METRICS.stage('fetch'):
+                    fetched = self.exchange.fetchOHLCV(self.symbol, timeframe=interval, since=since_ms, limit=limit)
+            except Exception as e:
+                self.logger.error(f"Failed to fetch the {interval} candles from {pd.Timestamp(since_ms, unit='ms')} again: {e}")
+                break
+            if not fetched:
+                break
+            candles += [candle for candle in fetched if candle[0] in wanted]
+            # Fallbacks the page went past without a candle are minutes the exchange does not have
+            position = max(position + 1, bisect_right(pending, fetched[-1][0]))
+            if pause and position < len(pending):
+                time.sleep(pause)
+        if not candles:
+            self.logger.warning(f"None of the {len(dates)} fallback candles of {self.table_name} could be fetched.")
+            return 0
+
+        df = pd.DataFrame(candles, columns=HEADER)
+        df['date'] = pd.to_datetime(df['date'], unit='ms')
+        repaired = self._upsert(df)
+        self.logger.info(f"Repaired {repaired} of {len(dates)} fallback candles in {self.table_name}.")
+        return repaired
+
+    def backfill_ohlc_to_db(self, interval: str, since=None, page_limit: int = 1000) -> int:
+        """
+        Fill the gap between the last stored candle (or `since` when the table is empty) and the
+        last closed candle, paging through fetchOHLCV and upserting each page, then repair the
+        zeroed fallback candles from REPAIR_LOOKBACK before the gap. Older fallbacks are repaired
+        with repair_fallback_candles(interval, since=...). Returns the number of candles written.
+        """
+        if not interval:
+            self.logger.error('Interval must be provided.')
+            raise ValueError('Interval is None')
+        if interval not in self.exchange.timeframes:
+            self.logger.error(
+                f"Invalid interval: {interval}. Valid intervals: {list(self.exchange.timeframes.keys())}"
+            )
+            raise ValueError('Invalid interval')
+
+        self._set_table_name(interval)
+        self.sink.ensure_table(self.table_name)
+
+        last_date = self.sink.last_stored_date(self.table_name)
+        if last_date is not None:
+            since_ms = int(pd.Timestamp(last_date).timestamp() * 1000) + 1
+        elif since is not None:
+            # Naive timestamps are taken as UTC, like the candles stored by this class
+            since_ms = int(pd.Timestamp(since).timestamp() * 1000)
+        else:
+            self.logger.error(f"Table {self.table_name} is empty, a start date must be given to backfill it.")
+            raise ValueError('since must be provided for an empty table')
+
+        # Only closed candles, the one still forming is left to the live fetch
+        until_ms = int(self.previous_interval.get_previous_floored_timestamp(interval).timestamp() * 1000)
+
+        pause = self._page_pause()
+        window_start = pd.Timestamp(since_ms, unit='ms', tz='UTC')
+
+        inserted = 0
+        while since_ms <= until_ms:
+            with STAGE_METRICS.stage('fetch'):
+                candles = self.exchange.fetchOHLCV(self.symbol, timeframe=interval, since=since_ms, limit=page_limit)
+            candles = [candle for candle in candles if since_ms <= candle[0] <= until_ms]
+            if not candles:
+                break
+
+            df_page = pd.DataFrame(candles, columns=HEADER)
+            df_page['date'] = pd.to_datetime(df_page['date'], unit='ms')
+
+            self.logger.info(f"Backfilling {len(df_page)} OHLC records from {df_page['date'].iloc[0]} into {self.table_name}...")
+            inserted += self._upsert(df_page)
+
+            since_ms = candles[-1][0] + 1
+            if pause:
+                time.sleep(pause)
+
+        # Fallbacks stored by the live fetch just before the window, `since` only starts an empty table
+        inserted += self.repair_fallback_candles(interval, since=window_start - REPAIR_LOOKBACK, page_limit=page_limit)
+        self.logger.info(f"Backfill of {self.table_name} complete, {inserted} candles written.")
+        return inserted
+
 if __name__ == '__main__':
     fetcher = FetchTradeMinute()
     fetcher.fetch_ohlc_and_load_to_db('1m')
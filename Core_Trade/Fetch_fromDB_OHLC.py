@@ -1,38 +1,105 @@
 import pandas as pd
 from os import path
-from Helper.Database_Engine import DatabaseEngine
+from sqlalchemy import text
+from Helper.Database_Engine import get_postgres_engine
+from Helper.Stream_Reader import stream_query, STREAM_CHUNK_ROWS
+from Helper.Stage_Metrics import STAGE_METRICS
+from Helper.Frame_Schema import OHLC_SCHEMA, select_list, read_dtypes
 import re
 
 class Fetch_fromDB_OHLC:
-    def __init__(self,schema:str='trade'):
+    def __init__(self,schema:str='trade',dtypes:dict=OHLC_SCHEMA):
         self.schema=schema
+        # NUMERIC columns are cast by PostgreSQL to the types of the plan, never built as Decimal objects
+        self.dtypes=dtypes
+        self.columns=select_list(dtypes)
 
-        # Create engine to connect to AWS-hosted PostgreSQL DB
-        db_engine = DatabaseEngine()
-        self.engine = db_engine.create_postgres_engine()
+        # Shared pooled engine to the AWS-hosted PostgreSQL DB
+        self.engine = get_postgres_engine()
 
-    def get_OHLC_fromDB(self,symbol:str=None,interval:str=None,since_hour:int=None):
+    @STAGE_METRICS.timed('db_read')
+    def get_OHLC_fromDB(self,symbol:str=None,interval:str=None,since_hour:int=None,limit:int=None):
         if symbol is None:
             raise ValueError("the symbol must be provided like 'BTC/USDT'.")
         crypto_stock_type=re.sub(r'[^A-Za-z0-9]', '', symbol).lower()
         if interval is None:
             raise ValueError("the interval must be provided like '5m'.")
         self.table_name="trade_{segment}_ohlc".format(segment=crypto_stock_type+interval)
-        if since_hour is None:
-            raise ValueError("Yuo must provide Integer value, you need the data for how many hours back")
+        if (since_hour is None) == (limit is None):
+            raise ValueError("You must provide either since_hour (hours back) or limit (number of latest candles), not both.")
         self.since_hour=since_hour
 
-        # Fetch last 4 hours of OHLC data from trade_btcusdt_ohlc table in 'trade' schema
         try:
-            query = f"""
-                SELECT * FROM {self.schema}.{self.table_name}
-                WHERE date >= NOW() - INTERVAL '{self.since_hour} HOURS'
-                ORDER BY date ASC;
-            """
-            self.trade_history = pd.read_sql(query, self.engine)
+            if limit is not None:
+                # Latest `limit` candles whatever their age, so gaps in the table do not shorten the warm-up
+                query = text(f"""
+                    SELECT {self.columns} FROM (
+                        SELECT * FROM {self.schema}.{self.table_name}
+                        ORDER BY date DESC
+                        LIMIT :limit
+                    ) AS latest
+                    ORDER BY date ASC;
+                """)
+                self.trade_history = pd.read_sql(query, self.engine, params={'limit': int(limit)},
+                                                 dtype=read_dtypes(self.dtypes))
+            else:
+                query = f"""
+                    SELECT {self.columns} FROM {self.schema}.{self.table_name}
+                    WHERE date >= NOW() - INTERVAL '{self.since_hour} HOURS'
+                    ORDER BY date ASC;
+                """
+                self.trade_history = pd.read_sql(query, self.engine, dtype=read_dtypes(self.dtypes))
             if self.trade_history.empty:
                 return None
             else:
                 return self.trade_history
         except Exception as e:
-            raise RuntimeError(f"Failed to fetch recent OHLC data: {e}")
\ No newline at end of file
+            raise RuntimeError(f"Failed to fetch recent OHLC data: {e}")
+
+    @STAGE_METRICS.timed('db_read')
+    def get_OHLC_after(self,symbol:str=None,interval:str=None,after=None):
+        # Only the candles stored after `after`, used to feed the streaming indicators
+        if symbol is None:
+            raise ValueError("the symbol must be provided like 'BTC/USDT'.")
+        if interval is None:
+            raise ValueError("the interval must be provided like '5m'.")
+        if after is None:
+            raise ValueError("You must provide the date of the last candle already processed.")
+        crypto_stock_type=re.sub(r'[^A-Za-z0-9]', '', symbol).lower()
+        self.table_name="trade_{segment}_ohlc".format(segment=crypto_stock_type+interval)
+
+        try:
+            query = text(f"""
+                SELECT {self.columns} FROM {self.schema}.{self.table_name}
+                WHERE date > :after
+                ORDER BY date ASC;
+            """)
+            new_rows = pd.read_sql(query, self.engine, params={'after': after}, dtype=read_dtypes(self.dtypes))
+            if new_rows.empty:
+                return None
+            else:
+                return new_rows
+        except Exception as e:
+            raise RuntimeError(f"Failed to fetch new OHLC data: {e}")
+
+    def stream_OHLC_fromDB(self,symbol:str=None,interval:str=None,since_hour:int=None,chunk_rows:int=STREAM_CHUNK_ROWS):
+        # Same rows as get_OHLC_fromDB(since_hour=...), yielded in typed chunks from a server-side cursor
+        if symbol is None:
+            raise ValueError("the symbol must be provided like 'BTC/USDT'.")
+        if interval is None:
+            raise ValueError("the interval must be provided like '5m'.")
+        if since_hour is None:
+            raise ValueError("You must provide since_hour (hours back).")
+        crypto_stock_type=re.sub(r'[^A-Za-z0-9]', '', symbol).lower()
+        self.table_name="trade_{segment}_ohlc".format(segment=crypto_stock_type+interval)
+
+        query = text(f"""
+            SELECT {self.columns} FROM {self.schema}.{self.table_name}
+            WHERE date >= NOW() - make_interval(hours => :since_hour)
+            ORDER BY date ASC;
+        """)
+        try:
+            yield from stream_query(self.engine, query, params={'since_hour': int(since_hour)},
+                                    chunk_rows=chunk_rows, dtype=read_dtypes(self.dtypes))
+        except Exception as e:
+            raise RuntimeError(f"Failed to stream OHLC data: {e}")
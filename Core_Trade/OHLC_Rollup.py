@@ -0,0 +1,145 @@
+import logging
+import re
+import pandas as pd
+from sqlalchemy import text
+
+from Helper.Database_Engine import get_postgres_engine
+from Helper.Create_DatabaseSchema import CreateDatabaseSchema
+from Helper.Previous_Interval import Previous_Interval
+from Helper.Stage_Metrics import STAGE_METRICS
+
+# Timeframes derived from the base candles by refresh_all
+ROLLUP_INTERVALS = ('5m', '15m', '30m', '1h', '4h', '1d')
+
+# Buckets are aligned on a Monday midnight UTC, which is also where the exchange opens 4h, 1d and 1w candles
+BUCKET_ORIGIN = pd.Timestamp('2000-01-03', tz='UTC')
+
+# Trailing window rolled up again by every refresh, so buckets written while some of their base
+# candles were missing or zeroed are fixed once the backfill brings them. It matches how far back
+# the backfill repairs fallbacks (REPAIR_LOOKBACK), older changes need refresh(interval, since=...)
+REROLL_WINDOW = pd.Timedelta(days=1)
+
+
+def interval_minutes(interval: str) -> int:
+    # Fixed-width intervals only, months have no constant length
+    match = re.fullmatch(r"(\d+)([mhdw])", interval or '')
+    if not match:
+        raise ValueError(f"Invalid rollup interval: {interval}. Use minutes, hours, days or weeks like '15m' or '4h'.")
+    value, unit = match.groups()
+    return int(int(value) * Previous_Interval().conversion_factor[unit])
+
+
+class OHLC_Rollup:
+    """
+    Builds higher timeframe candles (trade_<symbol><interval>_ohlc) from the stored base candles,
+    1m by default, instead of fetching every timeframe from the exchange. The aggregation runs in
+    PostgreSQL: first open, highest high, lowest low, last close and summed volume per bucket.
+    Only closed buckets are written, and a refresh starts again REROLL_WINDOW before the last written
+    bucket, so base candles that landed late are picked up. Only the buckets whose values changed
+    are rewritten. Zeroed fallback candles are left out. After backfilling or repairing base
+    candles older than REROLL_WINDOW, rebuild their range with refresh(interval, since=...).
+    """
+    def __init__(self, symbol: str = 'BTC/USDT', base_interval: str = '1m', schema: str = 'trade'):
+        if not symbol:
+            raise ValueError('Symbol must be provided to roll up OHLC data.')
+        self.symbol = symbol
+        self.schema = schema
+        self.base_interval = base_interval
+        self.base_minutes = interval_minutes(base_interval)
+        self.logger = logging.getLogger('combined_OHLC_trade')
+
+        # Shared pooled engine to the AWS-hosted PostgreSQL DB
+        self.engine = get_postgres_engine()
+        self.schema_creator = CreateDatabaseSchema(schema)
+
+    def table_name(self, interval: str) -> str:
+        segment = re.sub(r'[^A-Za-z0-9]', '', self.symbol).lower() + interval
+        return f"trade_{segment}_ohlc"
+
+    @staticmethod
+    def _bucket(date: pd.Timestamp, minutes: int) -> pd.Timestamp:
+        step = pd.Timedelta(minutes=minutes)
+        return BUCKET_ORIGIN + ((pd.Timestamp(date).tz_convert('UTC') - BUCKET_ORIGIN) // step) * step
+
+    def _ensure_partitions(self, table: str, first: pd.Timestamp, last: pd.Timestamp) -> None:
+        today = pd.Timestamp.now(tz='UTC').normalize()
+        for day in pd.date_range(first.normalize(), last.normalize(), freq='D'):
+            self.schema_creator.create_partition(table, offset=(day - today).days)
+
+    def refresh(self, interval: str, since=None) -> int:
+        """
+        Write the closed `interval` candles from REROLL_WINDOW before the last one already rolled up
+        (or from `since`, to rebuild a range) up to the last stored base candle. Returns the number
+        of candles written or changed.
+        """
+        minutes = interval_minutes(interval)
+        if minutes <= self.base_minutes or minutes % self.base_minutes:
+            raise ValueError(f"{interval} is not a multiple of the base interval {self.base_interval}.")
+
+        base_table = f"{self.schema}.{self.table_name(self.base_interval)}"
+        table = self.table_name(interval)
+        self.schema_creator.create_tables_ohlc(table)
+
+        with self.engine.connect() as conn:
+            first, last, rolled_up = conn.execute(text(f"""
+                SELECT (SELECT min(date) FROM {base_table}), (SELECT max(date) FROM {base_table}),
+                       (SELECT max(date) FROM {self.schema}.{table})
+            """)).fetchone()
+        if last is None:
+            self.logger.warning(f"{base_table} is empty, nothing to roll up into {table}.")
+            return 0
+
+        if since is not None:
+            start = pd.Timestamp(since)
+            start = start.tz_localize('UTC') if start.tzinfo is None else start
+        elif rolled_up is not None:
+            start = max(pd.Timestamp(rolled_up) - REROLL_WINDOW, pd.Timestamp(first))
+        else:
+            start = pd.Timestamp(first)
+        start = self._bucket(start, minutes)
+        # The bucket holding the last base candle is closed only once that candle is its last one
+        until = self._bucket(pd.Timestamp(last) + pd.Timedelta(minutes=self.base_minutes), minutes)
+        if start >= until:
+            return 0
+        self._ensure_partitions(table, start, until - pd.Timedelta(minutes=minutes))
+
+        query = text(f"""
+            WITH base AS (
+                SELECT date_bin(make_interval(mins => :minutes), date, :origin) AS bucket,
+                       date, open, high, low, close, volume
+                FROM {base_table}
+                WHERE date >= :start AND date < :until AND open > 0
+            )
+            INSERT INTO {self.schema}.{table} AS candle (date, open, high, low, close, volume)
+            SELECT bucket,
+                   (array_agg(open ORDER BY date))[1],
+                   max(high),
+                   min(low),
+                   (array_agg(close ORDER BY date DESC))[1],
+                   sum(volume)
+            FROM base
+            GROUP BY bucket
+            ON CONFLICT (date) DO UPDATE SET open = EXCLUDED.open, high = EXCLUDED.high, low = EXCLUDED.low,
+                                             close = EXCLUDED.close, volume = EXCLUDED.volume
+            WHERE (candle.open, candle.high, candle.low, candle.close, candle.volume)
+                  IS DISTINCT FROM (EXCLUDED.open, EXCLUDED.high, EXCLUDED.low, EXCLUDED.close, EXCLUDED.volume);
+        """)
+        params = {'minutes': minutes, 'origin': BUCKET_ORIGIN.to_pydatetime(),
+                  'start': start.to_pydatetime(), 'until': until.to_pydatetime()}
+        try:
+            with STAGE_METRICS.stage('rollup'), self.engine.begin() as conn:
+                written = conn.execute(query, params).rowcount
+        except Exception as e:
+            raise RuntimeError(f"Failed to roll up {base_table} into {table}: {e}")
+
+        self.logger.info(f"Rolled up {written} {interval} candles into {table} from {start} to {until}.")
+        return written
+
+    def refresh_all(self, intervals=ROLLUP_INTERVALS, since=None) -> dict:
+        # Every timeframe is derived from the same base rows, so they stay consistent with each other
+        return {interval: self.refresh(interval, since) for interval in intervals}
+
+
+if __name__ == '__main__':
+    rollup = OHLC_Rollup('BTC/USDT')
+    print(rollup.refresh_all())
@@ -0,0 +1,132 @@
+import itertools
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+
+from Core_Trade.Vectorized_Backtest import ENTRY_FIGURES, SIGNAL_COLUMNS, StrategyThresholds, Vectorized_Backtest
+
+# Feature frame attached by each worker process, built once by _attach_worker
+_WORKER = {}
+
+
+def grid_space(space: dict) -> list:
+    """Every combination of {threshold name: [values]}, the other thresholds keep their live values."""
+    names = list(space)
+    return [StrategyThresholds(**dict(zip(names, values))) for values in itertools.product(*space.values())]
+
+
+def random_space(space: dict, samples: int, seed: int = 7) -> list:
+    """`samples` thresholds drawn uniformly from {threshold name: (low, high)}."""
+    rng = np.random.default_rng(seed)
+    draws = {name: rng.uniform(low, high, samples) for name, (low, high) in space.items()}
+    return [StrategyThresholds(**{name: float(values[i]) for name, values in draws.items()}) for i in range(samples)]
+
+
+def trade_metrics(trades: list) -> dict:
+    """Total gain, trade count, win rate and max drawdown of the cumulative gain, trade by trade."""
+    gains = np.array([trade['gain'] for trade in trades], dtype=float)
+    equity = np.concatenate(([0.0], np.cumsum(gains)))
+    return {
+        'total_gain': equity[-1],
+        'trades': len(gains),
+        'win_rate': (gains > 0).mean() if len(gains) else np.nan,
+        'max_drawdown': (np.maximum.accumulate(equity) - equity).max(),
+    }
+
+
+class Shared_Feature_Frame:
+    """
+    The columns of a generate_clean_data frame the backtest needs, copied once into a shared memory block:
+    the dates as int64 nanoseconds followed by one float64 column per signal and the entry-figure flag.
+    Workers map the block instead of receiving a pickled frame with every task.
+    """
+    def __init__(self, clean_data: pd.DataFrame):
+        if clean_data is None or clean_data.empty:
+            raise ValueError("There is no Data passed, this is an empty dataset")
+        dates = pd.DatetimeIndex(clean_data['date'])
+        self.rows = len(clean_data)
+        self.tz = None if dates.tz is None else str(dates.tz)
+        self.unit = dates.unit
+
+        self.shm = shared_memory.SharedMemory(create=True, size=self.rows * 8 * (len(SIGNAL_COLUMNS) + 2))
+        stamps, matrix = self.views(self.shm.buf, self.rows)
+        # Stored as UTC instants, wall times are ambiguous on the DST change of a local zone
+        stamps[:] = dates.tz_convert('UTC').asi8 if self.tz else dates.asi8
+        for i, name in enumerate(SIGNAL_COLUMNS):
+            matrix[i] = clean_data[name].to_numpy(dtype=float, na_value=np.nan)
+        matrix[-1] = clean_data['candle_figure'].isin(ENTRY_FIGURES).to_numpy()
+
+    @staticmethod
+    def views(buffer, rows: int):
+        stamps = np.ndarray((rows,), dtype=np.int64, buffer=buffer)
+        matrix = np.ndarray((len(SIGNAL_COLUMNS) + 1, rows), dtype=np.float64, buffer=buffer, offset=rows * 8)
+        return stamps, matrix
+
+    def handle(self) -> tuple:
+        """What a worker needs to attach: small enough to pickle once per process."""
+        return self.shm.name, self.rows, self.tz, self.unit
+
+    def close(self) -> None:
+        self.shm.close()
+        self.shm.unlink()
+
+
+def _backtest_from_buffer(buffer, rows: int, tz, unit: str) -> Vectorized_Backtest:
+    stamps, matrix = Shared_Feature_Frame.views(buffer, rows)
+    stamps = stamps.view(f'datetime64[{unit}]')
+    dates = pd.Series(pd.to_datetime(stamps, utc=True).tz_convert(tz) if tz else pd.DatetimeIndex(stamps))
+    columns = {name: matrix[i] for i, name in enumerate(SIGNAL_COLUMNS)}
+    return Vectorized_Backtest.from_arrays(dates, columns, matrix[-1].astype(bool))
+
+
+def _attach_worker(name: str, rows: int, tz, unit: str) -> None:
+    # Workers share the parent's resource tracker, the block is unlinked once by the parent
+    shm = shared_memory.SharedMemory(name=name)
+    _WORKER['shm'] = shm
+    _WORKER['backtest'] = _backtest_from_buffer(shm.buf, rows, tz, unit)
+
+
+def _evaluate(thresholds: StrategyThresholds) -> dict:
+    return {**thresholds.model_dump(), **trade_metrics(_WORKER['backtest'].run(thresholds))}
+
+
+class Parameter_Sweep:
+    """
+    Runs the vectorized backtest for every StrategyThresholds of a search space across a
+    ProcessPoolExecutor. The feature frame is put in shared memory once and each worker
+    attaches to it at start-up, so a task only carries its thresholds and returns its metrics.
+    """
+    def __init__(self, clean_data: pd.DataFrame, max_workers: int = None):
+        self.logger = logging.getLogger('combined_OHLC_trade')
+        self.clean_data = clean_data
+        self.max_workers = max_workers or os.cpu_count()
+
+    def run(self, candidates: list, chunksize: int = None) -> pd.DataFrame:
+        """Return one row per candidate ranked by total gain, then by the smallest drawdown."""
+        if not candidates:
+            raise ValueError('The search space is empty.')
+        # A few chunks per worker keeps the pool busy without paying one round trip per candidate
+        chunksize = chunksize or max(1, len(candidates) // (self.max_workers * 4))
+
+        frame = Shared_Feature_Frame(self.clean_data)
+        try:
+            if self.max_workers == 1:
+                backtest = _backtest_from_buffer(frame.shm.buf, *frame.handle()[1:])
+                results = [{**thresholds.model_dump(), **trade_metrics(backtest.run(thresholds))}
+                           for thresholds in candidates]
+                # The views on the block must be gone before it can be closed
+                del backtest
+            else:
+                with ProcessPoolExecutor(self.max_workers, initializer=_attach_worker,
+                                         initargs=frame.handle()) as executor:
+                    results = list(executor.map(_evaluate, candidates, chunksize=chunksize))
+        finally:
+            frame.close()
+
+        self.logger.info(f"Swept {len(candidates)} threshold sets over {len(self.clean_data)} rows "
+                         f"with {self.max_workers} workers.")
+        ranked = pd.DataFrame(results).sort_values(['total_gain', 'max_drawdown'], ascending=[False, True])
+        return ranked.reset_index(drop=True)
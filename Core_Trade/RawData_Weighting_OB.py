@@ -1,9 +1,21 @@
 import os
 import re
+import logging
+import numpy as np
 import pandas as pd
 from datetime import timedelta
 from os import path
-from Helper.Database_Engine import DatabaseEngine
+from sqlalchemy import text
+from Helper.Database_Engine import get_postgres_engine
+from Helper.Create_DatabaseSchema import CreateDatabaseSchema
+from Helper.Stream_Reader import stream_query, STREAM_CHUNK_ROWS
+
+# Label order matters: the np.select codes below index into these tuples
+PUSH_DIRECTIONS = ('Buy Pressure', 'Sell Pressure', 'Neutral')
+OC_DIRECTIONS = ('Bearish', 'Bullish', 'Neutral')
+
+# Actions summed into their own column, the per-chunk groups need the same columns every time
+ACTIONS = ('Buy', 'Sell')
 
 
 class RawData_Weighting_OB:
@@ -13,49 +25,192 @@ class RawData_Weighting_OB:
         
         self.table_name = re.sub(r'[^A-Za-z0-9]', '', symbol).lower()
 
-        # Create engine to connect to AWS-hosted PostgreSQL DB
-        db_engine = DatabaseEngine()
-        self.engine = db_engine.create_postgres_engine()
+        self.logger = logging.getLogger('combined_OHLC_trade')
+
+        # Shared pooled engine to the AWS-hosted PostgreSQL DB
+        self.engine = get_postgres_engine()
 
         # Ensure data directory exists
         os.makedirs('Data', exist_ok=True)
 
-    def generate_clean_data(self):
+    def stream_orderbook(self, since_hour: int = 34, chunk_rows: int = STREAM_CHUNK_ROWS):
+        # Order book rows of the last `since_hour` hours, oldest first, in typed chunks from a server-side cursor
+        query = text(f"""
+            SELECT * FROM trade.trade_{self.table_name}_orderbook
+            WHERE date >= NOW() - make_interval(hours => :since_hour)
+            ORDER BY date ASC;
+        """)
         try:
-            query = f"""
-                SELECT * FROM trade.trade_{self.table_name}_orderbook
-                WHERE date >= NOW() - INTERVAL '34 HOURS'
-                ORDER BY date ASC;
-            """
-            df = pd.read_sql(query, self.engine)
-            df.to_csv(path.join('Data', 'OrderBook_forminRaw.csv'), index=False)
+            yield from stream_query(self.engine, query, params={'since_hour': int(since_hour)},
+                                    chunk_rows=chunk_rows, dtype={'btc_amount': 'float64'})
         except Exception as e:
             raise RuntimeError(f"Failed to fetch order book data: {e}")
 
+    @staticmethod
+    def _aggregate(df: pd.DataFrame):
         # Group by timestamp and action (Buy/Sell)
-        grouped = df.groupby(['date', 'action'])['btc_amount'].sum().unstack(fill_value=0)
+        grouped = (df.groupby(['date', 'action'])['btc_amount'].sum().unstack(fill_value=0)
+                   .reindex(columns=list(ACTIONS), fill_value=0))
+        grouped.columns.name = 'action'
 
         # Calculate imbalance and push direction
-        grouped['imbalance'] = grouped.get('Buy', 0) - grouped.get('Sell', 0)
-        grouped['push_direction'] = grouped['imbalance'].apply(
-            lambda x: 'Buy Pressure' if x > 0 else ('Sell Pressure' if x < 0 else 'Neutral')
+        grouped['imbalance'] = grouped['Buy'] - grouped['Sell']
+        imbalance = grouped['imbalance'].to_numpy(dtype=float)
+        grouped['push_direction'] = pd.Categorical.from_codes(
+            np.select([imbalance > 0, imbalance < 0], [0, 1], default=2),
+            categories=PUSH_DIRECTIONS,
         )
-
-        # Save 5-second grouped data
         result_5s = grouped.reset_index()
-        result_5s.to_csv(path.join('Data', 'OrderBook_Grouped_by5sec.csv'), index=False)
 
         # Group by floored minute and average
-        result_5s['date'] = result_5s['date'].dt.floor('min')
-        result_min = result_5s.groupby('date')[['Buy', 'Sell']].mean().reset_index()
+        by_minute = result_5s[['date', 'Buy', 'Sell']].assign(date=result_5s['date'].dt.floor('min'))
+        result_min = by_minute.groupby('date')[['Buy', 'Sell']].mean().reset_index()
         result_min['Assumed_OC_volume'] = result_min['Buy'] + result_min['Sell']
-        result_min['Assumed_OC_Direction'] = result_min.apply(
-            lambda row: 'Bearish' if row['Sell'] > row['Buy'] else (
-                        'Bullish' if row['Buy'] > row['Sell'] else 'Neutral'), axis=1)
+        buy, sell = result_min['Buy'].to_numpy(dtype=float), result_min['Sell'].to_numpy(dtype=float)
+        result_min['Assumed_OC_Direction'] = pd.Categorical.from_codes(
+            np.select([sell > buy, buy > sell], [0, 1], default=2),
+            categories=OC_DIRECTIONS,
+        )
         result_min['Assumed_OC_Volume_Delta']=result_min['Buy']-result_min['Sell']
+        return result_5s, result_min
+
+    def _buckets_sql(self, use_rollup: bool) -> str:
+        # 5-second Buy/Sell sums of the lookback window, from the raw rows or from the rollup table
+        if use_rollup:
+            return f"""
+                SELECT date, "Buy", "Sell" FROM trade.trade_{self.table_name}_orderbook_5s
+                WHERE date >= NOW() - make_interval(hours => :since_hour)
+            """
+        return f"""
+            SELECT date,
+                   coalesce(sum(btc_amount) FILTER (WHERE action = 'Buy'), 0) AS "Buy",
+                   coalesce(sum(btc_amount) FILTER (WHERE action = 'Sell'), 0) AS "Sell"
+            FROM trade.trade_{self.table_name}_orderbook
+            WHERE date >= NOW() - make_interval(hours => :since_hour) AND action IS NOT NULL
+            GROUP BY date
+        """
+
+    def refresh_rollup(self, late_seconds: int = 60) -> int:
+        """
+        Bring trade_<symbol>_orderbook_5s up to date, aggregating only the raw rows from the last rolled-up
+        bucket minus `late_seconds` (rows may arrive a little late). Returns the number of buckets written.
+        """
+        rollup = f"trade.trade_{self.table_name}_orderbook_5s"
+        CreateDatabaseSchema('trade').create_table_orderbook_rollup(f"trade_{self.table_name}_orderbook_5s")
+        query = text(f"""
+            INSERT INTO {rollup} AS rollup (date, "Buy", "Sell")
+            SELECT date,
+                   coalesce(sum(btc_amount) FILTER (WHERE action = 'Buy'), 0),
+                   coalesce(sum(btc_amount) FILTER (WHERE action = 'Sell'), 0)
+            FROM trade.trade_{self.table_name}_orderbook
+            WHERE action IS NOT NULL
+              AND date >= coalesce((SELECT max(date) FROM {rollup}) - make_interval(secs => :late_seconds), '-infinity')
+            GROUP BY date
+            ON CONFLICT (date) DO UPDATE SET "Buy" = EXCLUDED."Buy", "Sell" = EXCLUDED."Sell"
+            WHERE (rollup."Buy", rollup."Sell") IS DISTINCT FROM (EXCLUDED."Buy", EXCLUDED."Sell");
+        """)
+        try:
+            with self.engine.begin() as conn:
+                written = conn.execute(query, {'late_seconds': late_seconds}).rowcount
+        except Exception as e:
+            raise RuntimeError(f"Failed to refresh order book rollup: {e}")
+        self.logger.info(f"Order book rollup {rollup} refreshed, {written} buckets written.")
+        return written
+
+    def aggregate_in_db(self, since_hour: int = 34, use_rollup: bool = False):
+        """
+        The 5-second and per-minute frames of generate_clean_data computed by PostgreSQL, so only
+        the aggregates cross the network. With use_rollup they are read from the rollup table.
+        """
+        buckets = self._buckets_sql(use_rollup)
+        query_5s = text(f"""
+            WITH buckets AS ({buckets})
+            SELECT date, "Buy", "Sell", "Buy" - "Sell" AS imbalance,
+                   CASE WHEN "Buy" > "Sell" THEN 'Buy Pressure'
+                        WHEN "Buy" < "Sell" THEN 'Sell Pressure'
+                        ELSE 'Neutral' END AS push_direction
+            FROM buckets ORDER BY date;
+        """)
+        query_min = text(f"""
+            WITH buckets AS ({buckets}),
+            minutes AS (
+                SELECT date_trunc('minute', date) AS date, avg("Buy") AS "Buy", avg("Sell") AS "Sell"
+                FROM buckets GROUP BY 1
+            )
+            SELECT date, "Buy", "Sell", "Buy" + "Sell" AS "Assumed_OC_volume",
+                   CASE WHEN "Sell" > "Buy" THEN 'Bearish'
+                        WHEN "Buy" > "Sell" THEN 'Bullish'
+                        ELSE 'Neutral' END AS "Assumed_OC_Direction",
+                   "Buy" - "Sell" AS "Assumed_OC_Volume_Delta"
+            FROM minutes ORDER BY date;
+        """)
+        params = {'since_hour': int(since_hour)}
+        try:
+            with self.engine.connect() as conn:
+                result_5s = pd.read_sql(query_5s, conn, params=params,
+                                        dtype={'Buy': 'float64', 'Sell': 'float64', 'imbalance': 'float64'})
+                result_min = pd.read_sql(query_min, conn, params=params, dtype={
+                    'Buy': 'float64', 'Sell': 'float64', 'Assumed_OC_volume': 'float64', 'Assumed_OC_Volume_Delta': 'float64'})
+        except Exception as e:
+            raise RuntimeError(f"Failed to aggregate order book data: {e}")
+
+        result_5s['push_direction'] = pd.Categorical(result_5s['push_direction'], categories=PUSH_DIRECTIONS)
+        result_min['Assumed_OC_Direction'] = pd.Categorical(result_min['Assumed_OC_Direction'], categories=OC_DIRECTIONS)
+        return result_5s, result_min
+
+    def generate_clean_data(self, since_hour: int = 34, chunk_rows: int = STREAM_CHUNK_ROWS,
+                            aggregate_in_db: bool = False, use_rollup: bool = False):
+        """
+        Stream the order book chunk by chunk and append the raw rows, the 5-second groups and the
+        per-minute averages to their CSV files as they are complete. The rows of the last minute of
+        a chunk are carried over to the next one, so memory stays at one chunk whatever the lookback.
+        With aggregate_in_db the groups are computed by PostgreSQL instead (refreshing and reading
+        the rollup table with use_rollup) and the raw rows, which never leave the database, are not written.
+        """
+        if aggregate_in_db or use_rollup:
+            if use_rollup:
+                self.refresh_rollup()
+            result_5s, result_min = self.aggregate_in_db(since_hour, use_rollup)
+            if result_5s.empty:
+                self.logger.warning(f"No order book rows in the last {since_hour} hours.")
+                return
+            result_5s.to_csv(path.join('Data', 'OrderBook_Grouped_by5sec.csv'), index=False)
+            result_min.to_csv(path.join('Data', 'OrderBook_Grouped_byMin.csv'), index=False)
+            return
+
+        outputs = {
+            'raw': path.join('Data', 'OrderBook_forminRaw.csv'),
+            '5s': path.join('Data', 'OrderBook_Grouped_by5sec.csv'),
+            'min': path.join('Data', 'OrderBook_Grouped_byMin.csv'),
+        }
+        first_write = {name: True for name in outputs}
+
+        def append(name, df):
+            df.to_csv(outputs[name], mode='w' if first_write[name] else 'a', header=first_write[name], index=False)
+            first_write[name] = False
+
+        carry = None
+        for chunk in self.stream_orderbook(since_hour, chunk_rows):
+            # An empty window still comes back as one empty chunk
+            if chunk.empty:
+                continue
+            append('raw', chunk)
+            if carry is not None:
+                chunk = pd.concat([carry, chunk], ignore_index=True)
+            minute = chunk['date'].dt.floor('min')
+            complete = minute < minute.iloc[-1]
+            carry = chunk[~complete]
+            if complete.any():
+                result_5s, result_min = self._aggregate(chunk[complete])
+                append('5s', result_5s)
+                append('min', result_min)
 
-        # Save per-minute result
-        result_min.to_csv(path.join('Data', 'OrderBook_Grouped_byMin.csv'), index=False)
+        if carry is None:
+            self.logger.warning(f"No order book rows in the last {since_hour} hours.")
+            return
+        result_5s, result_min = self._aggregate(carry)
+        append('5s', result_5s)
+        append('min', result_min)
 
 
 if __name__ == "__main__":
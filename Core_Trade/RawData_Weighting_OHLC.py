@@ -1,125 +1,169 @@
 import pandas as pd
 from os import path
-from Helper.Database_Engine import DatabaseEngine
-from scipy.stats import linregress
+from Core_Trade.Rolling_Regression import rolling_slope_and_residual, SLOPE_WINDOWS
+from Helper.Frame_Schema import OHLC_COLUMNS, OHLC_SCHEMA, ohlc_floats
+from Helper.Stage_Metrics import STAGE_METRICS
 import numpy as np
 
+# Look-back windows of the Scaled_Close_N key levels
+SCALED_CLOSE_WINDOWS = (5, 10, 15, 30, 50, 60)
+
+# Bump whenever generate_clean_data changes its output, cached feature frames of older versions are ignored
+FEATURE_VERSION = 2
+
+# Intermediate columns still carried by the clean frame, the others never become columns
+KEPT_LEVEL_WINDOWS = (60,)          # Max_Close_N / Min_Close_N
+KEPT_WIDTH_WINDOWS = (100, 200)     # Width_slope_N
+
+# Rolling windows of the gain and of the avalanch / Bloodbath flags
+GAIN_WINDOW = 2
+AVALANCH_WINDOW = 3
+BLOODBATH_WINDOW = 4
+
+
+def minimum_lookback() -> int:
+    """
+    Number of candles generate_clean_data needs so every kept column of the newest row is populated.
+    The windows are counted in candles, so the same row count applies to every interval.
+    """
+    key_levels = max(SCALED_CLOSE_WINDOWS) + 1                      # rolling over close.shift(1)
+    candle_figure = max(SCALED_CLOSE_WINDOWS[0] + 1, SLOPE_WINDOWS[0])  # needs Scaled_Close_5 and slope_5
+    return max(
+        max(SLOPE_WINDOWS),
+        key_levels,
+        candle_figure + AVALANCH_WINDOW - 1,
+        BLOODBATH_WINDOW,
+        GAIN_WINDOW,
+    )
+
+
+# Labels of the candle_figure column, rows matching none of them are NaN
+CANDLE_FIGURES = ('Hammer', 'HangedMan', 'InvertedHammer', 'ShootingStar')
+
+
+def classify_candle(row):
+    body = abs(row['close'] - row['open'])
+    upper_wick = row['high'] - max(row['close'], row['open'])
+    lower_wick = min(row['close'], row['open']) - row['low']
+
+    # Avoid divide by zero
+    if body == 0:
+        return None
+
+    #if lower_wick >= 2 * body and lower_wick/5 > upper_wick:
+    if lower_wick >= 2 * body and lower_wick>upper_wick:
+        return 'HangedMan' if row['Scaled_Close_5']>0.9 and row['slope_5']>10 else 'Hammer'
+    #elif upper_wick >= 2 * body and upper_wick/5 >lower_wick:
+    elif upper_wick >= 2 * body and lower_wick<upper_wick:
+        return 'ShootingStar' if row['Scaled_Close_5']>0.9 and row['slope_5']>10 else 'InvertedHammer'
+    else:
+        return None
+
+
+def classify_candles(open_, high, low, close, scaled_close_5, slope_5) -> pd.Categorical:
+    """Array version of classify_candle, returning a categorical over CANDLE_FIGURES."""
+    open_, high, low, close, scaled_close_5, slope_5 = (
+        np.asarray(values, dtype=float) for values in (open_, high, low, close, scaled_close_5, slope_5)
+    )
+    body = np.abs(close - open_)
+    upper_wick = high - np.maximum(close, open_)
+    lower_wick = np.minimum(close, open_) - low
+
+    at_peak = (scaled_close_5 > 0.9) & (slope_5 > 10)
+    hammer_shape = (body != 0) & (lower_wick >= 2 * body) & (lower_wick > upper_wick)
+    inverted_shape = (body != 0) & ~hammer_shape & (upper_wick >= 2 * body) & (lower_wick < upper_wick)
+
+    codes = np.select(
+        [hammer_shape & at_peak, hammer_shape, inverted_shape & at_peak, inverted_shape],
+        [CANDLE_FIGURES.index(label) for label in ('HangedMan', 'Hammer', 'ShootingStar', 'InvertedHammer')],
+        default=-1,
+    )
+    return pd.Categorical.from_codes(codes, categories=CANDLE_FIGURES)
+
+
 class RawData_Weighting_OHLC:
-    def __init__(self,trade_history:pd=None):
+    """
+    Feature columns of an OHLC frame. The OHLC columns are cast to float64 first with ohlc_floats,
+    so Decimal objects never reach the arithmetic. `dtypes` is the plan the frame was read with
+    (Fetch_fromDB_OHLC(dtypes=...)), fixed-point columns are scaled back from it.
+    Intermediate values (EMAs, key level extremes, regression residuals) stay NumPy arrays, only
+    the kept columns are added to the frame. 0/1 flags are int8 and the other features
+    `feature_float`, float32 halving their memory.
+    """
+    def __init__(self,trade_history:pd=None,feature_float:str='float64',dtypes:dict=OHLC_SCHEMA):
         if trade_history is None:
             raise ValueError("There is no Data passed, this is an empty dataset")
+        if feature_float not in ('float64', 'float32'):
+            raise ValueError(f"Invalid feature type: {feature_float}. Use 'float64' or 'float32'.")
         self.trade_history=trade_history
+        self.feature_float=feature_float
+        self.dtypes=dtypes
 
+    @STAGE_METRICS.timed('generate_clean_data')
     def generate_clean_data(self):
-        def compute_slope_and_residual(df, column, window):
-            slopes = np.full(len(df), np.nan)
-            residuals = np.full(len(df), np.nan)
-            
-            y_series = df[column].values
-            x = np.arange(window)
-            
-            for i in range(window - 1, len(df)):
-                y = y_series[i - window + 1:i + 1]
-                slope, intercept, _, _, _ = linregress(x, y)
-                y_pred = slope * x + intercept
-                residual_max = np.max(np.abs(y - y_pred))
-
-                slopes[i] = slope
-                residuals[i] = residual_max
-
-            return slopes, residuals
+        history = ohlc_floats(self.trade_history, self.dtypes)
+        open_, high, low, close, volume = (history[column].to_numpy() for column in OHLC_COLUMNS)
+        close_series = pd.Series(close)
+        features = {}
 
         # Calculate gains
-        self.trade_history['gain'] = self.trade_history['close'] - self.trade_history['open']
-        self.trade_history['gain_last_5interval'] = (self.trade_history['gain'].rolling(window=2, min_periods=1).sum())
+        gain = close - open_
+        features['gain'] = gain
+        features['gain_last_5interval'] = pd.Series(gain).rolling(window=GAIN_WINDOW, min_periods=1).sum().to_numpy()
 
-        # MACD and Signal Line calculation
-        ema_12 = self.trade_history['close'].ewm(span=12, adjust=False).mean()
-        ema_26 = self.trade_history['close'].ewm(span=26, adjust=False).mean()
-        self.trade_history['MACD'] = ema_12 - ema_26
-        self.trade_history['Signal'] = self.trade_history['MACD'].ewm(span=9, adjust=False).mean()
-        self.trade_history['MACD_Position'] = self.trade_history['MACD'] - self.trade_history['Signal']
+        # MACD position against its signal line
+        macd = close_series.ewm(span=12, adjust=False).mean() - close_series.ewm(span=26, adjust=False).mean()
+        features['MACD_Position'] = (macd - macd.ewm(span=9, adjust=False).mean()).to_numpy()
 
         # Calculate Key Levels
-        self.trade_history['Max_Close_5'] = self.trade_history['close'].shift(1).rolling(window=5).max()
-        self.trade_history['Min_Close_5'] = self.trade_history['close'].shift(1).rolling(window=5).min()
-        self.trade_history['Scaled_Close_5'] = (self.trade_history['close']-self.trade_history['Min_Close_5'])/(self.trade_history['Max_Close_5']-self.trade_history['Min_Close_5'])
-
-        self.trade_history['Max_Close_10'] = self.trade_history['close'].shift(1).rolling(window=10).max()
-        self.trade_history['Min_Close_10'] = self.trade_history['close'].shift(1).rolling(window=10).min()
-        self.trade_history['Scaled_Close_10'] = (self.trade_history['close']-self.trade_history['Min_Close_10'])/(self.trade_history['Max_Close_10']-self.trade_history['Min_Close_10'])
-
-        self.trade_history['Max_Close_15'] = self.trade_history['close'].shift(1).rolling(window=15).max()
-        self.trade_history['Min_Close_15'] = self.trade_history['close'].shift(1).rolling(window=15).min()
-        self.trade_history['Scaled_Close_15'] = (self.trade_history['close']-self.trade_history['Min_Close_15'])/(self.trade_history['Max_Close_15']-self.trade_history['Min_Close_15'])
-    
-        self.trade_history['Max_Close_30'] = self.trade_history['close'].shift(1).rolling(window=30).max()
-        self.trade_history['Min_Close_30'] = self.trade_history['close'].shift(1).rolling(window=30).min()
-        self.trade_history['Scaled_Close_30'] = (self.trade_history['close']-self.trade_history['Min_Close_30'])/(self.trade_history['Max_Close_30']-self.trade_history['Min_Close_30'])
-
-        self.trade_history['Max_Close_50'] = self.trade_history['close'].shift(1).rolling(window=50).max()
-        self.trade_history['Min_Close_50'] = self.trade_history['close'].shift(1).rolling(window=50).min()
-        self.trade_history['Scaled_Close_50'] = (self.trade_history['close']-self.trade_history['Min_Close_50'])/(self.trade_history['Max_Close_50']-self.trade_history['Min_Close_50'])
-
-        self.trade_history['Max_Close_60'] = self.trade_history['close'].shift(1).rolling(window=60).max()
-        self.trade_history['Min_Close_60'] = self.trade_history['close'].shift(1).rolling(window=60).min()
-        self.trade_history['Scaled_Close_60'] = (self.trade_history['close']-self.trade_history['Min_Close_60'])/(self.trade_history['Max_Close_60']-self.trade_history['Min_Close_60'])
-
-
-        self.trade_history['middle_value'] = abs(self.trade_history['close'] - self.trade_history['open'])/2 + self.trade_history[['close', 'open']].min(axis=1)
-        self.trade_history['slope_5'], self.trade_history['Width_slope_5'] = compute_slope_and_residual(self.trade_history, 'middle_value', 5)
-        self.trade_history['slope_10'], self.trade_history['Width_slope_10'] = compute_slope_and_residual(self.trade_history, 'middle_value', 10)
-        self.trade_history['slope_15'], self.trade_history['Width_slope_15'] = compute_slope_and_residual(self.trade_history, 'middle_value', 15)
-        self.trade_history['slope_30'], self.trade_history['Width_slope_30'] = compute_slope_and_residual(self.trade_history, 'middle_value', 30)
-        self.trade_history['slope_50'], self.trade_history['Width_slope_50'] = compute_slope_and_residual(self.trade_history, 'middle_value', 50)
-        self.trade_history['slope_100'], self.trade_history['Width_slope_100'] = compute_slope_and_residual(self.trade_history, 'middle_value', 100)
-        self.trade_history['slope_200'], self.trade_history['Width_slope_200'] = compute_slope_and_residual(self.trade_history, 'middle_value', 200)
-
-
-
-        def classify_candle(row):
-            body = abs(row['close'] - row['open'])
-            upper_wick = row['high'] - max(row['close'], row['open'])
-            lower_wick = min(row['close'], row['open']) - row['low']
-
-            # Avoid divide by zero
-            if body == 0:
-                return None
-
-            #if lower_wick >= 2 * body and lower_wick/5 > upper_wick:
-            if lower_wick >= 2 * body and lower_wick>upper_wick:
-                return 'HangedMan' if row.Scaled_Close_5>0.9 and row.slope_5>10 else 'Hammer'
-            #elif upper_wick >= 2 * body and upper_wick/5 >lower_wick:
-            elif upper_wick >= 2 * body and lower_wick<upper_wick:
-                return 'ShootingStar' if row.Scaled_Close_5>0.9 and row.slope_5>10 else 'InvertedHammer'
-            else:
-                return None
-
-        self.trade_history['candle_figure'] = self.trade_history.apply(classify_candle, axis=1)
+        previous_close = close_series.shift(1)
+        for window in SCALED_CLOSE_WINDOWS:
+            max_close = previous_close.rolling(window=window).max().to_numpy()
+            min_close = previous_close.rolling(window=window).min().to_numpy()
+            if window in KEPT_LEVEL_WINDOWS:
+                features[f'Max_Close_{window}'] = max_close
+                features[f'Min_Close_{window}'] = min_close
+            with np.errstate(divide='ignore', invalid='ignore'):
+                features[f'Scaled_Close_{window}'] = (close - min_close) / (max_close - min_close)
+
+        middle_value = np.abs(close - open_) / 2 + np.fmin(close, open_)
+        slopes = rolling_slope_and_residual(middle_value, SLOPE_WINDOWS, residual_windows=KEPT_WIDTH_WINDOWS)
+        for window, (slope, width) in slopes.items():
+            features[f'slope_{window}'] = slope
+            if window in KEPT_WIDTH_WINDOWS:
+                features[f'Width_slope_{window}'] = width
+
+        candle_figure = classify_candles(open_, high, low, close, features['Scaled_Close_5'], features['slope_5'])
 
         # Volume Momentum Direction based on candle body only, ignoring candles wicks
-        is_red = self.trade_history['close'] < self.trade_history['open']   # red  = True
-        body         = (self.trade_history['close'] - self.trade_history['open']).abs()
-        candle_range = self.trade_history['high'] - self.trade_history['low']
-        candle_range = candle_range.replace(0, 1e-6)                        # avoid div-by-zero
-        raw_momentum = (body / candle_range) * self.trade_history['volume']
-        self.trade_history['volume_momentum'] = np.where(is_red, -raw_momentum, raw_momentum)
+        is_red = close < open_                                              # red  = True
+        candle_range = high - low
+        candle_range = np.where(candle_range == 0, 1e-6, candle_range)      # avoid div-by-zero
+        raw_momentum = (np.abs(close - open_) / candle_range) * volume
+        volume_momentum = np.where(is_red, -raw_momentum, raw_momentum)
+
+        # Cast before the flags are derived, so they agree with the stored feature values
+        features = {name: values.astype(self.feature_float, copy=False) for name, values in features.items()}
+        features['candle_figure'] = candle_figure
+        features['volume_momentum'] = volume_momentum.astype(self.feature_float, copy=False)
 
         # Create Avalanche Exit in case a shooting star or hanging man is observed at the peak
-        mask = self.trade_history['candle_figure'].isin(['ShootingStar', 'HangedMan']).astype(int)
-        self.trade_history['avalanch'] = (
-            mask.rolling(window=3, min_periods=1).sum() > 0
-        ).astype(int)
+        mask = pd.Series(candle_figure.isin(['ShootingStar', 'HangedMan']).astype(np.int8))
+        features['avalanch'] = (mask.rolling(window=AVALANCH_WINDOW, min_periods=1).sum() > 0).to_numpy().astype(np.int8)
 
         # Create Bloodbath flag whihc happens at great loss time
-        mask = (self.trade_history['volume_momentum'] < -30).astype(int)
-        self.trade_history['Bloodbath'] = (
-            mask.rolling(window=4, min_periods=1).max()
+        mask = pd.Series((features['volume_momentum'] < -30).astype(np.int8))
+        features['Bloodbath'] = (
+            mask.rolling(window=BLOODBATH_WINDOW, min_periods=1).max()
             .fillna(0)  # ensure no NaNs at beginning
-            .astype(int)
+            .to_numpy().astype(np.int8)
         )
 
-        self.trade_history = self.trade_history.drop(columns=['MACD','Signal','Max_Close_5','Min_Close_5','Max_Close_10','Min_Close_10','Max_Close_15','Min_Close_15','Max_Close_30','Min_Close_30','Max_Close_50','Min_Close_50','middle_value','Width_slope_5','Width_slope_10','Width_slope_15','Width_slope_30','Width_slope_50'])
+        history = history.drop(columns=[name for name in features if name in history.columns])
+        for name in list(features):
+            # Moved one by one, so no column is held twice at once
+            history[name] = features.pop(name)
+        self.trade_history = history
         return self.trade_history
         #self.trade_history.to_csv('Data\\Binance_Bitcoin_minute_clean.csv', index=False)
        
@@ -0,0 +1,80 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Windows used by RawData_Weighting_OHLC for the slope_N / Width_slope_N columns
+SLOPE_WINDOWS = (5, 10, 15, 30, 50, 100, 200)
+
+# Rows handled per block: the running sums restart every block so they never grow large
+# enough to lose precision, and the residual pass never materialises more than
+# BLOCK_ROWS x window cells at once
+BLOCK_ROWS = 2048
+
+
+def _window_slopes(segment: np.ndarray, window: int):
+    """
+    Closed-form least-squares slope and intercept for every full window of `segment`,
+    computed from cumulative sums with x = 0..window-1 inside each window.
+    The segment is shifted by its mean so the running sums stay small.
+    """
+    y = segment - segment.mean()
+    j = np.arange(len(y), dtype=float)
+
+    cum_y = np.concatenate(([0.0], np.cumsum(y)))
+    cum_jy = np.concatenate(([0.0], np.cumsum(j * y)))
+
+    start = np.arange(len(y) - window + 1, dtype=float)
+    sum_y = cum_y[window:] - cum_y[:-window]
+    sum_ky = (cum_jy[window:] - cum_jy[:-window]) - start * sum_y
+
+    x_mean = (window - 1) / 2
+    sxx = window * (window * window - 1) / 12
+    slope = (sum_ky - x_mean * sum_y) / sxx
+    intercept = sum_y / window - slope * x_mean
+    return slope, intercept, y
+
+
+def rolling_slope_and_residual(values, windows=SLOPE_WINDOWS, residual_windows=None) -> dict:
+    """
+    Rolling linear regression of `values` against 0..window-1 for every window in `windows`.
+    Returns {window: (slopes, residuals)} where residuals is the max absolute residual of the
+    fit inside the window. Rows without a full window, or with a NaN inside it, are NaN,
+    the same as running scipy.stats.linregress on each window. With `residual_windows` the
+    residuals of the other windows are skipped and returned as None.
+    """
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+
+    missing = ~np.isfinite(values)
+    filled = np.where(missing, 0.0, values)
+    cum_missing = np.concatenate(([0], np.cumsum(missing)))
+
+    result = {}
+    for window in windows:
+        if window < 2:
+            raise ValueError(f"Regression window must be at least 2, got {window}")
+
+        with_residuals = residual_windows is None or window in residual_windows
+        slopes = np.full(n, np.nan)
+        residuals = np.full(n, np.nan) if with_residuals else None
+        if n < window:
+            result[window] = (slopes, residuals)
+            continue
+
+        x = np.arange(window, dtype=float)
+        for first in range(window - 1, n, BLOCK_ROWS):
+            last = min(first + BLOCK_ROWS, n)
+            segment = filled[first - window + 1:last]
+
+            slope, intercept, shifted = _window_slopes(segment, window)
+            slopes[first:last] = slope
+            if with_residuals:
+                fitted = intercept[:, None] + slope[:, None] * x[None, :]
+                residuals[first:last] = np.abs(sliding_window_view(shifted, window) - fitted).max(axis=1)
+
+        has_missing = (cum_missing[window:] - cum_missing[:-window]) > 0
+        slopes[window - 1:][has_missing] = np.nan
+        if with_residuals:
+            residuals[window - 1:][has_missing] = np.nan
+        result[window] = (slopes, residuals)
+
+    return result
@@ -0,0 +1,260 @@
+import logging
+from abc import ABC, abstractmethod
+import numpy as np
+import pandas as pd
+from os import path
+
+from Core_Trade.RawData_Weighting_OHLC import CANDLE_FIGURES
+from Core_Trade.Trade_Journal import Trade_Journal
+from Core_Trade.Vectorized_Backtest import StrategyThresholds, ENTRY_FIGURES, RECORD_FIELDS, SIGNAL_COLUMNS
+
+# Journals of the registered strategies, one directory per strategy name
+STRATEGY_DIRECTORY = path.join('Data', 'strategies')
+
+# candle_figure travels in the Feature_View as its code in CANDLE_FIGURES, NaN for no figure
+FIGURE_CODES = {figure: float(code) for code, figure in enumerate(CANDLE_FIGURES)}
+ENTRY_FIGURE_CODES = tuple(FIGURE_CODES[figure] for figure in ENTRY_FIGURES)
+
+# last_date of a variant that has not evaluated any candle yet
+_NEVER = np.iinfo(np.int64).min
+
+
+def strategy_journal(name: str, directory: str = STRATEGY_DIRECTORY, **kwargs) -> Trade_Journal:
+    """Trade_Journal of strategy `name`: <directory>/<name>/trade_journal.jsonl and its trade records."""
+    return Trade_Journal(path.join(directory, name, 'trade_journal.jsonl'),
+                         path.join(directory, name, 'trade_records_Result.json'), **kwargs)
+
+
+class Feature_View:
+    """
+    The clean row of a candle as one float64 vector, filled once per candle and read by every
+    registered strategy through the positions of its columns.
+    """
+    def __init__(self, columns):
+        self.columns = tuple(columns)
+        self.index = {name: position for position, name in enumerate(self.columns)}
+        self.values = np.full(len(self.columns), np.nan)
+        self.date = None
+
+    def load(self, row: dict) -> 'Feature_View':
+        self.date = pd.Timestamp(row['date'])
+        values = []
+        for name in self.columns:
+            value = row.get(name)
+            if name == 'candle_figure':
+                value = FIGURE_CODES.get(value, np.nan)
+            values.append(np.nan if value is None else value)
+        self.values[:] = values
+        return self
+
+
+class Strategy_Plugin(ABC):
+    """
+    Interface of the strategies run by Strategy_Registry. A plugin lists the feature `columns` it
+    reads and the `names` of the strategies it runs, each with its own state and journal. One
+    plugin may run many strategies at once, like Threshold_Strategies. bind() gives it the
+    positions of its columns in the shared Feature_View. evaluate() is called with the view once
+    per closed candle, and must skip the candles a strategy evaluated before a restart.
+    """
+    columns = ()
+    names = ()
+
+    def bind(self, index: dict):
+        self.positions = {name: index[name] for name in self.columns}
+
+    def recover(self):
+        """Restore the state of every strategy from its journal and start the journals."""
+
+    @abstractmethod
+    def evaluate(self, view: Feature_View):
+        """Run every strategy of the plugin on the candle loaded in `view`."""
+
+    def close(self):
+        """Write what the journals still hold and stop them."""
+
+
+class Strategy_Registry:
+    """
+    Strategies evaluated live on one shared feature row. On every closed candle the streaming row
+    is loaded once into a Feature_View and handed to each registered plugin, so one more strategy
+    costs its own evaluation only, not another DB read or feature pass.
+    """
+    def __init__(self):
+        self.plugins = []
+        self.names = []
+        self.view = Feature_View(())
+        self.logger = logging.getLogger('combined_OHLC_trade')
+
+    def register(self, plugin: Strategy_Plugin) -> Strategy_Plugin:
+        duplicates = sorted(set(self.names).intersection(plugin.names))
+        if duplicates:
+            raise ValueError(f"Strategies already registered: {duplicates}")
+        self.plugins.append(plugin)
+        self.names += plugin.names
+
+        # One view over the columns of every plugin, in first-registered order
+        columns = list(self.view.columns)
+        columns += [name for name in dict.fromkeys(plugin.columns) if name not in self.view.index]
+        self.view = Feature_View(columns)
+        for registered in self.plugins:
+            registered.bind(self.view.index)
+        return plugin
+
+    def recover(self):
+        for plugin in self.plugins:
+            plugin.recover()
+
+    def evaluate(self, row: dict):
+        if not self.plugins:
+            self.logger.warning("No strategy registered, nothing to evaluate.")
+            return
+        view = self.view.load(row)
+        for plugin in self.plugins:
+            plugin.evaluate(view)
+
+    def close(self):
+        for plugin in self.plugins:
+            plugin.close()
+
+
+class Threshold_Strategies(Strategy_Plugin):
+    """
+    The rules of RealTimeTradeStrategy for many StrategyThresholds variants at once. Each state
+    field is an array with a slot per variant, and every condition is one NumPy expression over all
+    variants. Only the variants that enter or exit go through Python. Each variant writes its
+    entries, exits and state to its own Trade_Journal, in the records format of
+    RealTimeTradeStrategy. The state is journaled only on the candles that change it, because
+    re-evaluating a candle that changed nothing after a restart changes nothing either.
+    """
+    columns = SIGNAL_COLUMNS + ('candle_figure',)
+
+    def __init__(self, variants: dict, journals: dict = None):
+        if not variants:
+            raise ValueError('At least one strategy variant must be provided.')
+        self.names = tuple(variants)
+        self.logger = logging.getLogger('combined_OHLC_trade')
+        # Variants without a journal of `journals` get the one of strategy_journal()
+        journals = journals or {}
+        unknown = sorted(set(journals).difference(self.names))
+        if unknown:
+            raise ValueError(f"Journals given for unknown strategies: {unknown}")
+        self.journals = [journals[name] if name in journals else strategy_journal(name) for name in self.names]
+
+        thresholds = [variants[name] if variants[name] is not None else StrategyThresholds() for name in self.names]
+        for field in StrategyThresholds.model_fields:
+            setattr(self, field, np.array([getattr(variant, field) for variant in thresholds], dtype=float))
+
+        count = len(self.names)
+        self.active_trade = np.zeros(count, dtype=bool)
+        self.waiting_for_confirmation = np.zeros(count, dtype=bool)
+        self.session_gain = np.zeros(count)
+        self.entry_evaluated_this_session = np.zeros(count, dtype=bool)
+        self.last_date = np.full(count, _NEVER, dtype=np.int64)
+        self.trade_records = [{} for _ in range(count)]
+        # last_date is held as int64 nanoseconds, snapshots give it back the time zone of the candles
+        self.date_tz = 'UTC'
+
+    def snapshot(self, variant: int) -> dict:
+        last_date = self.last_date[variant]
+        return {
+            'active_trade': bool(self.active_trade[variant]),
+            'waiting_for_confirmation': bool(self.waiting_for_confirmation[variant]),
+            'session_gain': float(self.session_gain[variant]),
+            'trade_record': dict(self.trade_records[variant]),
+            'entry_evaluated_this_session': bool(self.entry_evaluated_this_session[variant]),
+            'last_date': None if last_date == _NEVER else pd.Timestamp(last_date, tz=self.date_tz),
+        }
+
+    def restore(self, variant: int, state: dict):
+        # State recovered from the journal after a restart, an open position carries on
+        self.active_trade[variant] = state.get('active_trade', False)
+        self.waiting_for_confirmation[variant] = state.get('waiting_for_confirmation', False)
+        self.session_gain[variant] = state.get('session_gain', 0)
+        self.trade_records[variant] = dict(state.get('trade_record') or {})
+        self.entry_evaluated_this_session[variant] = state.get('entry_evaluated_this_session', False)
+        last_date = state.get('last_date')
+        self.last_date[variant] = _NEVER if last_date is None else pd.Timestamp(last_date).value
+
+    def recover(self):
+        for variant, journal in enumerate(self.journals):
+            state = journal.recover()
+            if state is not None:
+                self.restore(variant, state)
+            journal.start()
+
+    def close(self):
+        for journal in self.journals:
+            journal.close()
+
+    def evaluate(self, view: Feature_View):
+        values, positions = view.values, self.positions
+        date = view.date
+        self.date_tz = date.tz
+        pending = self.last_date < date.value
+        if not pending.any():
+            self.logger.info(f"Candle {date} was already evaluated by every variant, skipping.")
+            return
+        gain = values[positions['gain']]
+        bloodbath = values[positions['Bloodbath']]
+        avalanch = values[positions['avalanch']]
+        slope_5 = values[positions['slope_5']]
+
+        # Entries, in the order of the branches of evaluate_entry. The conditions on the row alone
+        # are tested once, so most candles cost a few array operations whatever the variant count.
+        free = pending & ~self.active_trade
+        changed = np.zeros_like(pending)
+        setup = changed
+        if values[positions['candle_figure']] in ENTRY_FIGURE_CODES and bloodbath == 1 and slope_5 < 0:
+            setup = free & (self.scaled_close_10_max > values[positions['Scaled_Close_10']])
+            changed = setup & ~self.waiting_for_confirmation
+            self.waiting_for_confirmation |= setup
+        entered = free & ~setup
+        confirmed = entered & self.waiting_for_confirmation & (self.confirmation_gain < gain)
+        if bloodbath == 0 and values[positions['MACD_Position']] > 0 and avalanch == 0 and slope_5 > 0:
+            entered &= confirmed | (self.volume_momentum_min < values[positions['volume_momentum']])
+        else:
+            entered = confirmed
+        if entered.any():
+            self.waiting_for_confirmation &= ~confirmed
+            changed |= entered
+            for variant in entered.nonzero()[0]:
+                self._enter(variant, view, 'Condition1_atBloodBath' if confirmed[variant] else 'Condition2_atVolumeMomentum')
+
+        # Exits, the entry candle only clears the flag like evaluate_exit
+        holding = pending & self.active_trade & ~self.entry_evaluated_this_session
+        self.entry_evaluated_this_session &= ~pending
+        if holding.any():
+            self.session_gain[holding] += gain
+            if gain != 0:
+                changed |= holding
+            exiting = holding & ((avalanch == 1) | (self.max_loss > values[positions['gain_last_5interval']]))
+            changed |= exiting
+            for variant in exiting.nonzero()[0]:
+                self._exit(variant, date, 'Avalanch' if avalanch == 1 else 'MaxLoss')
+
+        self.last_date[pending] = date.value
+        for variant in changed.nonzero()[0]:
+            self.journals[variant].record('state', self.snapshot(variant))
+
+    def _enter(self, variant: int, view: Feature_View, entry_type: str):
+        values, positions = view.values, self.positions
+        self.active_trade[variant] = True
+        self.session_gain[variant] = 0
+        self.entry_evaluated_this_session[variant] = True
+        record = {'start': view.date}
+        record.update({key: float(values[positions[column]]) for key, column in RECORD_FIELDS.items()})
+        record['entry_type'] = entry_type
+        self.trade_records[variant] = record
+        self.journals[variant].record('entry', dict(record))
+        self.logger.info(f" ===> {self.names[variant]}: Enter Trade with {entry_type}.")
+
+    def _exit(self, variant: int, date: pd.Timestamp, exit_type: str):
+        record = self.trade_records[variant]
+        record['end'] = date
+        record['gain'] = float(self.session_gain[variant])
+        record['exit'] = exit_type
+        self.journals[variant].record('exit', dict(record))
+        self.active_trade[variant] = False
+        self.session_gain[variant] = 0
+        self.trade_records[variant] = {}
+        self.logger.info(f"{self.names[variant]}: Exit Trade ...")
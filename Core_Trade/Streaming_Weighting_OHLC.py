@@ -0,0 +1,225 @@
+import math
+from collections import deque
+import numpy as np
+import pandas as pd
+
+from Core_Trade.RawData_Weighting_OHLC import (classify_candle, minimum_lookback, SCALED_CLOSE_WINDOWS, AVALANCH_WINDOW,
+                                               BLOODBATH_WINDOW, KEPT_LEVEL_WINDOWS, KEPT_WIDTH_WINDOWS)
+from Core_Trade.Rolling_Regression import SLOPE_WINDOWS
+from Helper.Frame_Schema import OHLC_SCHEMA, ohlc_floats
+
+
+def _ratio(numerator, denominator):
+    # Same result as pandas float division: x/0 -> +-inf, 0/0 -> NaN
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return float(np.float64(numerator) / np.float64(denominator))
+
+
+class _EMA:
+    """Exponential moving average equal to pandas ewm(span=..., adjust=False)."""
+    def __init__(self, span: int):
+        self.alpha = 2 / (span + 1)
+        self.value = None
+
+    def update(self, x: float) -> float:
+        if self.value is None or math.isnan(self.value):
+            self.value = x
+        elif not math.isnan(x):
+            self.value = self.alpha * x + (1 - self.alpha) * self.value
+        return self.value
+
+
+class _RollingExtreme:
+    """Rolling max (or min) of the last `window` values using a monotonic deque."""
+    def __init__(self, window: int, is_max: bool):
+        self.window = window
+        self.is_max = is_max
+        self.candidates = deque()  # (index, value), values monotonic from the front
+        self.last_nan = -math.inf
+
+    def push(self, index: int, x: float) -> None:
+        if math.isnan(x):
+            self.last_nan = index
+        else:
+            while self.candidates and (
+                self.candidates[-1][1] <= x if self.is_max else self.candidates[-1][1] >= x
+            ):
+                self.candidates.pop()
+            self.candidates.append((index, x))
+        while self.candidates and self.candidates[0][0] <= index - self.window:
+            self.candidates.popleft()
+
+    def value(self, index: int) -> float:
+        # Extreme over indices (index - window, index]; NaN until the window is full
+        if index + 1 < self.window or self.last_nan > index - self.window or not self.candidates:
+            return math.nan
+        return self.candidates[0][1]
+
+
+class _RollingRegression:
+    """
+    Least-squares slope of the last `window` values against 0..window-1, kept as running
+    sums so each update is O(1). The sums are rebuilt from the buffer once per window of
+    updates to stop floating point drift.
+    """
+    def __init__(self, window: int):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.sum_y = 0.0
+        self.sum_ky = 0.0
+        self.count = 0
+        self.last_nan = -math.inf
+        self.x_mean = (window - 1) / 2
+        self.sxx = window * (window * window - 1) / 12
+
+    def push(self, x: float) -> None:
+        if math.isnan(x):
+            self.last_nan = self.count
+            x = 0.0
+
+        if len(self.values) == self.window:
+            oldest = self.values[0]
+            self.sum_ky = self.sum_ky - (self.sum_y - oldest) + (self.window - 1) * x
+            self.sum_y = self.sum_y - oldest + x
+        else:
+            self.sum_ky += len(self.values) * x
+            self.sum_y += x
+        self.values.append(x)
+        self.count += 1
+
+        if self.count % self.window == 0:
+            buffer = np.fromiter(self.values, dtype=float)
+            self.sum_y = float(buffer.sum())
+            self.sum_ky = float(np.arange(len(buffer)) @ buffer)
+
+    def ready(self) -> bool:
+        return len(self.values) == self.window and self.last_nan < self.count - self.window
+
+    def slope(self) -> float:
+        if not self.ready():
+            return math.nan
+        return (self.sum_ky - self.x_mean * self.sum_y) / self.sxx
+
+    def width(self) -> float:
+        # Max absolute residual of the current fit, O(window)
+        if not self.ready():
+            return math.nan
+        slope = self.slope()
+        intercept = self.sum_y / self.window - slope * self.x_mean
+        buffer = np.fromiter(self.values, dtype=float)
+        return float(np.max(np.abs(buffer - (intercept + slope * np.arange(self.window)))))
+
+
+class Streaming_Weighting_OHLC:
+    """
+    Incremental version of RawData_Weighting_OHLC.generate_clean_data.
+    Keeps the indicator state between candles and emits only the newest clean row, so the
+    cost of a tick does not depend on how much history has already been seen. Frames are cast
+    with the `dtypes` plan they were read with, like in the batch path; update() takes float candles.
+    """
+    def __init__(self, dtypes: dict = OHLC_SCHEMA):
+        self.dtypes = dtypes
+        self.index = -1
+        self.last_date = None
+        self.previous_gain = None
+
+        self.ema_12 = _EMA(12)
+        self.ema_26 = _EMA(26)
+        self.signal = _EMA(9)
+
+        self.max_close = {window: _RollingExtreme(window, is_max=True) for window in SCALED_CLOSE_WINDOWS}
+        self.min_close = {window: _RollingExtreme(window, is_max=False) for window in SCALED_CLOSE_WINDOWS}
+        self.regressions = {window: _RollingRegression(window) for window in SLOPE_WINDOWS}
+
+        self.avalanch_flags = deque(maxlen=AVALANCH_WINDOW)
+        self.bloodbath_flags = deque(maxlen=BLOODBATH_WINDOW)
+
+    def update_frame(self, trade_history: pd.DataFrame) -> dict:
+        """Feed a frame candle by candle (history warm-up or newly stored candles), returning the last row."""
+        if trade_history is None or trade_history.empty:
+            raise ValueError("There is no Data passed, this is an empty dataset")
+        row = None
+        for candle in ohlc_floats(trade_history, self.dtypes).to_dict('records'):
+            row = self.update(candle)
+        return row
+
+    def warm_up(self, trade_history: pd.DataFrame) -> None:
+        """
+        Bring a fresh state to the end of `trade_history` without emitting its rows. Only the last
+        minimum_lookback() candles go through update, the EMAs are seeded from a vectorized
+        pass over every close so MACD_Position matches the batch path afterwards.
+        """
+        if trade_history is None or trade_history.empty:
+            raise ValueError("There is no Data passed, this is an empty dataset")
+        trade_history = ohlc_floats(trade_history, self.dtypes)
+        tail = trade_history.iloc[-minimum_lookback():]
+        self.index = self.index + len(trade_history) - len(tail)
+        for candle in tail.to_dict('records'):
+            self.update(candle)
+
+        close = trade_history['close'].astype(float)
+        ema_12 = close.ewm(span=12, adjust=False).mean()
+        ema_26 = close.ewm(span=26, adjust=False).mean()
+        signal = (ema_12 - ema_26).ewm(span=9, adjust=False).mean()
+        self.ema_12.value, self.ema_26.value, self.signal.value = ema_12.iloc[-1], ema_26.iloc[-1], signal.iloc[-1]
+
+    def update(self, candle: dict) -> dict:
+        """Advance the state by one candle and return its clean row."""
+        self.index += 1
+        self.last_date = candle['date']
+        open_, high, low, close, volume = (
+            float(candle[column]) for column in ('open', 'high', 'low', 'close', 'volume')
+        )
+
+        row = dict(candle)
+
+        # Gains
+        gain = close - open_
+        row['gain'] = gain
+        row['gain_last_5interval'] = gain if self.previous_gain is None else self.previous_gain + gain
+        self.previous_gain = gain
+
+        # MACD
+        macd = self.ema_12.update(close) - self.ema_26.update(close)
+        row['MACD_Position'] = macd - self.signal.update(macd)
+
+        # Key levels over the previous N closes, the current close is pushed afterwards
+        for window in SCALED_CLOSE_WINDOWS:
+            max_close = self.max_close[window].value(self.index - 1)
+            min_close = self.min_close[window].value(self.index - 1)
+            if window in KEPT_LEVEL_WINDOWS:
+                row[f'Max_Close_{window}'] = max_close
+                row[f'Min_Close_{window}'] = min_close
+            row[f'Scaled_Close_{window}'] = _ratio(close - min_close, max_close - min_close)
+        for window in SCALED_CLOSE_WINDOWS:
+            self.max_close[window].push(self.index, close)
+            self.min_close[window].push(self.index, close)
+
+        # Slopes of the candle body middle
+        middle_value = abs(close - open_) / 2 + min(close, open_)
+        for window in SLOPE_WINDOWS:
+            regression = self.regressions[window]
+            regression.push(middle_value)
+            row[f'slope_{window}'] = regression.slope()
+            if window in KEPT_WIDTH_WINDOWS:
+                row[f'Width_slope_{window}'] = regression.width()
+
+        row['candle_figure'] = classify_candle({
+            'open': open_, 'high': high, 'low': low, 'close': close,
+            'Scaled_Close_5': row['Scaled_Close_5'], 'slope_5': row['slope_5'],
+        })
+
+        # Volume momentum on the candle body only
+        candle_range = high - low
+        if candle_range == 0:
+            candle_range = 1e-6
+        raw_momentum = (abs(close - open_) / candle_range) * volume
+        row['volume_momentum'] = -raw_momentum if close < open_ else raw_momentum
+
+        # Rolling flags
+        self.avalanch_flags.append(row['candle_figure'] in ('ShootingStar', 'HangedMan'))
+        row['avalanch'] = int(any(self.avalanch_flags))
+        self.bloodbath_flags.append(row['volume_momentum'] < -30)
+        row['Bloodbath'] = int(any(self.bloodbath_flags))
+
+        return row
@@ -0,0 +1,150 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import numpy as np
+import pandas as pd
+from os import path
+
+# When the journal file is fsynced: after every batch, at most every fsync_interval seconds, or never (OS decides)
+FSYNC_POLICIES = ('batch', 'interval', 'never')
+
+# Fields of the strategy state restored on start-up, trade_record dates are Timestamps again
+STATE_FIELDS = ('active_trade', 'waiting_for_confirmation', 'session_gain', 'trade_record',
+                'entry_evaluated_this_session', 'last_date')
+
+_STOP = object()
+
+
+def _json_default(value):
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _restore_dates(record: dict) -> dict:
+    return {key: pd.Timestamp(value) if key in ('start', 'end', 'last_date') and value is not None else value
+            for key, value in record.items()}
+
+
+class Trade_Journal:
+    """
+    Append-only journal of the live strategy: entries, exits and a state snapshot after every
+    evaluation, one JSON line each in Data/trade_journal.jsonl. Events are queued by record() and
+    written in batches by a background thread, so the decision path never waits on the disk.
+    Closed trades are also appended to Data/trade_records_Result.json as before.
+    recover() replays the journal and returns the last state snapshot, a torn last line is cut off.
+    """
+    def __init__(self, journal_path: str = path.join('Data', 'trade_journal.jsonl'),
+                 records_path: str = path.join('Data', 'trade_records_Result.json'),
+                 batch_size: int = 64, flush_interval: float = 0.5,
+                 fsync: str = 'batch', fsync_interval: float = 5.0):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Invalid fsync policy: {fsync}. Valid policies: {FSYNC_POLICIES}")
+        self.journal_path = journal_path
+        self.records_path = records_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.logger = logging.getLogger('combined_OHLC_trade')
+
+        self.queue = queue.Queue()
+        self.sequence = 0
+        self.written = 0
+        self._last_fsync = time.monotonic()
+        self._thread = None
+
+    def recover(self):
+        """Return the last state snapshot of the journal (None without one) and continue its numbering."""
+        if not path.exists(self.journal_path):
+            return None
+        state = None
+        with open(self.journal_path, 'rb+') as f:
+            for number, line in enumerate(iter(f.readline, b''), 1):
+                if not line.endswith(b'\n'):
+                    # Torn by a crash mid-write, cut so the next batch starts on a line of its own
+                    self.logger.warning(f"Truncating the torn last line {number} of {self.journal_path}.")
+                    f.truncate(f.tell() - len(line))
+                    break
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    self.logger.warning(f"Ignoring unreadable line {number} of {self.journal_path}.")
+                    continue
+                self.sequence = max(self.sequence, event.get('seq', 0))
+                if event.get('event') == 'state':
+                    state = event['data']
+        if state is None:
+            return None
+        state = _restore_dates(state)
+        state['trade_record'] = _restore_dates(state.get('trade_record') or {})
+        self.logger.info(f"Recovered strategy state from {self.journal_path}: active_trade={state.get('active_trade')}.")
+        return state
+
+    def start(self):
+        if self._thread is None:
+            directory = path.dirname(self.journal_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._thread = threading.Thread(target=self._run, name='trade-journal', daemon=True)
+            self._thread.start()
+        return self
+
+    def record(self, event: str, data: dict):
+        # Serialised here so later changes of `data` by the strategy cannot leak into the journal
+        self.sequence += 1
+        data_json = json.dumps(data, default=_json_default)
+        line = f'{{"seq": {self.sequence}, "time": {time.time()!r}, "event": {json.dumps(event)}, "data": {data_json}}}'
+        self.queue.put((line, data_json if event == 'exit' else None))
+        if self._thread is None:
+            self.start()
+
+    def close(self, timeout: float = None):
+        """Write what is still queued and stop the writer thread."""
+        if self._thread is not None:
+            self.queue.put(_STOP)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            try:
+                batch = [self.queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if _STOP in batch:
+                stopping = True
+                batch = [item for item in batch if item is not _STOP]
+            while batch:
+                try:
+                    self._write(batch)
+                    batch = []
+                except OSError as e:
+                    self.logger.error(f"Failed to write {len(batch)} journal events, retrying: {e}")
+                    time.sleep(self.flush_interval)
+
+    def _write(self, batch):
+        with open(self.journal_path, 'a') as f:
+            f.write(''.join(line + '\n' for line, _ in batch))
+            f.flush()
+            now = time.monotonic()
+            if self.fsync == 'batch' or (self.fsync == 'interval' and now - self._last_fsync >= self.fsync_interval):
+                os.fsync(f.fileno())
+                self._last_fsync = now
+
+        exits = [record_line for _, record_line in batch if record_line is not None]
+        if exits:
+            with open(self.records_path, 'a') as f:
+                f.write(''.join(line + '\n' for line in exits))
+        self.written += len(batch)
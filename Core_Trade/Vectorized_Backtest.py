@@ -0,0 +1,283 @@
+import json
+import logging
+import numpy as np
+import pandas as pd
+from os import path
+from pydantic import BaseModel
+
+from Core_Trade.Trade_Journal import Trade_Journal, STATE_FIELDS
+
+ENTRY_FIGURES = ('Hammer', 'InvertedHammer')
+RECORD_FIELDS = {
+    'entrance_gain': 'gain',
+    'volume_momentum': 'volume_momentum',
+    'Entrance_MDAC': 'MACD_Position',
+    'slope_5': 'slope_5',
+    'Scaled_Close_10': 'Scaled_Close_10',
+    'close': 'close',
+}
+# Numeric columns of the generate_clean_data frame the strategy reads
+SIGNAL_COLUMNS = ('gain', 'gain_last_5interval', 'volume_momentum', 'MACD_Position', 'slope_5',
+                  'Scaled_Close_10', 'close', 'Bloodbath', 'avalanch')
+
+
+class StrategyThresholds(BaseModel):
+    """Tunable thresholds of RealTimeTradeStrategy, the defaults are the live values."""
+    scaled_close_10_max: float = 0.2      # Condition 1 setup: Scaled_Close_10 below this
+    confirmation_gain: float = 230        # Condition 1 confirmation: gain above this
+    volume_momentum_min: float = 300      # Condition 2: volume_momentum above this
+    max_loss: float = -50                 # exit when gain_last_5interval drops below this
+
+
+def _next_true(mask: np.ndarray) -> np.ndarray:
+    """nxt[i] is the first index j >= i where mask is True, len(mask) when there is none; nxt has len(mask)+1 entries."""
+    n = len(mask)
+    index = np.where(mask, np.arange(n), n)
+    return np.append(np.minimum.accumulate(index[::-1])[::-1], n)
+
+
+class Vectorized_Backtest:
+    """
+    Replays RealTimeTradeStrategy over a whole generate_clean_data frame at once.
+    Entry, confirmation and exit conditions are evaluated as boolean arrays and turned into
+    "next row where ..." lookups, so the two-step confirmation state machine is resolved in one
+    pass that jumps from trade to trade instead of visiting every row. Trades still open at the
+    end of the data are kept in `open_trade`, like the live class never writes them.
+    """
+    def __init__(self, clean_data: pd.DataFrame, thresholds: StrategyThresholds = None):
+        if clean_data is None or clean_data.empty:
+            raise ValueError("There is no Data passed, this is an empty dataset")
+        self.thresholds = thresholds if thresholds is not None else StrategyThresholds()
+        self.dates = clean_data['date'].reset_index(drop=True)
+        self.columns = {
+            name: clean_data[name].to_numpy(dtype=float, na_value=np.nan) for name in SIGNAL_COLUMNS
+        }
+        self.entry_figure = clean_data['candle_figure'].isin(ENTRY_FIGURES).to_numpy()
+        self.open_trade = None
+
+    @classmethod
+    def from_arrays(cls, dates: pd.Series, columns: dict, entry_figure: np.ndarray,
+                    thresholds: StrategyThresholds = None) -> 'Vectorized_Backtest':
+        """Build a backtest over arrays already extracted from a frame (e.g. views on shared memory)."""
+        backtest = cls.__new__(cls)
+        backtest.thresholds = thresholds if thresholds is not None else StrategyThresholds()
+        backtest.dates = dates
+        backtest.columns = columns
+        backtest.entry_figure = entry_figure
+        backtest.open_trade = None
+        return backtest
+
+    def _signals(self, thresholds: StrategyThresholds) -> dict:
+        c = self.columns
+        setup = (self.entry_figure & (c['Bloodbath'] == 1) & (c['Scaled_Close_10'] < thresholds.scaled_close_10_max)
+                 & (c['slope_5'] < 0))
+        confirmation = c['gain'] > thresholds.confirmation_gain
+        momentum = ((c['volume_momentum'] > thresholds.volume_momentum_min) & (c['Bloodbath'] == 0)
+                    & (c['MACD_Position'] > 0) & (c['avalanch'] == 0) & (c['slope_5'] > 0))
+        exit_trigger = (c['avalanch'] == 1) | (c['gain_last_5interval'] < thresholds.max_loss)
+
+        # A setup row never enters: evaluate_entry checks the setup branch before the entry branches
+        return {
+            'confirmation': confirmation,
+            'next_setup': _next_true(setup),
+            'next_confirmed_or_momentum': _next_true(~setup & (confirmation | momentum)),
+            'next_momentum': _next_true(~setup & momentum),
+            'next_exit': _next_true(exit_trigger),
+        }
+
+    def _records(self, entries: list, exits: list, entry_types: list) -> list:
+        starts = self.dates.iloc[entries].tolist()
+        ends = self.dates.iloc[[exit_ for exit_ in exits if exit_ is not None]].tolist()
+        fields = {key: self.columns[column][entries].tolist() for key, column in RECORD_FIELDS.items()}
+        gains = self.columns['gain'].tolist()
+        records = []
+        for i, (entry, exit_, entry_type) in enumerate(zip(entries, exits, entry_types)):
+            record = {'start': starts[i]}
+            record.update({key: values[i] for key, values in fields.items()})
+            record['entry_type'] = entry_type
+            if exit_ is not None:
+                # Summed in row order from 0, the same float result as the live session_gain +=
+                session_gain = 0
+                for gain in gains[entry + 1:exit_ + 1]:
+                    session_gain += gain
+                record['end'] = ends[i]
+                record['gain'] = session_gain
+                record['exit'] = 'Avalanch' if self.columns['avalanch'][exit_] == 1 else 'MaxLoss'
+            records.append(record)
+        return records
+
+    def run(self, thresholds: StrategyThresholds = None) -> list:
+        """Return the closed trade records, in the format RealTimeTradeStrategy writes them (dates as Timestamps)."""
+        thresholds = thresholds if thresholds is not None else self.thresholds
+        signals = {name: values.tolist() for name, values in self._signals(thresholds).items()}
+        confirmation = signals['confirmation']
+        next_setup = signals['next_setup']
+        next_confirmed_or_momentum = signals['next_confirmed_or_momentum']
+        next_momentum = signals['next_momentum']
+        next_exit = signals['next_exit']
+        n = len(self.dates)
+
+        entries, exits, entry_types = [], [], []
+        row, waiting = 0, False
+        while row < n:
+            # Next entry: a confirmation when a setup is pending, otherwise Condition 2 until a setup shows up
+            if waiting:
+                entry, waiting_at_entry = next_confirmed_or_momentum[row], True
+            else:
+                setup = next_setup[row]
+                entry, waiting_at_entry = next_momentum[row], False
+                if setup < entry:
+                    entry, waiting_at_entry = next_confirmed_or_momentum[setup + 1], True
+            if entry >= n:
+                break
+
+            if waiting_at_entry and confirmation[entry]:
+                entry_type, waiting = 'Condition1_atBloodBath', False
+            else:
+                # Condition 2 leaves a pending setup untouched, as in the live class
+                entry_type, waiting = 'Condition2_atVolumeMomentum', waiting_at_entry
+
+            # The entry row skips exit evaluation, so the exit is looked up from the next row
+            exit_ = next_exit[entry + 1]
+            entries.append(entry)
+            entry_types.append(entry_type)
+            if exit_ >= n:
+                exits.append(None)
+                break
+            exits.append(exit_)
+            row = exit_ + 1
+
+        records = self._records(entries, exits, entry_types)
+        self.open_trade = records.pop() if records and exits[-1] is None else None
+        return records
+
+    def run_frame(self, thresholds: StrategyThresholds = None) -> pd.DataFrame:
+        return pd.DataFrame(self.run(thresholds))
+
+
+class RealTimeTradeStrategy:
+    """
+    The live rules one candle at a time, as main.py evaluated them before Strategy_Registry. Kept
+    as the scalar reference that Vectorized_Backtest and Threshold_Strategies are checked against.
+    """
+    def __init__(self, thresholds: StrategyThresholds = None, journal: Trade_Journal = None):
+        self.logger = logging.getLogger('combined_OHLC_trade')
+        self.thresholds = thresholds if thresholds is not None else StrategyThresholds()
+        self.journal = journal
+        self.active_trade = False
+        self.waiting_for_confirmation = False
+        self.session_gain = 0
+        self.trade_record = {}
+        self.entry_evaluated_this_session = False
+        self.last_date = None
+
+    def snapshot(self) -> dict:
+        return {field: getattr(self, field) for field in STATE_FIELDS}
+
+    def restore(self, state: dict):
+        # State recovered from the journal after a restart, an open position carries on
+        for field in STATE_FIELDS:
+            if field in state:
+                setattr(self, field, state[field])
+
+    def record_state(self, row):
+        # Called once the candle went through evaluate_entry and evaluate_exit
+        self.last_date = row.get('date')
+        if self.journal is not None:
+            self.journal.record('state', self.snapshot())
+
+
+    def evaluate_entry(self, row):
+        if (
+            row.get('candle_figure') in ['Hammer', 'InvertedHammer'] and
+            row.get('Bloodbath') == 1 and
+            row.get('Scaled_Close_10') < self.thresholds.scaled_close_10_max and 
+            row.get('slope_5') < 0 and
+            not self.active_trade
+        ):
+            self.waiting_for_confirmation = True
+
+        elif (
+            self.waiting_for_confirmation and
+            row.get('gain') > self.thresholds.confirmation_gain and
+            not self.active_trade
+        ):
+            self.active_trade = True
+            self.session_gain = 0
+            self.waiting_for_confirmation = False
+            self.trade_record = {
+                'start': row.get('date'),
+                'entrance_gain':row.get('gain'),
+                'volume_momentum': row.get('volume_momentum'),
+                'Entrance_MDAC': row.get('MACD_Position'),
+                'slope_5': row.get('slope_5'),
+                'Scaled_Close_10': row.get('Scaled_Close_10'),
+                'close': row.get('close'),
+                'entry_type': 'Condition1_atBloodBath'
+            }
+            self.entry_evaluated_this_session = True
+            self.record_entry()
+            self.logger.info(' ===> Enter Trade witth Condition1_atBloodBath.')
+        #Condition 2
+        elif (
+            self.thresholds.volume_momentum_min < row.get('volume_momentum') and
+            row.get('Bloodbath') == 0 and
+            row.get('MACD_Position') > 0 and 
+            row.get('avalanch') == 0 and 
+            row.get('slope_5') > 0 and
+            not self.active_trade
+        ):
+            self.active_trade = True
+            self.session_gain = 0
+            self.trade_record = {
+                'start': row.get('date'),
+                'entrance_gain':row.get('gain'),
+                'volume_momentum': row.get('volume_momentum'),
+                'Entrance_MDAC': row.get('MACD_Position'),
+                'slope_5': row.get('slope_5'),
+                'Scaled_Close_10': row.get('Scaled_Close_10'),
+                'close': row.get('close'),
+                'entry_type': 'Condition2_atVolumeMomentum'
+            }
+            self.entry_evaluated_this_session = True
+            self.record_entry()
+            self.logger.info(' ===> Enter Trade witth Condition2_atVolumeMomentum.')
+
+    def evaluate_exit(self, row):
+        if self.entry_evaluated_this_session:
+            self.logger.info("No entry evaluated this session, skipping exit evaluation.")
+            self.entry_evaluated_this_session = False
+            return
+        raw_exit_trigger = row.get('avalanch') == 1 or row.get('gain_last_5interval') < self.thresholds.max_loss
+
+        if self.active_trade and raw_exit_trigger:
+            self.session_gain += row.get('gain')
+            self.trade_record['end'] = row.get('date')
+            self.trade_record['gain'] = self.session_gain
+            self.trade_record['exit'] = 'Avalanch' if row.get('avalanch') == 1 else 'MaxLoss'
+
+            # Save trade record
+            self.write_trade_to_file(self.trade_record)
+
+            # Reset state
+            self.active_trade = False
+            self.session_gain = 0
+            self.trade_record = {}
+            self.logger.info('Exit Trade ...')
+
+        elif self.active_trade:
+            self.session_gain += row.get('gain')
+
+    def record_entry(self):
+        if self.journal is not None:
+            self.journal.record('entry', dict(self.trade_record))
+
+    def write_trade_to_file(self, trade):
+        # Through the journal the record is written by its background thread, the loop does not wait
+        if self.journal is not None:
+            self.journal.record('exit', dict(trade))
+            return
+        trade['start']=trade['start'].isoformat()
+        trade['end']=trade['end'].isoformat()
+        with open(path.join('Data','trade_records_Result.json'), 'a') as f:
+            f.write(json.dumps(trade) + '\n')
@@ -17,4 +17,11 @@ class AWSConfig(BaseModel):
     #VPC Name
     vpc_name:str
     #RSA Key
-    rsa_key_name:str
\ No newline at end of file
+    rsa_key_name:str
+
+class DBPoolConfig(BaseModel):
+    # SQLAlchemy connection pool settings, shared by every helper of the process
+    pool_size: int = 5
+    max_overflow: int = 5
+    pool_pre_ping: bool = True
+    pool_recycle: int = 1800
@@ -0,0 +1,125 @@
+import io
+import logging
+import numpy as np
+import pandas as pd
+import psycopg2
+from sqlalchemy.exc import DBAPIError
+
+# Rows serialised per COPY call, bounds the size of the in-memory CSV buffer
+COPY_CHUNK_ROWS = 100_000
+
+
+def _csv_column(series: pd.Series) -> np.ndarray:
+    """Format one column as COPY csv text: NULL is an unquoted empty field."""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        if series.dt.tz is not None:
+            values = series.dt.tz_convert('UTC').dt.tz_localize(None).to_numpy(dtype='datetime64[us]')
+            text = np.datetime_as_string(values, unit='us', timezone='UTC').astype(object)
+        else:
+            # Naive timestamps are left to the session time zone, the same as DataFrame.to_sql
+            text = np.datetime_as_string(series.to_numpy(dtype='datetime64[us]'), unit='us').astype(object)
+    elif pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+        # str() of a float is its shortest round-trip repr, so NUMERIC columns get the exact value
+        text = series.to_numpy().astype(str).astype(object)
+    else:
+        text = np.array(['"' + str(value).replace('"', '""') + '"' for value in series], dtype=object)
+    text[series.isna().to_numpy()] = ''
+    return text
+
+
+def _csv_buffer(df: pd.DataFrame) -> io.StringIO:
+    columns = [_csv_column(df[name]) for name in df.columns]
+    buffer = io.StringIO()
+    buffer.write('\n'.join(map(','.join, zip(*columns))))
+    buffer.write('\n')
+    buffer.seek(0)
+    return buffer
+
+
+class BulkWriter:
+    """
+    Streams DataFrames into PostgreSQL with COPY FROM STDIN instead of row-by-row INSERTs.
+    With on_conflict_do_nothing the rows go through a temporary staging table first and are
+    moved with INSERT ... ON CONFLICT DO NOTHING, so duplicates are skipped rather than failing the batch.
+    upsert() goes through the same staging table with INSERT ... ON CONFLICT DO UPDATE instead.
+    Errors are re-raised as SQLAlchemy exceptions (IntegrityError, ...) like DataFrame.to_sql does.
+    """
+    def __init__(self, engine, schema: str = 'trade'):
+        self.engine = engine
+        self.schema = schema
+        self.logger = logging.getLogger('combined_OHLC_trade')
+
+    def _copy_frame(self, cursor, df: pd.DataFrame, target: str, columns: str) -> None:
+        copy_sql = f"COPY {target} ({columns}) FROM STDIN WITH (FORMAT csv)"
+        for start in range(0, len(df), COPY_CHUNK_ROWS):
+            cursor.copy_expert(copy_sql, _csv_buffer(df.iloc[start:start + COPY_CHUNK_ROWS]))
+
+    def write(self, df: pd.DataFrame, table_name: str, on_conflict_do_nothing: bool = False) -> int:
+        """Write `df` into schema.table_name in a single transaction, returning the rows inserted."""
+        if df is None or df.empty:
+            return 0
+
+        target = f"{self.schema}.{table_name}"
+        columns = ', '.join(f'"{column}"' for column in df.columns)
+        connection = self.engine.raw_connection()
+        try:
+            with connection.cursor() as cursor:
+                if on_conflict_do_nothing:
+                    staging = f"staging_{table_name}"
+                    cursor.execute(
+                        f"CREATE TEMP TABLE {staging} (LIKE {target} INCLUDING DEFAULTS) ON COMMIT DROP"
+                    )
+                    self._copy_frame(cursor, df, staging, columns)
+                    cursor.execute(
+                        f"INSERT INTO {target} ({columns}) SELECT {columns} FROM {staging} ON CONFLICT DO NOTHING"
+                    )
+                    inserted = cursor.rowcount
+                else:
+                    self._copy_frame(cursor, df, target, columns)
+                    inserted = len(df)
+            connection.commit()
+        except psycopg2.Error as e:
+            connection.rollback()
+            raise DBAPIError.instance(f"COPY {target}", None, e, psycopg2.Error) from e
+        finally:
+            connection.close()
+
+        self.logger.info(f"Bulk wrote {inserted} of {len(df)} rows into {target}.")
+        return inserted
+
+    def upsert(self, df: pd.DataFrame, table_name: str, conflict_column: str = 'date', update_where: str = None) -> int:
+        """
+        Write `df` into schema.table_name in a single transaction, updating the rows whose
+        conflict_column already exists. `update_where` is an SQL condition on the stored row
+        (`stored.<column>`) and the incoming one (`EXCLUDED.<column>`), rows failing it are left as they are.
+        Returns the rows inserted or updated.
+        """
+        if df is None or df.empty:
+            return 0
+
+        # A batch may repeat a key, the last row wins (ON CONFLICT cannot touch a row twice)
+        df = df.drop_duplicates(subset=conflict_column, keep='last')
+        target = f"{self.schema}.{table_name}"
+        columns = ', '.join(f'"{column}"' for column in df.columns)
+        updates = ', '.join(f'"{column}" = EXCLUDED."{column}"' for column in df.columns if column != conflict_column)
+        where = f" WHERE {update_where}" if update_where else ''
+        connection = self.engine.raw_connection()
+        try:
+            with connection.cursor() as cursor:
+                staging = f"staging_{table_name}"
+                cursor.execute(f"CREATE TEMP TABLE {staging} (LIKE {target} INCLUDING DEFAULTS) ON COMMIT DROP")
+                self._copy_frame(cursor, df, staging, columns)
+                cursor.execute(
+                    f"INSERT INTO {target} AS stored ({columns}) SELECT {columns} FROM {staging} "
+                    f'ON CONFLICT ("{conflict_column}") DO UPDATE SET {updates}{where}'
+                )
+                written = cursor.rowcount
+            connection.commit()
+        except psycopg2.Error as e:
+            connection.rollback()
+            raise DBAPIError.instance(f"UPSERT {target}", None, e, psycopg2.Error) from e
+        finally:
+            connection.close()
+
+        self.logger.info(f"Bulk upserted {written} of {len(df)} rows into {target}.")
+        return written
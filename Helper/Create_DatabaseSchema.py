@@ -1,6 +1,8 @@
+import pandas as pd
 from sqlalchemy import text
 from datetime import datetime, timedelta, timezone
-from Helper.Database_Engine import DatabaseEngine
+from Helper.Database_Engine import get_postgres_engine
+from Helper.Metadata_Cache import get_metadata_cache
 import logging
 
 class CreateDatabaseSchema:
@@ -12,21 +14,27 @@ class CreateDatabaseSchema:
         self.schema = schema
         self.logger = logging.getLogger('combined_OHLC_trade')
 
-        # Create engine to connect to AWS-hosted PostgreSQL DB
-        db_engine = DatabaseEngine()
-        self.engine = db_engine.create_postgres_engine()
+        # Shared pooled engine to the AWS-hosted PostgreSQL DB
+        self.engine = get_postgres_engine()
+        # Known tables and partitions, so DDL that is already done costs no round-trip
+        self.metadata = get_metadata_cache(self.engine, schema)
 
     def _create_schema_if_not_exists(self):
+        if self.metadata.has_schema():
+            return
         with self.engine.connect() as conn:
             self.logger.info(f"Creating schema '{self.schema}' if it doesn't exist...")
             conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {self.schema}"))
             conn.commit()
+        self.metadata.add_schema()
 
     def create_tables_ohlc(self, table_name: str):
         if not table_name:
             raise ValueError("Must provide a table name to create tables")
 
         self.table_name = table_name
+        if self.metadata.has_table(table_name):
+            return
         self._create_schema_if_not_exists()
 
         base_table = f"{self.schema}.{self.table_name}"
@@ -55,10 +63,42 @@ class CreateDatabaseSchema:
                 conn.execute(text(create_index_sql))
                 conn.commit()
                 self.logger.info(f"Table '{base_table}' and index '{index_name}' created successfully.")
+            self.metadata.add_table(table_name)
         except Exception as e:
+            self.metadata.invalidate()
             self.logger.error(f"Failed to create table or index: {e}", exc_info=True)
             raise
 
+    def create_table_orderbook_rollup(self, table_name: str):
+        # 5-second Buy/Sell sums of an order book table, refreshed incrementally by RawData_Weighting_OB
+        if not table_name:
+            raise ValueError("Must provide a table name to create tables")
+
+        self.table_name = table_name
+        if self.metadata.has_table(table_name):
+            return
+        self._create_schema_if_not_exists()
+
+        rollup_table = f"{self.schema}.{self.table_name}"
+        rollup_sql = f"""
+        CREATE TABLE IF NOT EXISTS {rollup_table} (
+            date TIMESTAMPTZ PRIMARY KEY,
+            "Buy" NUMERIC NOT NULL,
+            "Sell" NUMERIC NOT NULL
+        );
+        """
+
+        try:
+            with self.engine.connect() as conn:
+                self.logger.info(f"Creating rollup table '{rollup_table}'...")
+                conn.execute(text(rollup_sql))
+                conn.commit()
+            self.metadata.add_table(table_name)
+        except Exception as e:
+            self.metadata.invalidate()
+            self.logger.error(f"Failed to create rollup table: {e}", exc_info=True)
+            raise
+
     def create_partition(self, table_name: str, offset: int = 1):
         # This method creates partitions for the given offset (0 = today, 1 = tomorrow, etc.)
         if not table_name:
@@ -69,6 +109,8 @@ class CreateDatabaseSchema:
         partition_date = (datetime.now(timezone.utc) + timedelta(days=offset)).replace(hour=0, minute=0, second=0, microsecond=0)
         next_day = partition_date + timedelta(days=1)
         date_str = partition_date.strftime('%Y%m%d')
+        if self.metadata.covers(self.table_name, [pd.Timestamp(partition_date)]):
+            return
 
         create_statement = f"""
         CREATE TABLE IF NOT EXISTS {self.schema}.{self.table_name}_p_{date_str}
@@ -76,10 +118,16 @@ class CreateDatabaseSchema:
         FOR VALUES FROM ('{partition_date}') TO ('{next_day}');
         """
 
-        with self.engine.connect() as conn:
-            self.logger.info(f"Creating partition for {partition_date.date()}...")
-            conn.execute(text(create_statement))
-            conn.commit()
+        try:
+            with self.engine.connect() as conn:
+                self.logger.info(f"Creating partition for {partition_date.date()}...")
+                conn.execute(text(create_statement))
+                conn.commit()
+        except Exception:
+            self.metadata.invalidate()
+            raise
+        self.metadata.add_partition(self.table_name, f"{self.table_name}_p_{date_str}",
+                                    pd.Timestamp(partition_date), pd.Timestamp(next_day))
 
 if __name__ == '__main__':
     db_handler = CreateDatabaseSchema('trade')  # Avoid using invalid schema names like 'BTC/USDT'
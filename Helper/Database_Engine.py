@@ -3,8 +3,15 @@ from os import path, getenv
 from sqlalchemy import create_engine, text
 from sqlalchemy.exc import SQLAlchemyError
 import logging
-from Helper.AWS_And_DB_Config_Schema import AWSConfig
-from Infrastructure.Get_AWS_Data import Get_AWS_Data
+import threading
+from functools import cached_property
+from Helper.AWS_And_DB_Config_Schema import AWSConfig, DBPoolConfig
+
+# One engine (and so one connection pool) per DSN for the whole process
+_ENGINES_BY_DSN = {}
+# Shortcut from (config_path, db_endpoint) to the engine, so later callers skip the config parsing
+_ENGINES_BY_SOURCE = {}
+_REGISTRY_LOCK = threading.RLock()
 
 
 class DatabaseEngine:
@@ -26,6 +33,9 @@ class DatabaseEngine:
                 raise KeyError("Missing 'AWS_General' section in config.ini.")
 
             self.db_config = AWSConfig(**dict(config['AWS_General']))
+            # Pool section is optional, the defaults of DBPoolConfig apply when it is missing
+            pool_section = dict(config['Database_Pool']) if 'Database_Pool' in config else {}
+            self.pool_config = DBPoolConfig(**pool_section)
             self.logger.info("Database configuration loaded successfully.")
         except Exception as e:
             self.logger.error(f"Failed to load database configuration: {e}")
@@ -37,8 +47,11 @@ class DatabaseEngine:
             self.logger.error('Database endpoint is not defined. Please set the environment variable "db_endpoint".')
             raise ValueError('Database endpoint is not defined. Please set the environment variable "db_endpoint".')
 
-        # Initialize AWS data handler
-        self.get_aws_configuration = Get_AWS_Data(self.db_config.region_name)
+    @cached_property
+    def get_aws_configuration(self):
+        # AWS data handler, only imported (with boto3) when something actually asks for it
+        from Infrastructure.Get_AWS_Data import Get_AWS_Data
+        return Get_AWS_Data(self.db_config.region_name)
 
     def _check_db_connection(self, engine):
         """Test connection to the database."""
@@ -51,21 +64,49 @@ class DatabaseEngine:
             self.logger.error(f"Database connection failed: {e}")
             return False
 
+    def _dsn(self) -> str:
+        return (
+            f'postgresql+psycopg2://{self.db_config.masterusername}:'
+            f'{self.db_config.masteruserpassword}@{self.db_endpoint}:'
+            f'{self.db_config.db_port}/{self.db_config.dbname}'
+        )
+
     def create_postgres_engine(self):
-        """Create and return a SQLAlchemy engine for the configured PostgreSQL database."""
-        try:
-            engine = create_engine(
-                f'postgresql+psycopg2://{self.db_config.masterusername}:'
-                f'{self.db_config.masteruserpassword}@{self.db_endpoint}:'
-                f'{self.db_config.db_port}/{self.db_config.dbname}'
-            )
-            self.logger.info("SQLAlchemy engine created successfully.")
-            if self._check_db_connection(engine):
+        """Return the process-wide SQLAlchemy engine for the configured PostgreSQL database, creating it once."""
+        dsn = self._dsn()
+        with _REGISTRY_LOCK:
+            engine = _ENGINES_BY_DSN.get(dsn)
+            if engine is not None:
                 return engine
-        except SQLAlchemyError as e:
-            self.logger.error(f"Failed to create SQLAlchemy engine: {e}")
-            raise e
+
+            try:
+                engine = create_engine(
+                    dsn,
+                    pool_size=self.pool_config.pool_size,
+                    max_overflow=self.pool_config.max_overflow,
+                    pool_pre_ping=self.pool_config.pool_pre_ping,
+                    pool_recycle=self.pool_config.pool_recycle,
+                )
+                self.logger.info("SQLAlchemy engine created successfully.")
+                if self._check_db_connection(engine):
+                    _ENGINES_BY_DSN[dsn] = engine
+                    return engine
+            except SQLAlchemyError as e:
+                self.logger.error(f"Failed to create SQLAlchemy engine: {e}")
+                raise e
         self.logger.error(f'The provided bd_endpoint is not correct, check the RDS endpoint string on AWS, the one provided : {self.db_endpoint}')
         raise ValueError(f'The provided bd_endpoint is not correct, check the RDS endpoint string on AWS, the one provided : {self.db_endpoint}')
 
-        
+
+def get_postgres_engine(config_path='Config/config.ini'):
+    """
+    Shared engine for helpers: only the first call per config file and db_endpoint reads the
+    config and tests the connection, the following ones get the same pooled engine back.
+    """
+    source = (config_path, getenv('db_endpoint'))
+    with _REGISTRY_LOCK:
+        engine = _ENGINES_BY_SOURCE.get(source)
+        if engine is None:
+            engine = DatabaseEngine(config_path).create_postgres_engine()
+            _ENGINES_BY_SOURCE[source] = engine
+        return engine
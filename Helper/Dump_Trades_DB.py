@@ -1,62 +1,215 @@
 # to Fetch dataset
+import io
+import glob
+import logging
 import pandas as pd
-from os import path
-from Helper.Database_Engine import DatabaseEngine
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+from os import makedirs, path
+from sqlalchemy import text
+from Helper.Database_Engine import get_postgres_engine
+from Helper.Bulk_Writer import BulkWriter, COPY_CHUNK_ROWS
+from Helper.Create_DatabaseSchema import CreateDatabaseSchema
 import re
 
+# Dumped tables, suffix of trade.trade_<symbol>_<suffix> and name of their dump directory
+DUMP_TABLES = {'ohlc': 'OHLC', 'orderbook': 'Orderbook'}
+
+# Bytes of COPY output converted per Arrow batch, each batch becomes one Parquet row group
+DUMP_BLOCK_BYTES = 16 * 1024 ** 2
+
+_ARROW_TYPES = {
+    'timestamp without time zone': pa.timestamp('us'),
+    'timestamp with time zone': pa.timestamp('us', tz='UTC'),
+    'date': pa.date32(),
+    'smallint': pa.int16(),
+    'integer': pa.int32(),
+    'bigint': pa.int64(),
+    'real': pa.float32(),
+    'double precision': pa.float64(),
+    'boolean': pa.bool_(),
+}
+
+
+def _date_mask(dates: pa.ChunkedArray, start, end) -> pa.ChunkedArray:
+    # Naive bounds are UTC, tz-aware columns are compared on their UTC wall time
+    dates = dates.cast(pa.timestamp('us'))
+    conditions = []
+    if start is not None:
+        conditions.append(pc.greater_equal(dates, pa.scalar(start.to_pydatetime(), pa.timestamp('us'))))
+    if end is not None:
+        conditions.append(pc.less(dates, pa.scalar(end.to_pydatetime(), pa.timestamp('us'))))
+    return conditions[0] if len(conditions) == 1 else pc.and_(*conditions)
+
+
 class Dump_Trades_DB:
-    def __init__(self, symbol=None):
+    """
+    Dumps the OHLC and order book tables of a symbol to Parquet, one zstd-compressed file per
+    partition day (Data/Dump_<symbol>_<table>/<YYYYMMDD>.parquet), and restores them, optionally
+    for a date range only. Both directions stream: a day is exported with COPY and converted in
+    row-group sized batches, and restores write batch by batch through BulkWriter.
+    NUMERIC columns are kept exact as decimal128 with the largest scale found in the table.
+    """
+    def __init__(self, symbol=None, dump_dir: str = 'Data'):
         if symbol is None:
             raise ValueError("the symbol must be provided like 'BTC/USDT'.")
         self.table_name = re.sub(r'[^A-Za-z0-9]', '', symbol).lower()
+        self.dump_dir = dump_dir
+        self.logger = logging.getLogger('combined_OHLC_trade')
+
+        # Shared pooled engine to the AWS-hosted PostgreSQL DB
+        self.engine = get_postgres_engine()
+
+    def _directory(self, suffix: str) -> str:
+        return path.join(self.dump_dir, f'Dump_{self.table_name}_{DUMP_TABLES[suffix]}')
+
+    def _arrow_schema(self, table: str) -> pa.Schema:
+        with self.engine.connect() as conn:
+            columns = conn.execute(text("""
+                SELECT column_name, data_type FROM information_schema.columns
+                WHERE table_schema = 'trade' AND table_name = :table
+                ORDER BY ordinal_position
+            """), {'table': table}).fetchall()
+            if not columns:
+                raise ValueError(f"Table trade.{table} does not exist.")
+
+            numeric = [name for name, data_type in columns if data_type == 'numeric']
+            scales = {}
+            if numeric:
+                # One pass to find the decimal places actually stored, so decimal128 loses nothing
+                row = conn.execute(text(
+                    "SELECT " + ', '.join(f'max(scale("{name}"))' for name in numeric) + f" FROM trade.{table}"
+                )).fetchone()
+                scales = {name: scale or 0 for name, scale in zip(numeric, row)}
+
+        fields = []
+        for name, data_type in columns:
+            if data_type == 'numeric':
+                fields.append(pa.field(name, pa.decimal128(38, scales[name])))
+            else:
+                fields.append(pa.field(name, _ARROW_TYPES.get(data_type, pa.string())))
+        return pa.schema(fields)
+
+    def _dump_table(self, suffix: str) -> int:
+        table = f'trade_{self.table_name}_{suffix}'
+        schema = self._arrow_schema(table)
+        directory = self._directory(suffix)
+        makedirs(directory, exist_ok=True)
+
+        with self.engine.connect() as conn:
+            first, last = conn.execute(text(f"SELECT min(date), max(date) FROM trade.{table}")).fetchone()
+        if first is None:
+            self.logger.info(f"trade.{table} is empty, nothing to dump.")
+            return 0
+
+        read_options = pa_csv.ReadOptions(column_names=schema.names, block_size=DUMP_BLOCK_BYTES)
+        # COPY writes NULL as an empty unquoted field and an empty string as ""
+        convert_options = pa_csv.ConvertOptions(column_types=schema, strings_can_be_null=True,
+                                                quoted_strings_can_be_null=False)
+        rows = 0
+        connection = self.engine.raw_connection()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SET TIME ZONE 'UTC'")
+                for day in pd.date_range(pd.Timestamp(first).normalize(), pd.Timestamp(last).normalize(), freq='D'):
+                    buffer = io.BytesIO()
+                    cursor.copy_expert(
+                        f"COPY (SELECT * FROM trade.{table} WHERE date >= '{day.isoformat()}' "
+                        f"AND date < '{(day + pd.Timedelta(days=1)).isoformat()}' ORDER BY date) "
+                        f"TO STDOUT WITH (FORMAT csv)", buffer)
+                    if buffer.tell() == 0:
+                        continue
+                    buffer.seek(0)
 
-        # Create engine to connect to AWS-hosted PostgreSQL DB
-        db_engine = DatabaseEngine()
-        self.engine = db_engine.create_postgres_engine()
+                    file_name = path.join(directory, f"{day.strftime('%Y%m%d')}.parquet")
+                    reader = pa_csv.open_csv(buffer, read_options=read_options, convert_options=convert_options)
+                    with pq.ParquetWriter(file_name, schema, compression='zstd') as writer:
+                        for batch in reader:
+                            writer.write_batch(batch)
+                            rows += batch.num_rows
+            connection.rollback()
+        finally:
+            connection.close()
+
+        self.logger.info(f"Dumped {rows} rows of trade.{table} into {directory}.")
+        return rows
 
     def dump(self):
         # Dump OHLC data
         try:
-            query = f"SELECT * FROM trade.trade_{self.table_name}_ohlc;"
-            df_ohlc = pd.read_sql(query, self.engine)
-            df_ohlc.to_csv(path.join('Data', f'Dump_{self.table_name}_OHLC.csv'), index=False)
+            self._dump_table('ohlc')
         except Exception as e:
             raise RuntimeError(f"Failed to fetch OHLC data: {e}")
 
         # Dump OrderBook data
         try:
-            query = f"SELECT * FROM trade.trade_{self.table_name}_orderbook;"
-            df_orderbook = pd.read_sql(query, self.engine)
-            df_orderbook.to_csv(path.join('Data', f'Dump_{self.table_name}_Orderbook.csv'), index=False)
+            self._dump_table('orderbook')
         except Exception as e:
             raise RuntimeError(f"Failed to fetch OrderBook data: {e}")
 
-    def load(self):
+    def _load_table(self, suffix: str, writer: BulkWriter, start, end, skip_duplicates: bool) -> int:
+        table = f'trade_{self.table_name}_{suffix}'
+        files = sorted(glob.glob(path.join(self._directory(suffix), '*.parquet')))
+        if not files:
+            raise FileNotFoundError(f"No dump found in {self._directory(suffix)}")
+
+        schema_creator = CreateDatabaseSchema('trade')
+        today = pd.Timestamp.now(tz='UTC').normalize().tz_localize(None)
+        rows = 0
+        for file_name in files:
+            day = pd.Timestamp(path.splitext(path.basename(file_name))[0])
+            if (start is not None and day + pd.Timedelta(days=1) <= start) or (end is not None and day >= end):
+                continue
+            schema_creator.create_partition(table, offset=(day - today).days)
+
+            for batch in pq.ParquetFile(file_name).iter_batches(batch_size=COPY_CHUNK_ROWS):
+                batch = pa.Table.from_batches([batch])
+                if start is not None or end is not None:
+                    batch = batch.filter(_date_mask(batch.column('date'), start, end))
+                # Decimals go to COPY as their exact text
+                for i, field in enumerate(batch.schema):
+                    if pa.types.is_decimal(field.type):
+                        batch = batch.set_column(i, field.name, batch.column(i).cast(pa.string()))
+                rows += writer.write(batch.to_pandas(), table, on_conflict_do_nothing=skip_duplicates)
+        return rows
+
+    def load(self, start=None, end=None, skip_duplicates: bool = False):
+        # Load the Parquet dumps into the database, only rows with start <= date < end when given (UTC)
+        writer = BulkWriter(self.engine, schema='trade')
+        start = None if start is None else pd.Timestamp(start).tz_localize(None)
+        end = None if end is None else pd.Timestamp(end).tz_localize(None)
+
+        # Load OHLC dump into database
+        try:
+            self._load_table('ohlc', writer, start, end, skip_duplicates)
+        except Exception as e:
+            raise RuntimeError(f"Failed to load OHLC data: {e}")
+
+        # Load OrderBook dump into database
+        try:
+            self._load_table('orderbook', writer, start, end, skip_duplicates)
+        except Exception as e:
+            raise RuntimeError(f"Failed to load OrderBook data: {e}")
+
+    def load_csv(self, skip_duplicates: bool = False):
+        # Load dumps written in the former CSV format through COPY, chunk by chunk
+        writer = BulkWriter(self.engine, schema='trade')
+
         # Load OHLC CSV into database
         try:
-            file_ohlc = path.join('Data', f'Dump_{self.table_name}_OHLC.csv')
-            df_ohlc = pd.read_csv(file_ohlc, parse_dates=['date'])
-            df_ohlc.to_sql(
-                f'trade_{self.table_name}_ohlc',
-                self.engine,
-                schema='trade',
-                if_exists='append',
-                index=False
-            )
+            file_ohlc = path.join(self.dump_dir, f'Dump_{self.table_name}_OHLC.csv')
+            for df_ohlc in pd.read_csv(file_ohlc, parse_dates=['date'], chunksize=COPY_CHUNK_ROWS):
+                writer.write(df_ohlc, f'trade_{self.table_name}_ohlc', on_conflict_do_nothing=skip_duplicates)
         except Exception as e:
             raise RuntimeError(f"Failed to load OHLC data: {e}")
 
         # Load OrderBook CSV into database
         try:
-            file_orderbook = path.join('Data', f'Dump_{self.table_name}_Orderbook.csv')
-            df_orderbook = pd.read_csv(file_orderbook, parse_dates=['date'])
-            df_orderbook.to_sql(
-                f'trade_{self.table_name}_orderbook',
-                self.engine,
-                schema='trade',
-                if_exists='append',
-                index=False
-            )
+            file_orderbook = path.join(self.dump_dir, f'Dump_{self.table_name}_Orderbook.csv')
+            for df_orderbook in pd.read_csv(file_orderbook, parse_dates=['date'], chunksize=COPY_CHUNK_ROWS):
+                writer.write(df_orderbook, f'trade_{self.table_name}_orderbook', on_conflict_do_nothing=skip_duplicates)
         except Exception as e:
             raise RuntimeError(f"Failed to load OrderBook data: {e}")
 
@@ -64,3 +217,4 @@ if __name__ == "__main__":
     dumper = Dump_Trades_DB('BTC/USDT')
     #dumper.dump()
     #dumper.load()
+    #dumper.load(start='2025-06-01', end='2025-07-01', skip_duplicates=True)
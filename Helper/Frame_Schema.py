@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+from decimal import Decimal
+
+OHLC_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+# Decimals kept by the fixed-point plan, the satoshi precision of the exchange's prices and amounts
+FIXED_DECIMALS = 8
+
+# In-memory type of every OHLC column, cast on read instead of the Decimal objects of NUMERIC:
+# a NumPy float type, or ('int64', decimals) for exact fixed-point integers in units of 10**-decimals
+OHLC_SCHEMA = {column: 'float64' for column in OHLC_COLUMNS}
+OHLC_FIXED_SCHEMA = {column: ('int64', FIXED_DECIMALS) for column in OHLC_COLUMNS}
+
+_SQL_FLOATS = {'float64': 'float8', 'float32': 'float4'}
+
+
+def _check(plan_type):
+    if isinstance(plan_type, tuple):
+        if len(plan_type) != 2 or plan_type[0] != 'int64' or not 0 <= plan_type[1] <= 18:
+            raise ValueError(f"Invalid fixed-point type: {plan_type}. Use ('int64', decimals) with 0 to 18 decimals.")
+    elif plan_type not in _SQL_FLOATS:
+        raise ValueError(f"Invalid column type: {plan_type}. Use one of {tuple(_SQL_FLOATS)} or ('int64', decimals).")
+    return plan_type
+
+
+def _to_fixed(value, decimals: int) -> int:
+    scaled = Decimal(str(value)).scaleb(decimals)
+    if scaled != scaled.to_integral_value():
+        raise ValueError(f"{value} has more than {decimals} decimals, it cannot be held exactly in fixed-point.")
+    return int(scaled)
+
+
+def select_list(plan: dict, date_column: str = 'date') -> str:
+    """SELECT list casting the NUMERIC columns of `plan` in PostgreSQL, so no Decimal object is ever built."""
+    columns = [date_column]
+    for column, plan_type in plan.items():
+        if isinstance(_check(plan_type), tuple):
+            # NUMERIC to bigint rounds half away from zero, values have at most `decimals` decimals anyway
+            columns.append(f"({column} * 1e{plan_type[1]})::bigint AS {column}")
+        else:
+            columns.append(f"{column}::{_SQL_FLOATS[plan_type]} AS {column}")
+    return ', '.join(columns)
+
+
+def read_dtypes(plan: dict) -> dict:
+    # dtype argument of pd.read_sql for the columns selected by select_list
+    return {column: 'int64' if isinstance(_check(plan_type), tuple) else plan_type for column, plan_type in plan.items()}
+
+
+def cast_frame(df: pd.DataFrame, plan: dict) -> pd.DataFrame:
+    """
+    Cast the columns of `plan` already in memory (Decimal objects, strings, other floats), for
+    frames that did not come through select_list. Fixed-point values are converted exactly from
+    Decimals, with a ValueError when a value has more decimals, and rounded to the nearest unit
+    from floats. Columns already of the planned type are left as they are.
+    """
+    df = df.copy(deep=False)
+    for column, plan_type in plan.items():
+        if column not in df.columns:
+            continue
+        values = df[column]
+        if isinstance(_check(plan_type), tuple):
+            if values.dtype == np.int64:
+                continue
+            decimals = plan_type[1]
+            if values.dtype == object:
+                df[column] = np.array([_to_fixed(value, decimals) for value in values], dtype=np.int64)
+            else:
+                df[column] = np.rint(values.to_numpy(dtype=float) * 10 ** decimals).astype(np.int64)
+        elif values.dtype != plan_type:
+            df[column] = values.astype(plan_type)
+    return df
+
+
+def from_fixed_point(df: pd.DataFrame, plan: dict, float_type: str = 'float64') -> pd.DataFrame:
+    # Fixed-point columns back to floats, e.g. before the feature pipeline
+    df = df.copy(deep=False)
+    for column, plan_type in plan.items():
+        if column in df.columns and isinstance(_check(plan_type), tuple):
+            df[column] = (df[column].to_numpy() / 10 ** plan_type[1]).astype(float_type)
+    return df
+
+
+def ohlc_floats(df: pd.DataFrame, plan: dict = OHLC_SCHEMA) -> pd.DataFrame:
+    """
+    The OHLC columns of a frame read with `plan` as the float64 the features are computed in.
+    Fixed-point columns are scaled back with from_fixed_point. An int64 column the plan does not
+    declare fixed-point raises a ValueError, it may hold 10**-decimals units and the features would
+    come out that many times too large.
+    """
+    columns = [column for column in OHLC_COLUMNS if column in df.columns]
+    if all(df[column].dtype == np.float64 for column in columns):
+        # Already what the features need, the one-row frames of the live loop pay no copy
+        return df
+    for column in columns:
+        if df[column].dtype == np.int64 and not isinstance(_check(plan.get(column, 'float64')), tuple):
+            raise ValueError(f"Column {column} is int64 but planned as {plan.get(column, 'float64')}. "
+                             f"Pass the fixed-point plan it was read with, e.g. OHLC_FIXED_SCHEMA.")
+    return cast_frame(from_fixed_point(cast_frame(df, plan), plan), OHLC_SCHEMA)
+
+
+def bytes_per_row(df: pd.DataFrame) -> float:
+    """Memory of the frame per row, including the Python objects of object columns."""
+    return df.memory_usage(deep=True).sum() / max(len(df), 1)
@@ -0,0 +1,148 @@
+import time
+import logging
+import pandas as pd
+from Helper.Previous_Interval import Previous_Interval
+from Helper.Stage_Metrics import STAGE_METRICS
+
+
+def _utc(value) -> pd.Timestamp:
+    # Naive timestamps are taken as UTC
+    value = pd.Timestamp(value)
+    return value.tz_localize('UTC') if value.tzinfo is None else value
+
+
+class SystemClock:
+    def now(self) -> pd.Timestamp:
+        return pd.Timestamp.now(tz='UTC')
+
+    def sleep(self, seconds: float) -> None:
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+class SimulatedClock:
+    """Clock for tests and replays: sleeping just moves the time forward, jobs can advance it to mimic their run time."""
+    def __init__(self, start):
+        self.current = _utc(start)
+
+    def now(self) -> pd.Timestamp:
+        return self.current
+
+    def sleep(self, seconds: float) -> None:
+        if seconds > 0:
+            self.advance(seconds)
+
+    def advance(self, seconds: float) -> None:
+        self.current += pd.Timedelta(seconds=seconds)
+
+
+class ScheduledJob:
+    def __init__(self, name: str, interval: str, func, offset_seconds: float = 10, catch_up: bool = True,
+                 max_catch_up: int = 48):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.offset = pd.Timedelta(seconds=offset_seconds)
+        self.catch_up = catch_up
+        self.max_catch_up = max_catch_up
+
+        self.next_close = None   # candle close the next run belongs to
+        self.runs = 0
+        self.failures = 0
+        self.missed_ticks = 0
+        self.skipped_ticks = 0
+
+    def deadline(self) -> pd.Timestamp:
+        return self.next_close + self.offset
+
+
+class Interval_Scheduler:
+    """
+    Runs jobs at candle-close boundaries (+ offset) of their interval strings ('1m', '30m', '4h', '1d', ...).
+    Deadlines come from the boundaries themselves, not from when the previous run ended, so the schedule
+    does not drift. When a job falls behind, the ticks it missed are reported and, with catch_up, run in
+    order with their own candle close; otherwise only the latest one runs.
+    Every job is called as func(candle_close, catching_up).
+    """
+    def __init__(self, clock=None):
+        self.clock = clock if clock is not None else SystemClock()
+        self.previous_interval = Previous_Interval()
+        self.logger = logging.getLogger('combined_OHLC_trade')
+        self.jobs = []
+
+    def add_job(self, name: str, interval: str, func, offset_seconds: float = 10, catch_up: bool = True,
+                max_catch_up: int = 48) -> ScheduledJob:
+        if self.previous_interval.get_next_candle_close(interval) is None:
+            raise ValueError(f"Invalid interval: {interval}")
+        job = ScheduledJob(name, interval, func, offset_seconds, catch_up, max_catch_up)
+        job.next_close = self.previous_interval.get_next_candle_close(interval, self.clock.now() - job.offset)
+        self.jobs.append(job)
+        self.logger.info(f"Job '{name}' scheduled every {interval}, first run at {job.deadline()} UTC.")
+        return job
+
+    def _due_closes(self, job: ScheduledJob, now: pd.Timestamp) -> list:
+        closes = []
+        close = job.next_close
+        while close + job.offset <= now:
+            closes.append(close)
+            close = self.previous_interval.get_next_candle_close(job.interval, close)
+        job.next_close = close
+        return closes
+
+    def _run(self, job: ScheduledJob, candle_close: pd.Timestamp, catching_up: bool) -> None:
+        try:
+            with STAGE_METRICS.stage(f"job_{job.name}"):
+                job.func(candle_close, catching_up)
+            job.runs += 1
+        except Exception as e:
+            job.failures += 1
+            self.logger.exception(f"Job '{job.name}' failed for candle closing at {candle_close}: {e}")
+
+    def run_due(self) -> int:
+        """
+        Run every tick whose deadline has passed, returning the number of job runs. Ticks of all jobs
+        are merged and run by deadline, so a catching-up job still runs before the jobs that follow it.
+        """
+        now = self.clock.now()
+        ticks = []
+        for order, job in enumerate(self.jobs):
+            closes = self._due_closes(job, now)
+            if not closes:
+                continue
+
+            missed = len(closes) - 1
+            if missed:
+                job.missed_ticks += missed
+                self.logger.warning(f"Job '{job.name}' missed {missed} tick(s), from {closes[0]} to {closes[-2]}.")
+                if job.catch_up:
+                    skipped = max(0, len(closes) - job.max_catch_up)
+                    if skipped:
+                        job.skipped_ticks += skipped
+                        self.logger.warning(f"Job '{job.name}' skips the {skipped} oldest missed tick(s).")
+                    closes = closes[skipped:]
+                else:
+                    job.skipped_ticks += missed
+                    closes = closes[-1:]
+
+            for index, candle_close in enumerate(closes):
+                ticks.append((candle_close + job.offset, order, candle_close, job, index < len(closes) - 1))
+
+        for _, _, candle_close, job, catching_up in sorted(ticks, key=lambda tick: tick[:2]):
+            self._run(job, candle_close, catching_up)
+        return len(ticks)
+
+    def run(self, until=None) -> None:
+        """Sleep until the next deadline and run what is due, forever or until the clock passes `until`."""
+        if not self.jobs:
+            raise ValueError('No job registered in the scheduler.')
+        until = None if until is None else _utc(until)
+
+        while True:
+            next_deadline = min(job.deadline() for job in self.jobs)
+            if until is not None and next_deadline > until:
+                return
+            wait = (next_deadline - self.clock.now()).total_seconds()
+            if wait > 0:
+                self.logger.info(f"Next run scheduled at {next_deadline} UTC. Waiting {wait:.2f} seconds.")
+                self.clock.sleep(wait)
+            self.run_due()
@@ -0,0 +1,129 @@
+import logging
+import re
+import threading
+import pandas as pd
+from sqlalchemy import text
+
+# One cache per engine and schema for the whole process, like the engines of Database_Engine
+_CACHES = {}
+_REGISTRY_LOCK = threading.Lock()
+
+_BOUND = re.compile(r"FROM \((.+?)\) TO \((.+?)\)")
+
+
+def _parse_bound(value: str) -> pd.Timestamp:
+    if value == 'MINVALUE':
+        return pd.Timestamp.min.tz_localize('UTC')
+    if value == 'MAXVALUE':
+        return pd.Timestamp.max.tz_localize('UTC')
+    return pd.Timestamp(value.strip("'")).tz_convert('UTC')
+
+
+def parse_partition_bound(bound: str):
+    # (start, end) of a 'FOR VALUES FROM (...) TO (...)' range bound, None for other kinds of partitions
+    match = _BOUND.search(bound or '')
+    if not match:
+        return None
+    return _parse_bound(match.group(1)), _parse_bound(match.group(2))
+
+
+class Metadata_Cache:
+    """
+    What the process knows of a schema: whether it exists, its tables and the date ranges of
+    their partitions. Loaded from the catalog on first use with a single query, then kept up to
+    date by the helpers that run DDL (CreateDatabaseSchema, Partition_Manager), so existence
+    checks on the ingestion path cost no round-trip. Call invalidate() after DDL run elsewhere
+    or when DDL fails; the next check reloads from the catalog.
+    """
+    def __init__(self, engine, schema: str = 'trade'):
+        self.engine = engine
+        self.schema = schema
+        self.logger = logging.getLogger('combined_OHLC_trade')
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._schema_exists = False
+        self._tables = set()
+        self._partitions = {}
+
+    def _load(self):
+        with self.engine.connect() as conn:
+            rows = conn.execute(text("""
+                SELECT n.nspname, c.relname, parent.relname, pg_get_expr(c.relpartbound, c.oid)
+                FROM pg_namespace n
+                LEFT JOIN pg_class c ON c.relnamespace = n.oid AND c.relkind IN ('r', 'p')
+                LEFT JOIN pg_inherits i ON i.inhrelid = c.oid
+                LEFT JOIN pg_class parent ON parent.oid = i.inhparent
+                WHERE n.nspname = :schema
+            """), {'schema': self.schema}).fetchall()
+
+        self._schema_exists = bool(rows)
+        self._tables = {name for _, name, _, _ in rows if name is not None}
+        self._partitions = {}
+        for _, name, parent, bound in rows:
+            bounds = parse_partition_bound(bound) if parent is not None else None
+            if bounds is not None:
+                self._partitions.setdefault(parent, {})[name] = bounds
+        self._loaded = True
+        self.logger.info(f"Loaded metadata of schema {self.schema}: {len(self._tables)} tables.")
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self._load()
+
+    def has_schema(self) -> bool:
+        with self._lock:
+            self._ensure_loaded()
+            return self._schema_exists
+
+    def has_table(self, table_name: str) -> bool:
+        with self._lock:
+            self._ensure_loaded()
+            return table_name in self._tables
+
+    def partitions(self, table_name: str) -> dict:
+        # {partition name: (start, end)} of a partitioned table
+        with self._lock:
+            self._ensure_loaded()
+            return dict(self._partitions.get(table_name, {}))
+
+    def covers(self, table_name: str, days) -> bool:
+        ranges = self.partitions(table_name).values()
+        return all(any(start <= day < end for start, end in ranges) for day in days)
+
+    def add_schema(self):
+        with self._lock:
+            self._schema_exists = True
+
+    def add_table(self, table_name: str):
+        with self._lock:
+            self._schema_exists = True
+            self._tables.add(table_name)
+
+    def set_partitions(self, table_name: str, partitions: dict):
+        # Replaces what is known of the partitions of a table, after they were read or changed
+        with self._lock:
+            self._tables.add(table_name)
+            self._tables.update(partitions)
+            self._partitions[table_name] = dict(partitions)
+
+    def add_partition(self, table_name: str, name: str, start: pd.Timestamp, end: pd.Timestamp):
+        with self._lock:
+            self._tables.add(name)
+            self._partitions.setdefault(table_name, {})[name] = (start, end)
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded = False
+            self._tables = set()
+            self._partitions = {}
+        self.logger.info(f"Metadata cache of schema {self.schema} invalidated.")
+
+
+def get_metadata_cache(engine, schema: str = 'trade') -> Metadata_Cache:
+    """Shared metadata cache of `schema` for `engine`, created on first use."""
+    with _REGISTRY_LOCK:
+        cache = _CACHES.get((engine, schema))
+        if cache is None:
+            cache = Metadata_Cache(engine, schema)
+            _CACHES[(engine, schema)] = cache
+        return cache
@@ -0,0 +1,181 @@
+import logging
+from fnmatch import fnmatch
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from Helper.Database_Engine import get_postgres_engine
+from Helper.Metadata_Cache import get_metadata_cache, parse_partition_bound
+
+# Length of a partition, a table keeps daily partitions unless matched in `periods`
+PARTITION_PERIODS = ('day', 'week', 'month')
+
+
+def period_bounds(day: pd.Timestamp, period: str):
+    # [start, end) of the period holding `day`, weeks open on Monday like the exchange's 1w candles
+    day = day.normalize()
+    if period == 'day':
+        start, end = day, day + pd.Timedelta(days=1)
+    elif period == 'week':
+        start = day - pd.Timedelta(days=day.weekday())
+        end = start + pd.Timedelta(weeks=1)
+    elif period == 'month':
+        start = day.replace(day=1)
+        end = start + pd.DateOffset(months=1)
+    else:
+        raise ValueError(f"Invalid partition period: {period}. Valid periods: {PARTITION_PERIODS}")
+    return start, end
+
+
+class Partition_Manager:
+    """
+    Keeps the date-partitioned tables of a schema ready ahead of time: creates the partitions
+    of the next `days_ahead` days for every partitioned table in one transaction, daily or, for
+    the tables matched in `periods` (fnmatch patterns like '*_orderbook'), weekly or monthly.
+    Partitions ending more than `retention_days` ago are detached, and dropped with drop_detached.
+    Partitions are named <table>_p_<YYYYMMDD> after their first day, like create_partition does.
+    """
+    def __init__(self, schema: str = 'trade', days_ahead: int = 3, periods: dict = None,
+                 retention_days: int = None, drop_detached: bool = False):
+        if not schema:
+            raise ValueError('Must provide a schema name to manage partitions')
+        if days_ahead < 0:
+            raise ValueError('days_ahead cannot be negative')
+        self.schema = schema
+        self.days_ahead = days_ahead
+        self.periods = dict(periods or {})
+        for period in self.periods.values():
+            if period not in PARTITION_PERIODS:
+                raise ValueError(f"Invalid partition period: {period}. Valid periods: {PARTITION_PERIODS}")
+        self.retention_days = retention_days
+        self.drop_detached = drop_detached
+        self.logger = logging.getLogger('combined_OHLC_trade')
+
+        # Shared pooled engine to the AWS-hosted PostgreSQL DB
+        self.engine = get_postgres_engine()
+        self.metadata = get_metadata_cache(self.engine, schema)
+
+    def period_of(self, table_name: str) -> str:
+        for pattern, period in self.periods.items():
+            if fnmatch(table_name, pattern):
+                return period
+        return 'day'
+
+    def base_tables(self, conn) -> list:
+        # Partitioned parents only, so plain tables such as the order book rollup are left alone
+        return list(conn.execute(text("""
+            SELECT c.relname FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = :schema AND c.relkind = 'p' ORDER BY c.relname
+        """), {'schema': self.schema}).scalars())
+
+    def _partitions(self, conn, table_name: str) -> list:
+        rows = conn.execute(text("""
+            SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            JOIN pg_class p ON p.oid = i.inhparent
+            JOIN pg_namespace n ON n.oid = p.relnamespace
+            WHERE n.nspname = :schema AND p.relname = :table
+        """), {'schema': self.schema, 'table': table_name}).fetchall()
+        partitions = []
+        for name, bound in rows:
+            bounds = parse_partition_bound(bound)
+            if bounds is not None:
+                partitions.append((name, *bounds))
+        return partitions
+
+    def _create_missing(self, conn, table_name: str, days) -> list:
+        """Create the partitions covering `days` that do not exist yet, returning their names."""
+        partitions = {name: (start, end) for name, start, end in self._partitions(conn, table_name)}
+        ranges = list(partitions.values())
+        period = self.period_of(table_name)
+        created = []
+        for day in sorted(set(days)):
+            if any(start <= day < end for start, end in ranges):
+                continue
+            start, end = period_bounds(day, period)
+            # A period overlapping partitions made under another period is clipped to the gap around `day`
+            start = max([start] + [e for s, e in ranges if e <= day])
+            end = min([end] + [s for s, e in ranges if s > day])
+
+            name = f"{table_name}_p_{start.strftime('%Y%m%d')}"
+            conn.execute(text(f"""
+                CREATE TABLE IF NOT EXISTS {self.schema}.{name}
+                PARTITION OF {self.schema}.{table_name}
+                FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}');
+            """))
+            ranges.append((start, end))
+            partitions[name] = (start, end)
+            created.append(name)
+        self.metadata.set_partitions(table_name, partitions)
+        return created
+
+    def ensure(self, tables: list = None, days_ahead: int = None) -> list:
+        """Create the partitions from today to `days_ahead` days ahead for all tables in one transaction."""
+        days_ahead = self.days_ahead if days_ahead is None else days_ahead
+        today = pd.Timestamp.now(tz='UTC').normalize()
+        days = list(pd.date_range(today, today + pd.Timedelta(days=days_ahead), freq='D'))
+        created = []
+        try:
+            with self.engine.begin() as conn:
+                for table_name in (tables if tables is not None else self.base_tables(conn)):
+                    created += self._create_missing(conn, table_name, days)
+        except Exception as e:
+            self.metadata.invalidate()
+            self.logger.error(f"Failed to create partitions ahead: {e}", exc_info=True)
+            raise
+        self.logger.info(f"Partitions ready {days_ahead} days ahead, created: {created or 'none'}.")
+        return created
+
+    def ensure_for_dates(self, table_name: str, dates) -> list:
+        # Partitions for the rows about to be written, naive dates are taken as UTC
+        days = list(pd.to_datetime(pd.Series(dates), utc=True).dt.normalize().unique())
+        if self.metadata.covers(table_name, days):
+            return []
+        try:
+            with self.engine.begin() as conn:
+                created = self._create_missing(conn, table_name, days)
+        except Exception:
+            self.metadata.invalidate()
+            raise
+        if created:
+            self.logger.info(f"Created partitions {created} for {table_name}.")
+        return created
+
+    def apply_retention(self, tables: list = None) -> list:
+        """Detach (and with drop_detached drop) the partitions that ended more than retention_days ago."""
+        if self.retention_days is None:
+            return []
+        cutoff = pd.Timestamp.now(tz='UTC').normalize() - pd.Timedelta(days=self.retention_days)
+        expired = []
+        try:
+            with self.engine.begin() as conn:
+                for table_name in (tables if tables is not None else self.base_tables(conn)):
+                    for name, _, end in self._partitions(conn, table_name):
+                        if end > cutoff:
+                            continue
+                        conn.execute(text(f"ALTER TABLE {self.schema}.{table_name} DETACH PARTITION {self.schema}.{name}"))
+                        if self.drop_detached:
+                            conn.execute(text(f"DROP TABLE {self.schema}.{name}"))
+                        expired.append(name)
+        finally:
+            # Detached partitions are plain tables now, the next check reloads them from the catalog
+            if expired:
+                self.metadata.invalidate()
+        action = 'Dropped' if self.drop_detached else 'Detached'
+        self.logger.info(f"{action} {len(expired)} partitions older than {cutoff.date()}: {expired}")
+        return expired
+
+    def maintain(self) -> dict:
+        return {'created': self.ensure(), 'expired': self.apply_retention()}
+
+    def write_with_partitions(self, write, df: pd.DataFrame, table_name: str, **kwargs) -> int:
+        # `write` is a BulkWriter method (write, upsert), retried once after a missing partition is created
+        try:
+            return write(df, table_name, **kwargs)
+        except IntegrityError as e:
+            if 'no partition of relation' not in str(e):
+                raise
+            self.logger.warning(f"Missing partition for {table_name}, creating it and retrying the write.")
+            self.metadata.invalidate()
+            self.ensure_for_dates(table_name, df['date'])
+            return write(df, table_name, **kwargs)
@@ -22,6 +22,25 @@ class Previous_Interval:
 
         return result
 
+    def get_next_candle_close(self,interval:str,after:pd.Timestamp=None):
+        # First candle boundary strictly after `after` (default now): the close of the candle open at that time
+        match = re.match(r"(\d+)([smhdwM])", interval)
+        if not match:
+            return None
+        value, unit = match.groups()
+        value=int(value)
+        after = pd.Timestamp.utcnow() if after is None else pd.Timestamp(after)
+
+        if unit == 'w':
+            # Weekly candles open on Monday 00:00
+            week_start = after.normalize() - pd.Timedelta(days=after.weekday())
+            return week_start + pd.Timedelta(weeks=value)
+        if unit == 'M':
+            return after.normalize().replace(day=1) + pd.DateOffset(months=value)
+
+        step = pd.Timedelta(minutes=value*self.conversion_factor[unit])
+        return after.floor(step) + step
+
 if __name__=='__main__':
     testing=Previous_Interval()
     prev_time=testing.get_previous_floored_timestamp('5m')
@@ -0,0 +1,206 @@
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+
+# Upper bounds (seconds) of the histogram buckets, from a cached lookup to a slow exchange call
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Recent durations kept per stage for the p50/p95/p99 of the JSON dump
+RECENT_SAMPLES = 2048
+
+
+class Latency_Histogram:
+    """Cumulative-bucket histogram of one stage, plus its most recent samples for exact percentiles."""
+    def __init__(self, buckets=LATENCY_BUCKETS, recent: int = RECENT_SAMPLES):
+        self.bounds = tuple(buckets)
+        self.bucket_counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=recent)
+        self.lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        with self.lock:
+            self.bucket_counts[bisect_left(self.bounds, seconds)] += 1
+            self.count += 1
+            self.sum += seconds
+            self.recent.append(seconds)
+
+    def summary(self) -> dict:
+        with self.lock:
+            samples = np.fromiter(self.recent, dtype=float)
+            count, total = self.count, self.sum
+        p50, p95, p99 = np.percentile(samples, [50, 95, 99]) if len(samples) else (0.0, 0.0, 0.0)
+        return {'count': count, 'sum': total, 'mean': total / count if count else 0.0,
+                'p50': float(p50), 'p95': float(p95), 'p99': float(p99),
+                'max': float(samples.max()) if len(samples) else 0.0}
+
+
+class _Stage_Timer:
+    # Plain context manager, a generator-based one costs about twice as much per stage
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram: Latency_Histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        # Failed runs are timed too, their exception goes on unchanged
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class Stage_Metrics:
+    """
+    Timings of the stages of the trading loop (fetch, insert, db_read, features, strategy, ...)
+    and counters of notable events (fetch retries, fallback candles). Stages are timed with the
+    stage() context manager or the timed() decorator, a few microseconds each. The figures are
+    exposed as Prometheus text on a local endpoint (serve) or dumped as JSON (dump_json).
+    """
+    def __init__(self, prefix: str = 'trading'):
+        self.prefix = prefix
+        self.histograms = {}
+        self.counters = {}
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger('combined_OHLC_trade')
+        self._server = None
+        self._dump_thread = None
+        self._stop_dump = threading.Event()
+
+    def histogram(self, stage: str) -> Latency_Histogram:
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            with self.lock:
+                histogram = self.histograms.setdefault(stage, Latency_Histogram())
+        return histogram
+
+    def observe(self, stage: str, seconds: float):
+        self.histogram(stage).observe(seconds)
+
+    def stage(self, name: str) -> _Stage_Timer:
+        return _Stage_Timer(self.histogram(name))
+
+    def timed(self, name: str):
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.histogram(name).observe(time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def count(self, event: str, amount: int = 1):
+        with self.lock:
+            self.counters[event] = self.counters.get(event, 0) + amount
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {}
+            self.counters = {}
+
+    def _copies(self):
+        # Stages and events are added lazily by the loop's threads, the HTTP and dump threads read copies
+        with self.lock:
+            return dict(self.histograms), dict(self.counters)
+
+    def snapshot(self) -> dict:
+        histograms, counters = self._copies()
+        return {
+            'time': time.time(),
+            'stages': {name: histogram.summary() for name, histogram in sorted(histograms.items())},
+            'counters': dict(sorted(counters.items())),
+        }
+
+    def prometheus_text(self) -> str:
+        name = f"{self.prefix}_stage_seconds"
+        histograms, counters = self._copies()
+        lines = [f"# HELP {name} Duration of the stages of the trading loop.", f"# TYPE {name} histogram"]
+        for stage, histogram in sorted(histograms.items()):
+            with histogram.lock:
+                bucket_counts, count, total = list(histogram.bucket_counts), histogram.count, histogram.sum
+            cumulative = 0
+            for bound, bucket_count in zip(histogram.bounds + ('+Inf',), bucket_counts):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {total}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {count}')
+
+        name = f"{self.prefix}_events_total"
+        lines += [f"# HELP {name} Notable events of the trading loop.", f"# TYPE {name} counter"]
+        for event, value in sorted(counters.items()):
+            lines.append(f'{name}{{event="{event}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def dump_json(self, file_path: str):
+        # Written next to the target and renamed, so a reader never sees half a file
+        temporary = f"{file_path}.tmp"
+        with open(temporary, 'w') as f:
+            json.dump(self.snapshot(), f, indent=2)
+        os.replace(temporary, file_path)
+
+    def start_json_dump(self, file_path: str, interval: float = 300):
+        """Dump the metrics to `file_path` every `interval` seconds from a background thread."""
+        if self._dump_thread is not None:
+            return
+
+        def dump_loop():
+            while not self._stop_dump.wait(interval):
+                try:
+                    self.dump_json(file_path)
+                except OSError as e:
+                    self.logger.error(f"Failed to dump stage metrics to {file_path}: {e}")
+
+        self._stop_dump.clear()
+        self._dump_thread = threading.Thread(target=dump_loop, name='stage-metrics-dump', daemon=True)
+        self._dump_thread.start()
+
+    def serve(self, port: int = 9108, host: str = '127.0.0.1'):
+        """Serve the Prometheus text on http://host:port/metrics from a background thread."""
+        if self._server is not None:
+            return self._server
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip('/') not in ('', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name='stage-metrics-http', daemon=True).start()
+        self.logger.info(f"Stage metrics served on http://{host}:{self._server.server_address[1]}/metrics")
+        return self._server
+
+    def stop(self):
+        self._stop_dump.set()
+        self._dump_thread = None
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+# Shared by every module of the process, like the 'combined_OHLC_trade' logger
+STAGE_METRICS = Stage_Metrics()
@@ -0,0 +1,15 @@
+import pandas as pd
+
+# Rows fetched per round trip of the server-side cursor and returned per chunk
+STREAM_CHUNK_ROWS = 50_000
+
+
+def stream_query(engine, query, params: dict = None, chunk_rows: int = STREAM_CHUNK_ROWS, dtype: dict = None):
+    """
+    Yield the result of `query` as DataFrames of at most `chunk_rows` rows, cast with `dtype`.
+    The rows come from a named server-side cursor (stream_results), so only one chunk is held
+    in memory at a time whatever the size of the result.
+    """
+    with engine.connect() as conn:
+        conn = conn.execution_options(stream_results=True, max_row_buffer=chunk_rows)
+        yield from pd.read_sql(query, conn, params=params, chunksize=chunk_rows, dtype=dtype)
@@ -1,5 +1,5 @@
-import boto3
 from typing import List
+from functools import cached_property
 import logging
 import configparser
 from os import path
@@ -21,9 +21,24 @@ class Get_AWS_Data:
 
         self.logger=logging.getLogger('infrastructure_log')
         self.region_name=region_name
-        self.ec2 = boto3.client('ec2',region_name=self.region_name)
-        self.rds = boto3.client('rds',region_name=self.region_name)
-        self.cf=boto3.client('cloudformation',region_name=self.region_name)
+
+    # boto3 clients are built on first use, so importing or instantiating this class
+    # does not pay for botocore model loading and credential resolution
+    def _client(self, service_name: str):
+        import boto3
+        return boto3.client(service_name, region_name=self.region_name)
+
+    @cached_property
+    def ec2(self):
+        return self._client('ec2')
+
+    @cached_property
+    def rds(self):
+        return self._client('rds')
+
+    @cached_property
+    def cf(self):
+        return self._client('cloudformation')
 
     def get_default_VPCID(self)->str:
         # Get default VPC
@@ -0,0 +1,4 @@
+import logging
+
+# Entry-point modules call setup_logger on import, a handler already in place keeps the tests out of logs/
+logging.getLogger('combined_OHLC_trade').addHandler(logging.NullHandler())
@@ -0,0 +1,43 @@
+import asyncio
+import pytest
+
+from Benchmark.Benchmark_Async_Collector import FakeAsyncExchange, MemorySink, INTERVALS
+from Core_Trade.Async_OHLC_Collector import Async_OHLC_Collector
+from Helper.Previous_Interval import Previous_Interval
+
+SYMBOLS = [f'COIN{i}/USDT' for i in range(8)]
+PAIRS = len(SYMBOLS) * len(INTERVALS)
+
+
+@pytest.fixture(scope='module')
+def collected():
+    # One round of 24 pairs: 30 ms per call, calls 10 ms apart, at most 3 at once
+    exchange, sink = FakeAsyncExchange(latency=0.03, rate_limit_ms=10), MemorySink()
+
+    async def collect():
+        collector = Async_OHLC_Collector(SYMBOLS, INTERVALS, sink, max_concurrency=3, exchange=exchange)
+        try:
+            return await collector.collect_once()
+        finally:
+            await collector.close()
+    return asyncio.run(collect()), exchange, sink
+
+
+def test_round_is_written_as_one_batch_of_closed_candles(collected):
+    inserted, _, sink = collected
+    assert inserted == PAIRS
+    assert len(sink.batches) == 1 and len(sink.batches[0]) == PAIRS
+    expected_date = Previous_Interval().get_previous_floored_timestamp('30m').tz_localize(None)
+    assert sink.batches[0]['trade_coin0usdt30m_ohlc']['date'].tolist() == [expected_date]
+
+
+def test_calls_stay_within_max_concurrency(collected):
+    _, exchange, _ = collected
+    assert len(exchange.call_times) == PAIRS
+    assert exchange.max_in_flight == 3
+
+
+def test_calls_are_spaced_by_the_rate_limit(collected):
+    _, exchange, _ = collected
+    gaps = [b - a for a, b in zip(exchange.call_times, exchange.call_times[1:])]
+    assert min(gaps) >= 0.010 * 0.95
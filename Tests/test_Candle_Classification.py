@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+
+from Benchmark.Synthetic_Data import synthetic_ohlc
+from Core_Trade.RawData_Weighting_OHLC import CANDLE_FIGURES, classify_candle, classify_candles
+
+
+def candles(rows):
+    frame = synthetic_ohlc(rows)
+    rng = np.random.default_rng(rows)
+    frame['Scaled_Close_5'] = rng.uniform(0, 1, rows)
+    frame['slope_5'] = rng.normal(0, 20, rows)
+    # The first rows of generate_clean_data have no window yet
+    frame.loc[frame.index[:6], ['Scaled_Close_5', 'slope_5']] = np.nan
+    return frame
+
+
+def test_labels_match_the_row_wise_classifier():
+    frame = candles(3_000)
+    labels = classify_candles(frame['open'], frame['high'], frame['low'], frame['close'],
+                              frame['Scaled_Close_5'], frame['slope_5'])
+    expected = frame.apply(classify_candle, axis=1)
+    assert pd.Series(labels).astype(object).fillna('').tolist() == expected.astype(object).fillna('').tolist()
+    # Every figure and the None of a zero body or no figure are covered
+    assert set(pd.Series(labels).dropna()) == set(CANDLE_FIGURES)
+    assert pd.Series(labels).isna().any()
+
+
+def test_labels_are_categorical_over_the_figures():
+    frame = candles(100)
+    labels = classify_candles(frame['open'], frame['high'], frame['low'], frame['close'],
+                              frame['Scaled_Close_5'], frame['slope_5'])
+    assert isinstance(labels, pd.Categorical)
+    assert list(labels.categories) == list(CANDLE_FIGURES)
+
+
+def test_zero_body_is_no_figure():
+    # A long lower wick would make it a Hammer if the body were not zero
+    labels = classify_candles([100.0], [100.5], [90.0], [100.0], [0.5], [0.0])
+    assert pd.isna(labels[0])
+    assert classify_candle({'open': 100.0, 'high': 100.5, 'low': 90.0, 'close': 100.0,
+                            'Scaled_Close_5': 0.5, 'slope_5': 0.0}) is None
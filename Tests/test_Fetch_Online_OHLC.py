@@ -0,0 +1,224 @@
+import pandas as pd
+
+import main
+from Core_Trade.Fetch_Online_OHLC import FetchTradeMinute, HEADER
+from Core_Trade.RawData_Weighting_OHLC import minimum_lookback
+from Core_Trade.Streaming_Weighting_OHLC import Streaming_Weighting_OHLC
+from Helper.Frame_Schema import OHLC_SCHEMA
+
+MINUTE_MS = 60_000
+
+
+class FakeExchange:
+    """1m candles up to the one still forming, without the minutes of an outage, and every call recorded."""
+    timeframes = {'1m': '1m'}
+    enableRateLimit = True
+
+    def __init__(self, minutes: int, outage=()):
+        now_ms = int(pd.Timestamp.now(tz='UTC').timestamp() * 1000)
+        forming = now_ms // MINUTE_MS * MINUTE_MS
+        self.first = forming - minutes * MINUTE_MS
+        self.last_closed = pd.Timestamp(forming - MINUTE_MS, unit='ms', tz='UTC')
+        self.candles = [[ms, 100.0, 102.0, 99.0, 101.0, 10.0]
+                        for ms in range(self.first, forming + MINUTE_MS, MINUTE_MS)
+                        if (ms - self.first) // MINUTE_MS not in outage]
+        self.calls = []
+
+    def fetchOHLCV(self, symbol, timeframe, since, limit=None):
+        self.calls.append((since, limit))
+        candles = [list(candle) for candle in self.candles if candle[0] >= since]
+        return candles[:limit] if limit else candles
+
+
+class MemorySink:
+    """Upsert semantics of OHLC_DB_Sink on a dict per table: a fallback never replaces a stored candle."""
+    def __init__(self):
+        self.tables = {}
+
+    def ensure_table(self, table_name):
+        self.tables.setdefault(table_name, {})
+
+    def last_stored_date(self, table_name):
+        return max(self.tables[table_name], default=None)
+
+    def fallback_dates(self, table_name, since=None):
+        since = pd.Timestamp.min if since is None else since.tz_convert('UTC').tz_localize(None)
+        return sorted(date for date, row in self.tables[table_name].items() if not any(row) and date >= since)
+
+    def write_table(self, table_name, df):
+        self.ensure_table(table_name)
+        table, written = self.tables[table_name], 0
+        for date, *row in df[HEADER].itertuples(index=False):
+            if (any(row) or date not in table) and table.get(date) != row:
+                table[date] = row
+                written += 1
+        return written
+
+
+def store_fallbacks(sink, exchange, positions):
+    dates = pd.to_datetime([exchange.first + position * MINUTE_MS for position in positions], unit='ms')
+    sink.write_table('trade_btcusdt1m_ohlc', pd.DataFrame({'date': dates, 'open': 0, 'high': 0, 'low': 0,
+                                                           'close': 0, 'volume': 0}))
+
+
+def store_closed(sink, exchange):
+    df = pd.DataFrame(exchange.candles[:-1], columns=HEADER)
+    df['date'] = pd.to_datetime(df['date'], unit='ms')
+    sink.write_table('trade_btcusdt1m_ohlc', df)
+
+
+def fetcher(exchange, sink):
+    fetcher = FetchTradeMinute('binance', 'BTC/USDT', exchange=exchange, sink=sink)
+    # The clock of the exchange, so a test running across a minute boundary sees the same closed candles
+    fetcher.previous_interval.get_previous_floored_timestamp = lambda interval: exchange.last_closed
+    return fetcher
+
+
+class MemoryReader:
+    """The reads LiveTradingJobs.evaluate makes through Fetch_fromDB_OHLC, on a MemorySink table."""
+    dtypes = OHLC_SCHEMA
+
+    def __init__(self, sink):
+        self.sink = sink
+        self.calls = []
+
+    def frame(self):
+        table = self.sink.tables['trade_btcusdt1m_ohlc']
+        return pd.DataFrame([[date, *table[date]] for date in sorted(table)], columns=HEADER)
+
+    def get_OHLC_fromDB(self, symbol=None, interval=None, limit=None):
+        self.calls.append(('fromDB', limit))
+        return self.frame().iloc[-limit:].reset_index(drop=True)
+
+    def get_OHLC_after(self, symbol=None, interval=None, after=None):
+        self.calls.append(('after', after))
+        df = self.frame()
+        df = df[df['date'] > after].reset_index(drop=True)
+        return None if df.empty else df
+
+
+class Evaluated:
+    """A strategy registry recording the rows it is given."""
+    names = ['recorded']
+
+    def __init__(self):
+        self.rows = []
+
+    def evaluate(self, row):
+        self.rows.append(row)
+
+
+def live_jobs(monkeypatch, exchange, sink):
+    reader = MemoryReader(sink)
+    monkeypatch.setattr(main, 'FetchTradeMinute', lambda exchange_name, symbol: fetcher(exchange, sink))
+    monkeypatch.setattr(main, 'Fetch_fromDB_OHLC', lambda schema: reader)
+    return main.LiveTradingJobs('BTC/USDT', '1m', strategies=Evaluated())
+
+
+def since_of(exchange):
+    return pd.Timestamp(exchange.first, unit='ms')
+
+
+def test_backfill_pages_up_to_the_last_closed_candle():
+    exchange, sink = FakeExchange(minutes=23), MemorySink()
+    assert fetcher(exchange, sink).backfill_ohlc_to_db('1m', since=since_of(exchange), page_limit=5) == 23
+    table = sink.tables['trade_btcusdt1m_ohlc']
+    assert len(table) == 23
+    # The forming candle is left to the live fetch
+    assert max(table) == pd.Timestamp(exchange.candles[-2][0], unit='ms')
+    # 5 pages of up to 5 candles, the last one only returns the forming candle
+    assert [limit for _, limit in exchange.calls] == [5] * 5
+    assert [since for since, _ in exchange.calls][:2] == [exchange.first, exchange.first + 4 * MINUTE_MS + 1]
+
+
+def test_backfill_pages_past_an_outage_gap():
+    exchange, sink = FakeExchange(minutes=30, outage=range(8, 16)), MemorySink()
+    assert fetcher(exchange, sink).backfill_ohlc_to_db('1m', since=since_of(exchange), page_limit=5) == 22
+    stored = sorted(sink.tables['trade_btcusdt1m_ohlc'])
+    assert stored[7] + pd.Timedelta(minutes=9) == stored[8]
+
+
+def test_second_backfill_starts_after_the_last_stored_candle():
+    exchange, sink = FakeExchange(minutes=10), MemorySink()
+    fetcher(exchange, sink).backfill_ohlc_to_db('1m', since=since_of(exchange))
+    exchange.calls.clear()
+    # Nothing closed since, the exchange is not even called
+    assert fetcher(exchange, sink).backfill_ohlc_to_db('1m', since=since_of(exchange)) == 0
+    assert exchange.calls == []
+
+    table = sink.tables['trade_btcusdt1m_ohlc']
+    for date in sorted(table)[-3:]:
+        del table[date]
+    last = sink.last_stored_date('trade_btcusdt1m_ohlc')
+    assert fetcher(exchange, sink).backfill_ohlc_to_db('1m', since=since_of(exchange)) == 3
+    assert exchange.calls[0][0] == int(last.timestamp() * 1000) + 1
+
+
+def test_backfill_repairs_stored_fallbacks():
+    exchange, sink = FakeExchange(minutes=10), MemorySink()
+    store_fallbacks(sink, exchange, [2, 3])
+    fetcher(exchange, sink).backfill_ohlc_to_db('1m', since=since_of(exchange))
+    assert sink.fallback_dates('trade_btcusdt1m_ohlc') == []
+
+
+def test_consecutive_fallbacks_are_fetched_as_one_range():
+    exchange, sink = FakeExchange(minutes=60), MemorySink()
+    store_fallbacks(sink, exchange, [*range(10, 20), 40])
+    exchange.calls.clear()
+    assert fetcher(exchange, sink).repair_fallback_candles('1m', page_limit=4) == 11
+    first = exchange.first + 10 * MINUTE_MS
+    assert exchange.calls == [(first, 4), (first + 4 * MINUTE_MS, 4), (first + 8 * MINUTE_MS, 3),
+                              (exchange.first + 40 * MINUTE_MS, 1)]
+
+
+def test_outage_fallbacks_cost_one_call_and_old_ones_are_left_to_an_explicit_since():
+    # Minutes 100 to 109 are missing on the exchange too, minute 3 is a day older than the backfill window
+    exchange, sink = FakeExchange(minutes=1_500, outage=range(100, 110)), MemorySink()
+    store_fallbacks(sink, exchange, [3, *range(100, 110)])
+    table = sink.tables['trade_btcusdt1m_ohlc']
+    table.update({pd.Timestamp(candle[0], unit='ms'): candle[1:] for candle in exchange.candles[-30:-1]})
+
+    exchange.calls.clear()
+    # The start date of main_Backfill_OHLC, only used for an empty table
+    assert fetcher(exchange, sink).backfill_ohlc_to_db('1m', since=since_of(exchange)) == 0
+    assert exchange.calls == [(exchange.first + 100 * MINUTE_MS, 10)]
+    assert len(sink.fallback_dates('trade_btcusdt1m_ohlc')) == 11
+
+    assert fetcher(exchange, sink).repair_fallback_candles('1m', since=since_of(exchange)) == 1
+
+
+def test_live_indicators_are_warmed_up_again_after_a_repair(monkeypatch):
+    # Every closed candle is stored, one of the last minimum_lookback() as a zeroed fallback
+    exchange, sink = FakeExchange(minutes=300), MemorySink()
+    store_closed(sink, exchange)
+    table = sink.tables['trade_btcusdt1m_ohlc']
+    table[since_of(exchange) + pd.Timedelta(minutes=250)] = [0.0] * 5
+
+    jobs = live_jobs(monkeypatch, exchange, sink)
+    jobs.evaluate(None, False)
+    stale = jobs.indicators
+
+    # A missed tick, the next one backfills the gap and repairs the fallback
+    jobs.fetch(None, True)
+    jobs.fetch(None, False)
+    assert sink.fallback_dates('trade_btcusdt1m_ohlc') == []
+    assert jobs.indicators is None
+
+    jobs.db_fetcher.calls.clear()
+    jobs.evaluate(None, False)
+    assert jobs.db_fetcher.calls == [('fromDB', minimum_lookback())]
+    assert jobs.indicators is not stale
+    expected = Streaming_Weighting_OHLC().update_frame(jobs.db_fetcher.frame().iloc[-minimum_lookback():])
+    assert pd.Series(jobs.strategies.rows[-1]).equals(pd.Series(expected))
+
+
+def test_live_indicators_are_kept_when_a_backfill_writes_nothing(monkeypatch):
+    exchange, sink = FakeExchange(minutes=300), MemorySink()
+    store_closed(sink, exchange)
+    jobs = live_jobs(monkeypatch, exchange, sink)
+    jobs.evaluate(None, False)
+    indicators = jobs.indicators
+
+    jobs.fetch(None, True)
+    jobs.fetch(None, False)
+    assert jobs.indicators is indicators
@@ -0,0 +1,68 @@
+from decimal import Decimal
+import numpy as np
+import pandas as pd
+import pytest
+
+from Benchmark.Synthetic_Data import synthetic_ohlc
+from Core_Trade.RawData_Weighting_OHLC import RawData_Weighting_OHLC
+from Core_Trade.Streaming_Weighting_OHLC import Streaming_Weighting_OHLC
+from Helper.Frame_Schema import (OHLC_COLUMNS, OHLC_FIXED_SCHEMA, OHLC_SCHEMA, _to_fixed, cast_frame,
+                                 from_fixed_point)
+
+
+def decimal_frame():
+    # As pd.read_sql returns NUMERIC columns without a dtype
+    return pd.DataFrame({'date': pd.date_range('2025-01-01', periods=3, freq='30min', tz='UTC'),
+                         'open': [Decimal('100.5'), Decimal('101.25'), Decimal('99.12345678')],
+                         'high': [Decimal('102'), Decimal('103.5'), Decimal('100')],
+                         'low': [Decimal('99'), Decimal('100.75'), Decimal('98.00000001')],
+                         'close': [Decimal('101.25'), Decimal('99.12345678'), Decimal('99.5')],
+                         'volume': [Decimal('12.3'), Decimal('0.00000001'), Decimal('7')]})
+
+
+def test_cast_frame_to_floats_and_fixed_point():
+    floats = cast_frame(decimal_frame(), {**OHLC_SCHEMA, 'volume': 'float32'})
+    assert floats['close'].dtype == np.float64 and floats['volume'].dtype == np.float32
+    assert floats['open'].tolist() == [100.5, 101.25, 99.12345678]
+
+    fixed = cast_frame(decimal_frame(), OHLC_FIXED_SCHEMA)
+    assert all(fixed[column].dtype == np.int64 for column in OHLC_COLUMNS)
+    assert fixed['low'].tolist() == [9_900_000_000, 10_075_000_000, 9_800_000_001]
+    assert fixed['volume'].tolist() == [1_230_000_000, 1, 700_000_000]
+    # Columns already of the planned type are left as they are
+    assert cast_frame(fixed, OHLC_FIXED_SCHEMA)['low'].equals(fixed['low'])
+
+
+def test_to_fixed_rejects_extra_decimals():
+    assert _to_fixed(Decimal('0.00000001'), 8) == 1
+    with pytest.raises(ValueError, match='more than 8 decimals'):
+        _to_fixed(Decimal('0.000000001'), 8)
+    with pytest.raises(ValueError):
+        cast_frame(decimal_frame().assign(close=Decimal('1.123456789')), OHLC_FIXED_SCHEMA)
+
+
+def test_fixed_point_round_trip():
+    fixed = cast_frame(decimal_frame(), OHLC_FIXED_SCHEMA)
+    floats = from_fixed_point(fixed, OHLC_FIXED_SCHEMA)
+    pd.testing.assert_frame_equal(floats, cast_frame(decimal_frame(), OHLC_SCHEMA))
+
+
+def test_features_of_a_fixed_point_frame_match_the_float_frame():
+    history = synthetic_ohlc(300)
+    fixed = cast_frame(history, OHLC_FIXED_SCHEMA)
+    expected = RawData_Weighting_OHLC(history.copy()).generate_clean_data()
+    actual = RawData_Weighting_OHLC(fixed, dtypes=OHLC_FIXED_SCHEMA).generate_clean_data()
+    for column in ('gain', 'close', 'MACD_Position', 'slope_200', 'volume_momentum'):
+        np.testing.assert_allclose(actual[column].to_numpy(dtype=float), expected[column].to_numpy(dtype=float),
+                                   rtol=1e-9, atol=1e-9, equal_nan=True, err_msg=column)
+
+    row = Streaming_Weighting_OHLC(dtypes=OHLC_FIXED_SCHEMA).update_frame(fixed)
+    assert row['gain'] == pytest.approx(expected['gain'].iloc[-1])
+
+
+def test_int64_columns_need_the_fixed_point_plan():
+    fixed = cast_frame(synthetic_ohlc(300), OHLC_FIXED_SCHEMA)
+    with pytest.raises(ValueError, match='OHLC_FIXED_SCHEMA'):
+        RawData_Weighting_OHLC(fixed).generate_clean_data()
+    with pytest.raises(ValueError, match='OHLC_FIXED_SCHEMA'):
+        Streaming_Weighting_OHLC().update_frame(fixed)
@@ -0,0 +1,124 @@
+import pandas as pd
+import pytest
+
+from Helper.Interval_Scheduler import Interval_Scheduler, SimulatedClock
+
+START = '2025-01-01 00:00:05'
+
+
+def recorder(clock, log, name, seconds=0.0, stalls=None):
+    """A job appending (name, candle_close, catching_up, started) to `log`, running `seconds` or stalls[run]."""
+    stalls = stalls or {}
+
+    def job(candle_close, catching_up):
+        log.append((name, candle_close, catching_up, clock.now()))
+        clock.advance(stalls.get(len([entry for entry in log if entry[0] == name]) - 1, seconds))
+    return job
+
+
+def live_schedule(clock, log, fetch_stalls=None):
+    # The schedule of main.py: fetch then evaluate every 30m, partitions once a day
+    scheduler = Interval_Scheduler(clock)
+    jobs = {
+        'fetch': scheduler.add_job('fetch', '30m', recorder(clock, log, 'fetch', 2, fetch_stalls), offset_seconds=10),
+        'evaluate': scheduler.add_job('evaluate', '30m', recorder(clock, log, 'evaluate', 1), offset_seconds=15,
+                                      catch_up=False),
+        'partitions': scheduler.add_job('partitions', '1d', recorder(clock, log, 'partitions'), offset_seconds=60,
+                                        catch_up=False),
+    }
+    return scheduler, jobs
+
+
+def test_deadlines_stay_on_candle_boundaries():
+    clock, log = SimulatedClock(START), []
+    scheduler, jobs = live_schedule(clock, log)
+    scheduler.run(until='2025-01-02 00:00:30')
+
+    offsets = {'fetch': 10, 'evaluate': 15, 'partitions': 60}
+    for name, candle_close, catching_up, started in log:
+        assert candle_close.second == 0 and candle_close.minute % 30 == 0, candle_close
+        # On time, every run starts at its deadline however long the previous ones took
+        assert started == candle_close + pd.Timedelta(seconds=offsets[name]), (name, candle_close)
+        assert not catching_up
+    assert jobs['fetch'].runs == jobs['evaluate'].runs == 49
+    assert jobs['partitions'].runs == 1
+    assert all(job.missed_ticks == job.skipped_ticks == 0 for job in jobs.values())
+
+
+def test_missed_fetch_ticks_are_caught_up_before_evaluate():
+    clock, log = SimulatedClock(START), []
+    # The first fetch overruns by 95 minutes, three fetch ticks and four evaluate ticks go by
+    scheduler, jobs = live_schedule(clock, log, fetch_stalls={0: 95 * 60})
+    scheduler.run(until='2025-01-01 01:40')
+
+    close = pd.Timestamp('2025-01-01', tz='UTC')
+    half_hour = pd.Timedelta(minutes=30)
+    assert [entry[:3] for entry in log if entry[0] != 'partitions'] == [
+        ('fetch', close, False),
+        ('fetch', close + half_hour, True),
+        ('fetch', close + 2 * half_hour, True),
+        ('fetch', close + 3 * half_hour, False),
+        # Without catch_up only the latest evaluate tick runs, after the fetch of its candle
+        ('evaluate', close + 3 * half_hour, False),
+    ]
+    assert (jobs['fetch'].missed_ticks, jobs['fetch'].skipped_ticks) == (2, 0)
+    assert (jobs['evaluate'].missed_ticks, jobs['evaluate'].skipped_ticks) == (3, 3)
+
+
+def test_every_fetched_candle_is_fetched_before_it_is_evaluated():
+    clock, log = SimulatedClock(START), []
+    # Every 20th fetch overruns by 95 minutes over a week
+    scheduler, jobs = live_schedule(clock, log, fetch_stalls={run: 95 * 60 for run in range(19, 400, 20)})
+    scheduler.run(until='2025-01-08')
+
+    fetched = set()
+    for name, candle_close, _, _ in log:
+        if name == 'fetch':
+            fetched.add(candle_close)
+        elif name == 'evaluate':
+            assert candle_close in fetched, f"evaluate ran before fetch for {candle_close}"
+    assert len(fetched) == 7 * 48
+    assert jobs['fetch'].skipped_ticks == 0
+    assert jobs['evaluate'].skipped_ticks == jobs['evaluate'].missed_ticks > 0
+
+
+def test_catch_up_is_bounded_by_max_catch_up():
+    clock, log = SimulatedClock(START), []
+    scheduler = Interval_Scheduler(clock)
+    job = scheduler.add_job('fetch', '30m', recorder(clock, log, 'fetch', stalls={0: 5 * 3600}),
+                            offset_seconds=10, max_catch_up=3)
+    scheduler.run(until='2025-01-01 05:05')
+
+    # Ten ticks went by, only the three latest run
+    assert [candle_close.strftime('%H:%M') for _, candle_close, _, _ in log] == ['00:00', '04:00', '04:30', '05:00']
+    assert [catching_up for _, _, catching_up, _ in log] == [False, True, True, False]
+    assert (job.missed_ticks, job.skipped_ticks, job.runs) == (9, 7, 4)
+
+
+def test_without_catch_up_only_the_latest_tick_runs():
+    clock, log = SimulatedClock(START), []
+    scheduler = Interval_Scheduler(clock)
+    job = scheduler.add_job('evaluate', '30m', recorder(clock, log, 'evaluate', stalls={0: 100 * 60}),
+                            offset_seconds=15, catch_up=False)
+    scheduler.run(until='2025-01-01 02:00')
+
+    assert [(candle_close.strftime('%H:%M'), catching_up) for _, candle_close, catching_up, _ in log] == [
+        ('00:00', False), ('01:30', False)]
+    assert (job.missed_ticks, job.skipped_ticks) == (2, 2)
+
+
+def test_failures_are_counted_and_the_schedule_goes_on():
+    clock = SimulatedClock(START)
+    scheduler = Interval_Scheduler(clock)
+
+    def failing(candle_close, catching_up):
+        raise RuntimeError('exchange down')
+    job = scheduler.add_job('fetch', '30m', failing, offset_seconds=10)
+    scheduler.run(until='2025-01-01 01:00:30')
+    assert (job.runs, job.failures) == (0, 3)
+
+
+def test_invalid_interval_is_rejected():
+    scheduler = Interval_Scheduler(SimulatedClock(START))
+    with pytest.raises(ValueError):
+        scheduler.add_job('fetch', '7x', lambda candle_close, catching_up: None)
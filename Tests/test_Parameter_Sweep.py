@@ -0,0 +1,23 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from Core_Trade.Parameter_Sweep import Shared_Feature_Frame, _backtest_from_buffer
+from Core_Trade.Vectorized_Backtest import SIGNAL_COLUMNS
+
+
+@pytest.mark.parametrize('tz', [None, 'UTC', 'Europe/Berlin'])
+def test_dates_come_back_from_shared_memory_unchanged(tz):
+    # 30 minute candles across the autumn DST change, where 02:00 to 03:00 Berlin time happens twice
+    dates = pd.date_range('2024-10-26 22:00', periods=12, freq='30min', tz='UTC')
+    dates = dates.tz_localize(None) if tz is None else dates.tz_convert(tz)
+    clean_data = pd.DataFrame({'date': dates, **{name: np.arange(12.0) for name in SIGNAL_COLUMNS},
+                               'candle_figure': 'Hammer'})
+    frame = Shared_Feature_Frame(clean_data)
+    try:
+        backtest = _backtest_from_buffer(frame.shm.buf, *frame.handle()[1:])
+        pd.testing.assert_series_equal(backtest.dates, clean_data['date'], check_names=False)
+        # The block cannot be closed while views on it are alive
+        del backtest
+    finally:
+        frame.close()
@@ -0,0 +1,43 @@
+import pandas as pd
+
+import main_Parameter_Sweep
+from Benchmark.Synthetic_Data import synthetic_ohlc
+from Core_Trade.Feature_Cache import Feature_Cache
+
+NOW = pd.Timestamp.now(tz='UTC').floor('h')
+CANDLES = synthetic_ohlc(24 * 60, interval='1h', start=NOW - pd.Timedelta(hours=24 * 60 - 1))
+
+
+class FakeFetcher:
+    """Fetch_fromDB_OHLC over the in-memory CANDLES, 60 days of 1h candles up to now."""
+    def __init__(self, schema):
+        pass
+
+    def get_OHLC_fromDB(self, symbol, interval, since_hour):
+        return CANDLES[CANDLES['date'] >= pd.Timestamp.now(tz='UTC') - pd.Timedelta(hours=since_hour)].reset_index(drop=True)
+
+    def get_OHLC_after(self, symbol, interval, after):
+        return CANDLES[CANDLES['date'] > after].reset_index(drop=True)
+
+
+def test_longer_history_rebuilds_the_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(main_Parameter_Sweep, 'Fetch_fromDB_OHLC', FakeFetcher)
+    monkeypatch.setattr(main_Parameter_Sweep, 'FEATURE_CACHE_DIR', str(tmp_path))
+    puts = []
+    put = Feature_Cache.put
+    monkeypatch.setattr(Feature_Cache, 'put', lambda self, *args, **kwargs: puts.append(1) or put(self, *args, **kwargs))
+
+    short = main_Parameter_Sweep.load_features('BTC/USDT', '1h', days=10)
+    assert short['date'].iloc[0] >= NOW - pd.Timedelta(days=10)
+    assert len(puts) == 1
+
+    # Cached from 10 days back, a 40-day request must not be served the 10-day history
+    long = main_Parameter_Sweep.load_features('BTC/USDT', '1h', days=40)
+    assert len(puts) == 2
+    assert long['date'].iloc[0] < NOW - pd.Timedelta(days=39)
+    assert long['date'].iloc[-1] == CANDLES['date'].iloc[-1]
+
+    # A shorter request is sliced from the cached frame
+    medium = main_Parameter_Sweep.load_features('BTC/USDT', '1h', days=20)
+    assert len(puts) == 2
+    assert NOW - pd.Timedelta(days=20, hours=1) < medium['date'].iloc[0] < NOW - pd.Timedelta(days=19)
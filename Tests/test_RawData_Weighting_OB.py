@@ -0,0 +1,49 @@
+import logging
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+import Core_Trade.RawData_Weighting_OB as orderbook_module
+from Core_Trade.RawData_Weighting_OB import RawData_Weighting_OB
+from Helper.Stream_Reader import stream_query
+
+
+def sqlite_cleaner(tmp_path, monkeypatch, rows):
+    # SQLite stand-in for the order book table, read through the same stream_query as PostgreSQL
+    engine = create_engine(f"sqlite:///{tmp_path / 'orderbook.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE orderbook (date TIMESTAMP, action TEXT, price REAL, btc_amount REAL)"))
+        if len(rows):
+            rows.to_sql('orderbook', conn, if_exists='append', index=False)
+    monkeypatch.setattr(orderbook_module, 'get_postgres_engine', lambda: engine)
+    monkeypatch.chdir(tmp_path)
+    cleaner = RawData_Weighting_OB('BTC/USDT')
+
+    def stream_orderbook(since_hour, chunk_rows):
+        for chunk in stream_query(engine, text("SELECT * FROM orderbook ORDER BY date"), chunk_rows=chunk_rows,
+                                  dtype={'btc_amount': 'float64'}):
+            # SQLite returns the dates as text, PostgreSQL as timestamps
+            if len(chunk):
+                chunk['date'] = pd.to_datetime(chunk['date'])
+            yield chunk
+    cleaner.stream_orderbook = stream_orderbook
+    return cleaner
+
+
+def test_empty_window_warns_and_writes_nothing(tmp_path, monkeypatch, caplog):
+    cleaner = sqlite_cleaner(tmp_path, monkeypatch, pd.DataFrame())
+    with caplog.at_level(logging.WARNING, logger='combined_OHLC_trade'):
+        cleaner.generate_clean_data(since_hour=1)
+    assert 'No order book rows in the last 1 hours.' in caplog.text
+    assert list((tmp_path / 'Data').iterdir()) == []
+
+
+def test_rows_are_written_per_minute(tmp_path, monkeypatch):
+    dates = pd.date_range('2025-01-01', periods=36, freq='5s')
+    rows = pd.DataFrame({'date': dates.repeat(2), 'action': ['Buy', 'Sell'] * 36, 'price': 100.0,
+                         'btc_amount': [2.0, 1.0] * 36})
+    cleaner = sqlite_cleaner(tmp_path, monkeypatch, rows)
+    cleaner.generate_clean_data(since_hour=1, chunk_rows=10)
+    by_minute = pd.read_csv(tmp_path / 'Data' / 'OrderBook_Grouped_byMin.csv')
+    assert len(by_minute) == 3
+    assert (by_minute['Assumed_OC_Direction'] == 'Bullish').all()
+    assert len(pd.read_csv(tmp_path / 'Data' / 'OrderBook_forminRaw.csv')) == len(rows)
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from Benchmark.Benchmark_Rolling_Regression import legacy_slope_and_residual, synthetic_middle_values
+from Core_Trade import Rolling_Regression
+from Core_Trade.Rolling_Regression import SLOPE_WINDOWS, rolling_slope_and_residual
+
+
+def assert_same(new, old):
+    np.testing.assert_array_equal(np.isnan(new), np.isnan(old))
+    np.testing.assert_allclose(new, old, rtol=1e-7, atol=1e-6, equal_nan=True)
+
+
+def test_matches_linregress_across_blocks(monkeypatch):
+    # Small blocks, so the running sums restart several times and a block can be shorter than a window
+    monkeypatch.setattr(Rolling_Regression, 'BLOCK_ROWS', 64)
+    values = synthetic_middle_values(600)
+    fast = rolling_slope_and_residual(values, SLOPE_WINDOWS)
+    for window in SLOPE_WINDOWS:
+        for new, old in zip(fast[window], legacy_slope_and_residual(values, window)):
+            assert_same(new, old)
+
+
+def test_windows_with_a_missing_value_are_nan():
+    values = synthetic_middle_values(400)
+    values[[120, 121, 300]] = np.nan
+    values[350] = np.inf
+    fast = rolling_slope_and_residual(values, (5, 30))
+    for window in (5, 30):
+        slopes, residuals = fast[window]
+        legacy_slopes, legacy_residuals = legacy_slope_and_residual(np.where(np.isfinite(values), values, np.nan), window)
+        assert_same(slopes, legacy_slopes)
+        assert_same(residuals, legacy_residuals)
+        assert np.isnan(slopes[120:120 + window]).all()
+
+
+def test_series_shorter_than_the_window():
+    slopes, residuals = rolling_slope_and_residual(synthetic_middle_values(10), (50,))[50]
+    assert len(slopes) == len(residuals) == 10
+    assert np.isnan(slopes).all() and np.isnan(residuals).all()
+
+
+def test_residuals_only_for_the_windows_asked():
+    fast = rolling_slope_and_residual(synthetic_middle_values(300), (5, 10), residual_windows=(10,))
+    assert fast[5][1] is None
+    assert not np.isnan(fast[10][1][9:]).any()
+
+
+def test_a_straight_line_has_its_slope_and_no_residual():
+    slopes, residuals = rolling_slope_and_residual(60_000 + 2.5 * np.arange(500), (10,))[10]
+    np.testing.assert_allclose(slopes[9:], 2.5)
+    np.testing.assert_allclose(residuals[9:], 0, atol=1e-6)
+
+
+def test_window_below_two_is_rejected():
+    with pytest.raises(ValueError):
+        rolling_slope_and_residual(synthetic_middle_values(10), (1,))
@@ -0,0 +1,144 @@
+import json
+import pytest
+
+from Benchmark.Benchmark_Backtest import live_replay
+from Benchmark.Benchmark_Strategy_Registry import registry_run, streaming_rows, threshold_grid
+from Core_Trade.Strategy_Registry import Strategy_Registry, Threshold_Strategies
+from Core_Trade.Trade_Journal import _json_default
+from Core_Trade.Vectorized_Backtest import StrategyThresholds
+
+
+class MemoryJournal:
+    """A Trade_Journal keeping its records in a list, with the state it recovers given up front."""
+    def __init__(self, state=None):
+        self.state = state
+        self.records = []
+
+    def recover(self):
+        return self.state
+
+    def start(self):
+        return self
+
+    def record(self, kind, payload):
+        self.records.append((kind, payload))
+
+    def close(self):
+        pass
+
+
+@pytest.fixture(scope='module')
+def rows():
+    return streaming_rows(2_000)
+
+
+def as_written(trades):
+    # Through JSON like the journal, so Timestamps and NumPy floats compare as written
+    return [json.loads(json.dumps(trade, default=_json_default)) for trade in trades]
+
+
+def registry(variants, journals):
+    strategies = Strategy_Registry()
+    plugin = strategies.register(Threshold_Strategies(variants, journals))
+    strategies.recover()
+    return strategies, plugin
+
+
+def test_every_variant_writes_the_trades_of_the_live_strategy(rows, tmp_path):
+    variants = threshold_grid(12)
+    records = registry_run(rows, variants, str(tmp_path))
+    for name, thresholds in variants.items():
+        assert records[name] == as_written(live_replay(rows, thresholds)), name
+    assert sum(map(len, records.values())) > 0
+    # Both entry conditions are taken by some variant
+    assert {record['entry_type'] for trades in records.values() for record in trades} == {
+        'Condition1_atBloodBath', 'Condition2_atVolumeMomentum'}
+
+
+def test_a_restart_from_the_journals_carries_on(rows, tmp_path):
+    variants = threshold_grid(4)
+    uninterrupted = registry_run(rows, variants, str(tmp_path / 'uninterrupted'))
+    # The restarted loop evaluates the candle before the restart again
+    restarted = registry_run(rows, variants, str(tmp_path / 'restarted'), restart_at=len(rows) // 2)
+    assert restarted == uninterrupted
+    for name, thresholds in variants.items():
+        assert restarted[name] == as_written(live_replay(rows, thresholds)), name
+
+
+def test_state_is_restored_from_the_last_snapshot(rows):
+    variants = threshold_grid(4)
+    journals = {name: MemoryJournal() for name in variants}
+    strategies, plugin = registry(variants, journals)
+    for row in rows[:500]:
+        strategies.evaluate(row)
+
+    states = {name: [payload for kind, payload in journals[name].records if kind == 'state'][-1] for name in variants}
+    restarted, restored = registry(variants, {name: MemoryJournal(state) for name, state in states.items()})
+    for variant, name in enumerate(variants):
+        assert restored.snapshot(variant) == states[name]
+        # Only the candles that changed the state are journaled, the ones after it changed nothing
+        assert {**plugin.snapshot(variant), 'last_date': states[name]['last_date']} == states[name]
+
+    # From there both go through the same states
+    for row in rows[400:1_000]:
+        restarted.evaluate(row)
+        if row['date'] > rows[499]['date']:
+            strategies.evaluate(row)
+    for variant in range(len(variants)):
+        assert restored.snapshot(variant) == plugin.snapshot(variant)
+
+
+def test_duplicate_strategy_names_are_rejected():
+    strategies = Strategy_Registry()
+    strategies.register(Threshold_Strategies({'live': StrategyThresholds()}, {'live': MemoryJournal()}))
+    with pytest.raises(ValueError, match='live'):
+        strategies.register(Threshold_Strategies(
+            {'loose': StrategyThresholds(confirmation_gain=40), 'live': None},
+            {'loose': MemoryJournal(), 'live': MemoryJournal()}))
+    # The rejected plugin left nothing behind
+    assert strategies.names == ['live'] and len(strategies.plugins) == 1
+
+
+def test_journals_of_unknown_strategies_are_rejected():
+    with pytest.raises(ValueError, match='ghost'):
+        Threshold_Strategies({'live': None}, {'live': MemoryJournal(), 'ghost': MemoryJournal()})
+
+
+def test_candles_already_evaluated_are_skipped(rows):
+    variants = threshold_grid(4)
+    journals = {name: MemoryJournal() for name in variants}
+    strategies, plugin = registry(variants, journals)
+    for row in rows[:500]:
+        strategies.evaluate(row)
+    snapshots = [plugin.snapshot(variant) for variant in range(len(variants))]
+    written = {name: len(journal.records) for name, journal in journals.items()}
+
+    for row in rows[400:500]:
+        strategies.evaluate(row)
+    assert [plugin.snapshot(variant) for variant in range(len(variants))] == snapshots
+    assert {name: len(journal.records) for name, journal in journals.items()} == written
+
+
+def test_a_variant_behind_evaluates_the_candles_the_others_skip(rows):
+    variants = threshold_grid(2)
+    ahead, behind = variants
+    full = {name: MemoryJournal() for name in variants}
+    strategies, plugin = registry(variants, full)
+    for row in rows[:500]:
+        strategies.evaluate(row)
+
+    # `ahead` recovers its state at candle 500, `behind` at candle 300
+    partial = {name: MemoryJournal() for name in variants}
+    strategies_300, plugin_300 = registry(variants, partial)
+    for row in rows[:300]:
+        strategies_300.evaluate(row)
+    journals = {ahead: MemoryJournal(plugin.snapshot(0)), behind: MemoryJournal(plugin_300.snapshot(1))}
+    strategies, restarted = registry(variants, journals)
+    for row in rows[:500]:
+        strategies.evaluate(row)
+
+    assert restarted.snapshot(0) == plugin.snapshot(0)
+    assert restarted.snapshot(1) == plugin.snapshot(1)
+    assert journals[ahead].records == []
+    assert [record for record in journals[behind].records if record[0] != 'state'] == [
+        record for record in full[behind].records[len(partial[behind].records):] if record[0] != 'state']
@@ -0,0 +1,42 @@
+from time import perf_counter
+import numpy as np
+import pandas as pd
+
+from Benchmark.Synthetic_Data import synthetic_ohlc
+from Core_Trade.RawData_Weighting_OHLC import RawData_Weighting_OHLC
+from Core_Trade.Streaming_Weighting_OHLC import Streaming_Weighting_OHLC
+
+
+def test_streaming_rows_match_the_batch_features():
+    history = synthetic_ohlc(2_000)
+    batch = RawData_Weighting_OHLC(history.copy()).generate_clean_data()
+
+    stream = Streaming_Weighting_OHLC()
+    rows = pd.DataFrame([stream.update(candle) for candle in history.to_dict('records')])
+
+    assert list(rows.columns) == list(batch.columns)
+    for column in batch.columns:
+        expected, actual = batch[column], rows[column]
+        if column in ('date', 'candle_figure'):
+            assert expected.astype(object).fillna('').astype(str).equals(actual.astype(object).fillna('').astype(str)), column
+        else:
+            np.testing.assert_allclose(actual.to_numpy(dtype=float), expected.to_numpy(dtype=float),
+                                       rtol=1e-7, atol=1e-6, equal_nan=True, err_msg=column)
+
+
+def per_tick_seconds(history_rows, ticks=300):
+    history = synthetic_ohlc(history_rows + ticks)
+    stream = Streaming_Weighting_OHLC()
+    stream.update_frame(history.iloc[:history_rows])
+    durations = []
+    for candle in history.iloc[history_rows:].to_dict('records'):
+        start = perf_counter()
+        stream.update(candle)
+        durations.append(perf_counter() - start)
+    return np.median(durations)
+
+
+def test_tick_latency_does_not_grow_with_the_history():
+    # The batch path recomputes the whole history, the streaming one only keeps its windows
+    short, long = per_tick_seconds(500), per_tick_seconds(50_000)
+    assert long < 2 * short, f"{long * 1e6:.1f} us per tick after 50000 candles, {short * 1e6:.1f} us after 500"
@@ -0,0 +1,107 @@
+import json
+import pandas as pd
+import pytest
+
+from Core_Trade.Trade_Journal import Trade_Journal
+from Core_Trade.Vectorized_Backtest import RealTimeTradeStrategy
+
+START = pd.Timestamp('2025-01-01 10:00', tz='UTC')
+END = pd.Timestamp('2025-01-01 12:30', tz='UTC')
+ENTRY = {'start': START, 'entrance_gain': 250.5, 'volume_momentum': 12.0, 'Entrance_MDAC': -3.25,
+         'slope_5': -0.5, 'Scaled_Close_10': 0.1, 'close': 60_123.45, 'entry_type': 'Condition1_atBloodBath'}
+TRADE = {**ENTRY, 'end': END, 'gain': 412.0, 'exit': 'Avalanch'}
+
+
+def state(**changes):
+    return {'active_trade': True, 'waiting_for_confirmation': False, 'session_gain': 12.5, 'trade_record': ENTRY,
+            'entry_evaluated_this_session': False, 'last_date': START, **changes}
+
+
+def journal(tmp_path, fsync='never'):
+    return Trade_Journal(str(tmp_path / 'trade_journal.jsonl'), str(tmp_path / 'trade_records_Result.json'),
+                         fsync=fsync)
+
+
+def written(tmp_path, events):
+    first = journal(tmp_path)
+    for event, data in events:
+        first.record(event, data)
+    first.close()
+    return tmp_path / 'trade_journal.jsonl'
+
+
+def test_recover_returns_the_last_state_with_its_timestamps(tmp_path):
+    written(tmp_path, [('state', state(active_trade=False, trade_record={})), ('entry', ENTRY),
+                       ('state', state())])
+    recovered = journal(tmp_path).recover()
+    assert recovered == state()
+    assert isinstance(recovered['last_date'], pd.Timestamp)
+    assert isinstance(recovered['trade_record']['start'], pd.Timestamp)
+
+
+def test_recover_without_a_journal_or_a_state(tmp_path):
+    assert journal(tmp_path).recover() is None
+    written(tmp_path, [('entry', ENTRY)])
+    assert journal(tmp_path).recover() is None
+
+
+def test_a_torn_last_line_is_truncated(tmp_path):
+    journal_path = written(tmp_path, [('state', state(session_gain=1.0)), ('state', state(session_gain=2.0))])
+    complete = journal_path.read_bytes()
+    with open(journal_path, 'ab') as f:
+        f.write(b'{"seq": 3, "time": 1.0, "event": "state", "data": {"active_tr')
+
+    recovering = journal(tmp_path)
+    assert recovering.recover() == state(session_gain=2.0)
+    assert journal_path.read_bytes() == complete
+
+    # The next batch starts on a line of its own
+    recovering.record('state', state(session_gain=3.0))
+    recovering.close()
+    assert journal(tmp_path).recover() == state(session_gain=3.0)
+
+
+def test_unreadable_lines_are_skipped(tmp_path):
+    journal_path = written(tmp_path, [('state', state(session_gain=1.0))])
+    with open(journal_path, 'a') as f:
+        f.write('not json\n')
+    with open(journal_path, 'a') as f:
+        f.write(json.dumps({'seq': 2, 'time': 1.0, 'event': 'state', 'data': {**state(session_gain=2.0),
+                                                                              'last_date': START.isoformat(),
+                                                                              'trade_record': {}}}) + '\n')
+    recovering = journal(tmp_path)
+    assert recovering.recover() == state(session_gain=2.0, trade_record={})
+    assert recovering.sequence == 2
+
+
+def test_the_sequence_continues_after_a_recovery(tmp_path):
+    journal_path = written(tmp_path, [('state', state()), ('entry', ENTRY), ('state', state())])
+    recovering = journal(tmp_path)
+    recovering.recover()
+    assert recovering.sequence == 3
+    recovering.record('exit', TRADE)
+    recovering.close()
+    assert [json.loads(line)['seq'] for line in journal_path.read_text().splitlines()] == [1, 2, 3, 4]
+
+
+def test_exits_reach_the_trade_records_in_the_former_format(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'Data').mkdir()
+    # What RealTimeTradeStrategy appended before the journal
+    RealTimeTradeStrategy().write_trade_to_file(dict(TRADE))
+    former = (tmp_path / 'Data' / 'trade_records_Result.json').read_text()
+    (tmp_path / 'Data' / 'trade_records_Result.json').unlink()
+
+    strategy = RealTimeTradeStrategy(journal=Trade_Journal(fsync='never'))
+    strategy.journal.record('entry', ENTRY)
+    strategy.write_trade_to_file(dict(TRADE))
+    strategy.journal.close()
+    assert (tmp_path / 'Data' / 'trade_records_Result.json').read_text() == former
+    # Entries and states only go to the journal
+    assert [json.loads(line)['event'] for line in (tmp_path / 'Data' / 'trade_journal.jsonl').read_text().splitlines()] == [
+        'entry', 'exit']
+
+
+def test_invalid_fsync_policy_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        journal(tmp_path, fsync='sometimes')
@@ -0,0 +1,68 @@
+import pandas as pd
+import pytest
+
+from Benchmark.Benchmark_Backtest import RecordingStrategy, same_trades
+from Benchmark.Synthetic_Data import synthetic_ohlc
+from Core_Trade.RawData_Weighting_OHLC import RawData_Weighting_OHLC
+from Core_Trade.Vectorized_Backtest import StrategyThresholds, Vectorized_Backtest
+
+THRESHOLD_SETS = [
+    StrategyThresholds(),
+    StrategyThresholds(confirmation_gain=40, volume_momentum_min=60),
+    StrategyThresholds(scaled_close_10_max=0.5, confirmation_gain=0, volume_momentum_min=20, max_loss=-100),
+    StrategyThresholds(scaled_close_10_max=0.5, confirmation_gain=0, volume_momentum_min=1e9),
+]
+
+
+@pytest.fixture(scope='module')
+def clean():
+    return RawData_Weighting_OHLC(synthetic_ohlc(2_000, interval='1min')).generate_clean_data()
+
+
+def live_replay(clean, thresholds):
+    strategy = RecordingStrategy(thresholds)
+    for row in clean.to_dict('records'):
+        strategy.evaluate_entry(row)
+        strategy.evaluate_exit(row)
+    return strategy
+
+
+@pytest.mark.parametrize('thresholds', THRESHOLD_SETS, ids=range(len(THRESHOLD_SETS)))
+def test_trades_match_the_live_strategy(clean, thresholds):
+    live = live_replay(clean, thresholds)
+    backtest = Vectorized_Backtest(clean, thresholds)
+    assert same_trades(live.trades, backtest.run())
+    # A trade still open at the end is the one the live class holds, without an exit
+    assert backtest.open_trade == (live.trade_record if live.active_trade else None)
+
+
+def test_threshold_sets_cover_both_entries_and_both_exits(clean):
+    backtest = Vectorized_Backtest(clean)
+    trades = pd.DataFrame([trade for thresholds in THRESHOLD_SETS for trade in backtest.run(thresholds)])
+    assert set(trades['entry_type']) == {'Condition1_atBloodBath', 'Condition2_atVolumeMomentum'}
+    assert set(trades['exit']) == {'Avalanch', 'MaxLoss'}
+    # Condition 1 alone, with Condition 2 out of reach
+    assert set(pd.DataFrame(backtest.run(THRESHOLD_SETS[-1]))['entry_type']) == {'Condition1_atBloodBath'}
+
+
+@pytest.mark.parametrize('thresholds', THRESHOLD_SETS[1:], ids=range(1, len(THRESHOLD_SETS)))
+def test_trade_open_at_the_end_matches_the_live_one(clean, thresholds):
+    # Cut the data on the row after an entry, before its exit
+    trade = Vectorized_Backtest(clean, thresholds).run()[-1]
+    history = clean[clean['date'] <= trade['start'] + (clean['date'].iloc[1] - clean['date'].iloc[0])]
+
+    live = live_replay(history, thresholds)
+    backtest = Vectorized_Backtest(history, thresholds)
+    assert same_trades(live.trades, backtest.run())
+    assert live.active_trade and backtest.open_trade == live.trade_record
+    assert backtest.open_trade['start'] == trade['start'] and 'end' not in backtest.open_trade
+
+
+def test_run_takes_other_thresholds_than_the_constructor(clean):
+    backtest = Vectorized_Backtest(clean, THRESHOLD_SETS[1])
+    assert same_trades(backtest.run(THRESHOLD_SETS[2]), Vectorized_Backtest(clean, THRESHOLD_SETS[2]).run())
+
+
+def test_empty_frame_is_rejected():
+    with pytest.raises(ValueError):
+        Vectorized_Backtest(pd.DataFrame())
@@ -1,150 +1,127 @@
-import time
-import json
 from os import path
-from datetime import datetime, timedelta, timezone
-import pandas as pd
 from Core_Trade.Fetch_Online_OHLC import FetchTradeMinute
 from Core_Trade.Fetch_fromDB_OHLC import Fetch_fromDB_OHLC
-from Core_Trade.RawData_Weighting_OHLC import RawData_Weighting_OHLC
+from Core_Trade.OHLC_Rollup import OHLC_Rollup
+from Core_Trade.RawData_Weighting_OHLC import minimum_lookback
+from Core_Trade.Streaming_Weighting_OHLC import Streaming_Weighting_OHLC
+from Core_Trade.Strategy_Registry import Strategy_Registry, Threshold_Strategies
+from Core_Trade.Trade_Journal import Trade_Journal
+from Core_Trade.Vectorized_Backtest import StrategyThresholds
+from Helper.Interval_Scheduler import Interval_Scheduler
+from Helper.Stage_Metrics import STAGE_METRICS
 from Helper.logger_setup import setup_logger
+from main_Create_Partition import main as create_partitions
 
 # Initialize logger
 logger = setup_logger('combined_OHLC_trade', 'combined_OHLC_trade.log')
 
-class RealTimeTradeStrategy:
-    def __init__(self):
-        self.active_trade = False
-        self.waiting_for_confirmation = False
-        self.session_gain = 0
-        self.trade_record = {}
-        self.entry_evaluated_this_session = False
-
-
-    def evaluate_entry(self, row):
-        if (
-            row.get('candle_figure') in ['Hammer', 'InvertedHammer'] and
-            row.get('Bloodbath') == 1 and
-            row.get('Scaled_Close_10') < 0.2 and 
-            row.get('slope_5') < 0 and
-            not self.active_trade
-        ):
-            self.waiting_for_confirmation = True
-
-        elif (
-            self.waiting_for_confirmation and
-            row.get('gain') > 230 and
-            not self.active_trade
-        ):
-            self.active_trade = True
-            self.session_gain = 0
-            self.waiting_for_confirmation = False
-            self.trade_record = {
-                'start': row.get('date'),
-                'entrance_gain':row.get('gain'),
-                'volume_momentum': row.get('volume_momentum'),
-                'Entrance_MDAC': row.get('MACD_Position'),
-                'slope_5': row.get('slope_5'),
-                'Scaled_Close_10': row.get('Scaled_Close_10'),
-                'close': row.get('close'),
-                'entry_type': 'Condition1_atBloodBath'
-            }
-            self.entry_evaluated_this_session = True
-            logger.info(' ===> Enter Trade witth Condition1_atBloodBath.')
-        #Condition 2
-        elif (
-            300 < row.get('volume_momentum') and
-            row.get('Bloodbath') == 0 and
-            row.get('MACD_Position') > 0 and 
-            row.get('avalanch') == 0 and 
-            row.get('slope_5') > 0 and
-            not self.active_trade
-        ):
-            self.active_trade = True
-            self.session_gain = 0
-            self.trade_record = {
-                'start': row.get('date'),
-                'entrance_gain':row.get('gain'),
-                'volume_momentum': row.get('volume_momentum'),
-                'Entrance_MDAC': row.get('MACD_Position'),
-                'slope_5': row.get('slope_5'),
-                'Scaled_Close_10': row.get('Scaled_Close_10'),
-                'close': row.get('close'),
-                'entry_type': 'Condition2_atVolumeMomentum'
-            }
-            self.entry_evaluated_this_session = True
-            logger.info(' ===> Enter Trade witth Condition2_atVolumeMomentum.')
-
-    def evaluate_exit(self, row):
-        if self.entry_evaluated_this_session:
-            logger.info("No entry evaluated this session, skipping exit evaluation.")
-            self.entry_evaluated_this_session = False
+# Stage timings and counters, as Prometheus text on localhost and as a JSON file refreshed every few minutes
+METRICS_PORT = 9108
+METRICS_JSON = path.join('Data', 'stage_metrics.json')
+METRICS_DUMP_SECONDS = 300
+
+# Strategies evaluated live on the same candles, each with its own journal under Data/strategies/<name>.
+# 'live' keeps the former Data/trade_journal.jsonl and Data/trade_records_Result.json.
+STRATEGIES = {'live': StrategyThresholds()}
+
+class LiveTradingJobs:
+    """
+    State shared by the scheduled fetch and evaluate jobs of the live loop. With a base_interval
+    ('1m') the fetch job stores base candles and rolls them up into `interval` instead of fetching it.
+    """
+    def __init__(self, symbol: str = 'BTC/USDT', interval: str = '30m', base_interval: str = None,
+                 strategies: Strategy_Registry = None):
+        self.symbol = symbol
+        self.interval = interval
+        self.base_interval = base_interval
+        if strategies is None:
+            strategies = Strategy_Registry()
+            strategies.register(Threshold_Strategies(STRATEGIES, journals={'live': Trade_Journal()}))
+        self.strategies = strategies
+        self.fetcher = FetchTradeMinute('binance', symbol)
+        self.db_fetcher = Fetch_fromDB_OHLC(schema='trade')
+        self.rollup = OHLC_Rollup(symbol, base_interval) if base_interval else None
+        self.indicators = None
+        self.gap_to_fill = False
+
+    def fetch(self, candle_close, catching_up):
+        if self.rollup is not None:
+            # One paged call brings every base candle since the last one stored, missed ticks included
+            if catching_up:
+                return
+            logger.info(f"Fetching {self.base_interval} candles and rolling them up into {self.interval}.")
+            self.fetcher.backfill_ohlc_to_db(self.base_interval)
+            self.rollup.refresh(self.interval)
             return
-        raw_exit_trigger = row.get('avalanch') == 1 or row.get('gain_last_5interval') < -50
-
-        if self.active_trade and raw_exit_trigger:
-            self.session_gain += row.get('gain')
-            self.trade_record['end'] = row.get('date')
-            self.trade_record['gain'] = self.session_gain
-            self.trade_record['exit'] = 'Avalanch' if row.get('avalanch') == 1 else 'MaxLoss'
-
-            # Save trade record
-            self.write_trade_to_file(self.trade_record)
-
-            # Reset state
-            self.active_trade = False
-            self.session_gain = 0
-            self.trade_record = {}
-            logger.info('Exit Trade ...')
-
-        elif self.active_trade:
-            self.session_gain += row.get('gain')
-
-    def write_trade_to_file(self, trade):
-        trade['start']=trade['start'].isoformat()
-        trade['end']=trade['end'].isoformat()
-        with open(path.join('Data','trade_records_Result.json'), 'a') as f:
-            f.write(json.dumps(trade) + '\n')
 
+        # Missed ticks are not fetched one by one, the last tick backfills the whole gap instead
+        if catching_up:
+            self.gap_to_fill = True
+            return
+        if self.gap_to_fill:
+            logger.info(f"Backfilling the {self.interval} candles missed before {candle_close}.")
+            if self.fetcher.backfill_ohlc_to_db(self.interval):
+                # A repaired fallback was already fed to the indicators as zeros, warm them up again from the DB
+                self.indicators = None
+            self.gap_to_fill = False
+        else:
+            logger.info(f"Starting {self.interval} OHLC fetch and load.")
+            self.fetcher.fetch_ohlc_and_load_to_db(self.interval)
+        logger.info("OHLC fetch complete.")
+
+    def evaluate(self, candle_close, catching_up):
+        # Run trade logic, the indicators are warmed up once and then only fed the new candles
+        if self.indicators is None:
+            raw_data = self.db_fetcher.get_OHLC_fromDB(symbol=self.symbol, interval=self.interval, limit=minimum_lookback())
+            if raw_data is None:
+                raise ValueError("There is no Data passed, this is an empty dataset")
+            self.indicators = Streaming_Weighting_OHLC(dtypes=self.db_fetcher.dtypes)
+        else:
+            raw_data = self.db_fetcher.get_OHLC_after(symbol=self.symbol, interval=self.interval, after=self.indicators.last_date)
+
+        if raw_data is not None:
+            with STAGE_METRICS.stage('features'):
+                last_row = self.indicators.update_frame(raw_data)
+            # Every strategy reads the same row, the candles evaluated before a restart are skipped per strategy
+            logger.info(f"Evaluating {len(self.strategies.names)} strategies for {last_row.get('date')}")
+            with STAGE_METRICS.stage('strategy'):
+                self.strategies.evaluate(last_row)
+        else:
+            logger.warning("No OHLC data found to evaluate.")
 
-def wait_until_next_interval(interval_minutes=5, offset_seconds=10):
-    """Waits until the next interval + offset (e.g., every 5 minutes + 10 seconds)"""
-    now_tmp = datetime.now(timezone.utc)
-    flooring='{interval}min'.format(interval=interval_minutes)
-    now=pd.to_datetime(now_tmp).floor(flooring)
-    next_minute = (now.replace(second=0, microsecond=0) + timedelta(minutes=interval_minutes))
-    next_run = next_minute + timedelta(seconds=offset_seconds)
-    wait_time = (next_run - now_tmp).total_seconds()
-    logger.info(f"Next run scheduled at {next_run} UTC. Waiting {wait_time:.2f} seconds.")
-    time.sleep(wait_time)
 
 def main():
-    strategy = RealTimeTradeStrategy()
-    BTC_fetcher = FetchTradeMinute('binance', 'BTC/USDT')
-    db_fetcher = Fetch_fromDB_OHLC(schema='trade')
-
-    while True:
-        try:
-            logger.info("Starting 30m OHLC fetch and load.")
-            BTC_fetcher.fetch_ohlc_and_load_to_db('30m')
-            logger.info("OHLC fetch complete.")
-
-            # Run trade logic
-            raw_data = db_fetcher.get_OHLC_fromDB(symbol='BTC/USDT', interval='30m', since_hour=10)
-            cleaner = RawData_Weighting_OHLC(raw_data)
-            ohlc = cleaner.generate_clean_data()
-
-            if not ohlc.empty:
-                last_row = ohlc.iloc[-1].to_dict()
-                logger.info(f"Evaluating trade logic for {last_row.get('date')}")
-                strategy.evaluate_entry(last_row)
-                strategy.evaluate_exit(last_row)
-            else:
-                logger.warning("No OHLC data found to evaluate.")
-
-        except Exception as e:
-            logger.exception(f"Error in combined loop: {e}")
-
-        wait_until_next_interval(30, 10)
+    # Entries, exits and the state of every strategy go through its journal, open positions survive a restart
+    jobs = LiveTradingJobs('BTC/USDT', '30m')
+    jobs.strategies.recover()
+
+    STAGE_METRICS.start_json_dump(METRICS_JSON, METRICS_DUMP_SECONDS)
+    try:
+        STAGE_METRICS.serve(METRICS_PORT)
+    except OSError as e:
+        logger.error(f"Stage metrics endpoint not started on port {METRICS_PORT}: {e}")
+
+    # Fill any gap left by downtime and evaluate once before the schedule takes over
+    try:
+        if jobs.rollup is not None:
+            jobs.fetch(None, False)
+        else:
+            jobs.fetcher.backfill_ohlc_to_db(jobs.interval)
+        jobs.evaluate(None, False)
+    except Exception as e:
+        logger.exception(f"Start-up backfill and evaluation failed: {e}")
+
+    scheduler = Interval_Scheduler()
+    scheduler.add_job('fetch', jobs.interval, jobs.fetch, offset_seconds=10)
+    scheduler.add_job('evaluate', jobs.interval, jobs.evaluate, offset_seconds=15, catch_up=False)
+    scheduler.add_job('create_partitions', '1d', lambda candle_close, catching_up: create_partitions(),
+                      offset_seconds=60, catch_up=False)
+    try:
+        scheduler.run()
+    finally:
+        jobs.strategies.close()
+        STAGE_METRICS.dump_json(METRICS_JSON)
+        STAGE_METRICS.stop()
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,35 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+import pandas as pd
+from Core_Trade.Async_OHLC_Collector import Async_OHLC_Collector
+from Core_Trade.Fetch_Online_OHLC import OHLC_DB_Sink
+from Helper.logger_setup import setup_logger
+
+logger = setup_logger('combined_OHLC_trade', 'combined_OHLC_trade.log')
+
+SYMBOLS = ['BTC/USDT', 'ETH/USDT', 'SOL/USDT', 'BNB/USDT', 'XRP/USDT']
+INTERVALS = ['1m', '5m', '30m', '1h']
+
+def due_intervals(now: pd.Timestamp) -> list:
+    # An interval is due when the minute that just started is one of its candle boundaries
+    minute = now.floor('min')
+    return [interval for interval in INTERVALS if minute.floor(interval.replace('m', 'min')) == minute]
+
+async def run():
+    collector = Async_OHLC_Collector(SYMBOLS, INTERVALS, OHLC_DB_Sink('trade'), max_concurrency=5)
+    try:
+        while True:
+            now = datetime.now(timezone.utc)
+            next_run = now.replace(second=0, microsecond=0) + timedelta(minutes=1, seconds=10)
+            await asyncio.sleep((next_run - now).total_seconds())
+            intervals = due_intervals(pd.Timestamp(next_run))
+            try:
+                inserted = await collector.collect_once(intervals)
+                logger.info(f"Collected {intervals}: {inserted} new candles stored.")
+            except Exception as e:
+                logger.exception(f"Error in collector round: {e}")
+    finally:
+        await collector.close()
+
+if __name__ == '__main__':
+    asyncio.run(run())
@@ -0,0 +1,29 @@
+from Helper.logger_setup import setup_logger
+from Core_Trade.Fetch_Online_OHLC import FetchTradeMinute
+from Core_Trade.OHLC_Rollup import OHLC_Rollup, ROLLUP_INTERVALS
+
+logger = setup_logger('combined_OHLC_trade', 'combined_OHLC_trade.log')
+
+# Used only when a table is still empty, otherwise the backfill starts after the last stored candle
+BACKFILL_START = '2025-01-01'
+
+def main():
+    # Only the 1m candles come from the exchange, the higher timeframes are rolled up from them
+    fetcher = FetchTradeMinute('binance', 'BTC/USDT')
+    try:
+        logger.info("Starting 1m OHLC backfill.")
+        inserted = fetcher.backfill_ohlc_to_db('1m', since=BACKFILL_START)
+        print(f"1m: {inserted} candles inserted")
+    except Exception as e:
+        logger.exception(f"Backfill of 1m failed: {e}")
+        return
+
+    rollup = OHLC_Rollup('BTC/USDT', '1m')
+    for interval in ROLLUP_INTERVALS:
+        try:
+            print(f"{interval}: {rollup.refresh(interval)} candles rolled up")
+        except Exception as e:
+            logger.exception(f"Rollup of {interval} failed: {e}")
+
+if __name__ == '__main__':
+    main()
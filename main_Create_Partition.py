@@ -1,30 +1,24 @@
-from Helper.Create_DatabaseSchema import CreateDatabaseSchema
-from Helper.Database_Engine import DatabaseEngine
-from sqlalchemy import inspect
+from Helper.Partition_Manager import Partition_Manager
 from Helper.logger_setup import setup_logger
 import logging
-import re
 
 logger = logging.getLogger('combined_OHLC_trade')
 
-def main():
-    
-    engine_gen = DatabaseEngine()
-    engine = engine_gen.create_postgres_engine()
-    inspector = inspect(engine)
-    
-    # Get all tables in 'trade' schema
-    all_tables = inspector.get_table_names(schema='trade')
+# Partitions are kept ready this many days ahead, all tables in one transaction
+DAYS_AHEAD = 3
+
+# Tables matching a pattern get weekly or monthly partitions instead of daily ones, e.g. {'*_orderbook': 'week'}
+PARTITION_PERIODS = {}
 
-    # Filter to base tables only (exclude partitions)
-    base_tables = [t for t in all_tables if not re.search(r'_p_\d{8}$', t)]
-    logger.info(f"Base tables found: {base_tables}")
+# Partitions ending more than this many days ago are detached (and dropped with DROP_EXPIRED), None keeps everything
+RETENTION_DAYS = None
+DROP_EXPIRED = False
 
-    # Create partition for each base table
-    create_table = CreateDatabaseSchema()
-    for table_name in base_tables:
-        logger.info(f"Creating partition for table: {table_name}")
-        create_table.create_partition(table_name, offset=1)
+def main():
+    manager = Partition_Manager('trade', days_ahead=DAYS_AHEAD, periods=PARTITION_PERIODS,
+                                retention_days=RETENTION_DAYS, drop_detached=DROP_EXPIRED)
+    result = manager.maintain()
+    logger.info(f"Partition maintenance done, created {len(result['created'])}, expired {len(result['expired'])}.")
 
 if __name__ == '__main__':
     main()
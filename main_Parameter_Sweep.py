@@ -0,0 +1,72 @@
+import argparse
+import re
+from os import path
+import pandas as pd
+from Helper.logger_setup import setup_logger
+from Core_Trade.Fetch_fromDB_OHLC import Fetch_fromDB_OHLC
+from Core_Trade.Feature_Cache import Feature_Cache
+from Core_Trade.Parameter_Sweep import Parameter_Sweep, grid_space, random_space
+
+logger = setup_logger('combined_OHLC_trade', 'combined_OHLC_trade.log')
+
+FEATURE_CACHE_DIR = path.join('Data', 'feature_cache')
+
+# Grid around the live thresholds, used unless --samples asks for a random search
+GRID = {
+    'scaled_close_10_max': [0.1, 0.2, 0.3],
+    'confirmation_gain': [150, 230, 300],
+    'volume_momentum_min': [200, 300, 400],
+    'max_loss': [-30, -50, -80],
+}
+RANDOM_RANGES = {
+    'scaled_close_10_max': (0.05, 0.5),
+    'confirmation_gain': (50, 400),
+    'volume_momentum_min': (100, 600),
+    'max_loss': (-150, -20),
+}
+
+def load_features(symbol: str, interval: str, days: int) -> pd.DataFrame:
+    # Features are cached on disk, later runs only compute the candles stored since the previous one.
+    # A run asking for more history than the cached frame was built from computes it again.
+    db_fetcher = Fetch_fromDB_OHLC(schema='trade')
+    cache = Feature_Cache(cache_dir=FEATURE_CACHE_DIR)
+    table_name = "trade_{segment}_ohlc".format(segment=re.sub(r'[^A-Za-z0-9]', '', symbol).lower() + interval)
+    since = pd.Timestamp.now(tz='UTC') - pd.Timedelta(days=days)
+
+    last_date = cache.last_date(table_name, interval)
+    history_start = cache.history_start(table_name, interval)
+    if last_date is None or history_start > since:
+        if last_date is not None:
+            logger.info(f"Feature cache starts at {history_start}, rebuilding it from {since} for {days} days.")
+        raw_data = db_fetcher.get_OHLC_fromDB(symbol=symbol, interval=interval, since_hour=days * 24)
+        if raw_data is None:
+            raise ValueError("There is no Data passed, this is an empty dataset")
+        clean_data = cache.put(table_name, interval, raw_data, since=since)
+    else:
+        new_candles = db_fetcher.get_OHLC_after(symbol=symbol, interval=interval, after=last_date)
+        clean_data = cache.extend(table_name, interval, new_candles)
+        logger.info(f"Feature cache extended with {0 if new_candles is None else len(new_candles)} candles.")
+
+    return clean_data[clean_data['date'] >= since].reset_index(drop=True)
+
+def main():
+    parser = argparse.ArgumentParser(description='Sweep the strategy thresholds over the stored OHLC history')
+    parser.add_argument('--symbol', default='BTC/USDT')
+    parser.add_argument('--interval', default='1m')
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--samples', type=int, default=None, help='random search with this many samples')
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    clean_data = load_features(args.symbol, args.interval, args.days)
+
+    candidates = random_space(RANDOM_RANGES, args.samples) if args.samples else grid_space(GRID)
+    ranked = Parameter_Sweep(clean_data, args.workers).run(candidates)
+
+    output = path.join('Data', f'parameter_sweep_{args.interval}.csv')
+    ranked.to_csv(output, index=False)
+    logger.info(f"Ranked {len(ranked)} threshold sets into {output}")
+    print(ranked.head(10).to_string(index=False))
+
+if __name__ == '__main__':
+    main()